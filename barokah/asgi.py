@@ -5,6 +5,16 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+View storefront yang I/O-bound (home, produk, riwayat/detail pesanan, upload
+bukti bayar dan feedback) adalah view async: di bawah ASGI satu proses melayani
+banyak koneksi tanpa satu thread per request. Jalankan dengan uvicorn:
+
+    pip install uvicorn
+    uvicorn barokah.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+View lain tetap sync dan dijalankan Django di thread pool. Perbandingan dengan
+deployment WSGI: lihat core/loadtest.py.
 """
 
 import os
@@ -1,4 +1,23 @@
 
+"""
+Instance Celery proyek.
+
+Worker dijalankan per queue (routing di CELERY_TASK_ROUTES, settings.py), masing-
+masing dengan concurrency dan prefetch sesuai beban tugasnya:
+
+    # deadline pembayaran: sedikit proses, ambil satu pesan per proses
+    celery -A barokah worker -Q critical -n critical@%h -c 2 --prefetch-multiplier 1
+    # email: I/O-bound (SMTP), banyak proses dan prefetch lebih besar
+    celery -A barokah worker -Q email -n email@%h -c 8 --prefetch-multiplier 4
+    # broadcast/rollup/ekspor: tugas lama, jangan menimbun pesan di satu proses
+    celery -A barokah worker -Q batch -n batch@%h -c 2 --prefetch-multiplier 1 -O fair
+    # default (render invoice, dll.)
+    celery -A barokah worker -Q celery -n default@%h -c 4
+    celery -A barokah beat
+
+Untuk pengembangan lokal satu worker bisa mengonsumsi semuanya:
+    celery -A barokah worker -Q critical,email,batch,celery
+"""
 import os
 from celery import Celery
 
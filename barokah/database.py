@@ -0,0 +1,103 @@
+"""
+DATABASES dari environment.
+
+    DB_ENGINE        sqlite (default) atau mysql
+    DB_NAME          sqlite: path file (default BASE_DIR/db.sqlite3); mysql: nama schema
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT          (mysql)
+    DB_CONN_MAX_AGE  detik koneksi dipakai ulang antar request (default 60 untuk
+                     mysql, 0 untuk sqlite); koneksi dicek dulu (CONN_HEALTH_CHECKS)
+                     sebelum dipakai ulang, jadi koneksi yang diputus server diganti
+
+Replika baca (alias 'replica') dibuat jika DB_REPLICA_HOST atau DB_REPLICA_NAME
+diisi. Variabel DB_REPLICA_* yang kosong mengikuti nilai primary, jadi replika
+MySQL cukup DB_REPLICA_HOST; lokal bisa dua file SQLite (DB_REPLICA_NAME).
+Kode mana yang membaca dari replika diatur core/routers.py.
+
+SQLite memakai backend barokah.sqlite3: PRAGMA di SQLITE_PRAGMAS dijalankan
+setiap koneksi baru dibuka. WAL membuat pembaca tidak memblokir penulis, dan
+busy_timeout membuat penulis menunggu lock alih-alih langsung gagal dengan
+"database is locked". Blok yang membaca lalu menulis memakai atomic_tulis()
+agar lock tulis diambil di awal transaksi (BEGIN IMMEDIATE).
+"""
+import os
+from contextlib import contextmanager
+
+ENGINE = {
+    'sqlite': 'barokah.sqlite3',
+    'mysql': 'django.db.backends.mysql',
+}
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Aman bersama WAL: fsync hanya saat checkpoint, commit tetap atomik
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # milidetik
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+def _database(env, base_dir, default_name):
+    engine = env('ENGINE', 'sqlite')
+    if engine not in ENGINE:
+        raise ValueError(f"DB_ENGINE tidak dikenal: {engine!r} (pilihan: {', '.join(ENGINE)})")
+
+    if engine == 'sqlite':
+        return {
+            'ENGINE': ENGINE[engine],
+            'NAME': env('NAME') or default_name or base_dir / 'db.sqlite3',
+            'CONN_MAX_AGE': int(env('CONN_MAX_AGE', 0)),
+        }
+    return {
+        'ENGINE': ENGINE[engine],
+        'NAME': env('NAME') or default_name or 'barokah',
+        'USER': env('USER', ''),
+        'PASSWORD': env('PASSWORD', ''),
+        'HOST': env('HOST', '127.0.0.1'),
+        'PORT': env('PORT', '3306'),
+        'CONN_MAX_AGE': int(env('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'charset': 'utf8mb4',
+            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            'isolation_level': 'read committed',
+            'connect_timeout': 5,
+        },
+    }
+
+
+def databases(base_dir, environ=os.environ):
+    """Nilai DATABASES: 'default' dan (opsional) 'replica'."""
+    def primary(nama, default=None):
+        return environ.get(f'DB_{nama}') or default
+
+    def replica(nama, default=None):
+        return environ.get(f'DB_REPLICA_{nama}') or primary(nama, default)
+
+    hasil = {'default': _database(primary, base_dir, None)}
+    if environ.get('DB_REPLICA_HOST') or environ.get('DB_REPLICA_NAME'):
+        hasil['replica'] = _database(replica, base_dir, hasil['default']['NAME'])
+        # Test memakai database default; replika tidak dibuat terpisah
+        hasil['replica']['TEST'] = {'MIRROR': 'default'}
+    return hasil
+
+
+
+@contextmanager
+def atomic_tulis(using=None):
+    """
+    transaction.atomic() untuk jalur tulis (checkout, kampanye, impor, perubahan
+    status). Di SQLite transaksi terluar dimulai dengan BEGIN IMMEDIATE (lihat
+    barokah/sqlite3); di MySQL sama dengan atomic biasa.
+    """
+    from django.db import transaction
+
+    connection = transaction.get_connection(using)
+    lama = getattr(connection, 'begin_immediate', False)
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            # BEGIN sudah dijalankan; atomic lain di dalam blok hanya savepoint
+            connection.begin_immediate = lama
+            yield
+    finally:
+        connection.begin_immediate = lama
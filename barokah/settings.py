@@ -12,8 +12,12 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 # Contoh: Tambahkan import ini di bagian atas file Anda, setelah 'import os'
 from celery.schedules import crontab 
+from kombu import Queue
+
+from . import database
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,15 +45,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'import_export',
+    'django_celery_beat',
     'core',
 ]
 
+# django-import-export: import dijalankan dalam transaksi agar error membatalkan seluruh batch
+IMPORT_EXPORT_USE_TRANSACTIONS = True
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingQueryMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,14 +87,82 @@ WSGI_APPLICATION = 'barokah.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Diatur lewat environment (DB_ENGINE, DB_NAME, DB_HOST, ...), lihat barokah/database.py.
+# Tanpa variabel apa pun tetap db.sqlite3 (dengan WAL dan busy_timeout).
+
+DATABASES = database.databases(BASE_DIR)
+
+# Baca laporan ke alias 'replica' (jika ada), lihat core/routers.py
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Replika dengan lag di atas ini (detik) tidak dipakai; laporan dibaca dari primary
+DATABASE_REPLICA_LAG_MAKS = int(os.environ.get('DB_REPLICA_LAG_MAKS', 30))
+DATABASE_REPLICA_CEK_INTERVAL = 5  # detik
+
+
+# Cache
+# Aturan harga pelanggan (core/pricing.py) di-cache di sini. Di produksi gunakan Redis
+# (CACHE_URL) agar invalidasi dari worker Celery langsung terlihat oleh proses web.
+# Penanda render invoice (core/invoices.py) juga butuh cache bersama: dengan LocMemCache
+# proses web tidak melihat penanda selesai/gagal dari worker dan hanya berhenti
+# memuat ulang setelah INVOICE_POLL_MAKS kali.
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# ETag halaman katalog (core/caching.py) butuh versi katalog yang dibagi semua proses:
+# dengan LocMemCache tiap worker punya versi sendiri dan bisa menjawab 304 untuk halaman basi
+KATALOG_ETAG = bool(os.environ.get('CACHE_URL'))
+
+
+# Logging
+# Log terstruktur (JSON per baris) untuk modul core dan Celery, lihat core/instrumentation.py.
+# Di `manage.py test` log tidak dicetak (NullHandler) agar output test terbaca;
+# assertLogs tetap menangkapnya karena level logger tidak berubah.
+TESTING = sys.argv[1:2] == ['test']
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.instrumentation.JsonFormatter'},
+    },
+    'handlers': {
+        'console': (
+            {'class': 'logging.NullHandler'} if TESTING
+            else {'class': 'logging.StreamHandler', 'formatter': 'json'}
+        ),
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': os.environ.get('LOG_LEVEL', 'INFO'), 'propagate': False},
+        'celery': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        # "Task ... succeeded" memuat argumen dan hasil task (isi email, alamat penerima);
+        # durasi dan status task sudah dicatat @terukur (core/instrumentation.py)
+        'celery.app.trace': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Profiling query per request (core/profiling.py). Tanpa setting ini, staff tetap bisa
+# memprofil satu request dengan header X-Profil-Query: 1.
+QUERY_PROFILING = os.environ.get('QUERY_PROFILING') == '1'
+# Request yang melewati salah satu batas ini dicatat sebagai warning
+QUERY_PROFILING_BATAS = {
+    'query': 50,
+    'db_ms': 200,
+    'duplikat': 10,
+    'durasi_ms': 1000,
 }
 
+# Endpoint /metrics (format Prometheus) hanya bisa diakses dari alamat ini
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -134,7 +212,7 @@ JAZZMIN_SETTINGS = {
     "navigation_expanded": True,
     "hide_apps": [],
     "hide_models": ["auth.user", "auth.group"],
-    "order_with_respect_to": ["core", "core.Pelanggan", "core.Kategori", "core.Produk", "core.Transaksi", "core.DiskonPelanggan", "core.Notifikasi"],
+    "order_with_respect_to": ["core", "core.Pelanggan", "core.Kategori", "core.Produk", "core.Transaksi", "core.KampanyeDiskon", "core.DiskonPelanggan", "core.Notifikasi"],
     "custom_links": {},
     "icons": {
         "core.Pelanggan": "fas fa-users",
@@ -144,6 +222,8 @@ JAZZMIN_SETTINGS = {
         "core.Kategori": "fas fa-tags",
         "core.Notifikasi": "fas fa-bell",
         "core.DiskonPelanggan": "fas fa-percent",
+        "core.SegmenPelanggan": "fas fa-layer-group",
+        "core.KampanyeDiskon": "fas fa-bullhorn",
     },
     "default_icon_parents": "fas fa-chevron-circle-right",
     "default_icon_children": "fas fa-circle",
@@ -203,6 +283,37 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Upload (produk_images/, bukti_pembayaran/, ...) di folder sendiri, bukan di root proyek
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+# File yang tidak boleh disajikan sebagai media (mis. ekspor transaksi)
+PRIVATE_ROOT = BASE_DIR / 'private'
+
+# Upload dan static diberi hash isi di nama file sehingga boleh di-cache immutable
+# (lihat core/caching.py). ManifestStaticFilesStorage butuh collectstatic, jadi
+# hanya dipakai saat DEBUG mati.
+STORAGES = {
+    'default': {'BACKEND': 'core.caching.MediaStorage'},
+    # File ekspor transaksi: di luar MEDIA_ROOT, hanya lewat view unduhan admin
+    'ekspor': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': PRIVATE_ROOT},
+    },
+    # Invoice PDF (nama, telepon, alamat pelanggan): juga di luar MEDIA_ROOT,
+    # hanya disajikan lewat view invoice_download yang memeriksa pemilik pesanan
+    'invoice': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': PRIVATE_ROOT},
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.'
+                   + ('StaticFilesStorage' if DEBUG else 'ManifestStaticFilesStorage'),
+    },
+}
+# Sajikan /static/ dan foto produk (/media/produk_images/) dari Django dengan header
+# cache, untuk deployment tanpa nginx (mis. uvicorn saja). Bukti bayar tidak pernah publik.
+SERVE_STATIC_MEDIA = DEBUG or os.environ.get('SERVE_STATIC_MEDIA') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -219,21 +330,95 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # --------------------------------------------------------------------------
 # BROKER_URL adalah alamat ke Redis. Port default Redis adalah 6379.
 # Anda perlu menjalankan Redis Server secara lokal agar ini berfungsi.
-CELERY_BROKER_URL = 'redis://127.0.0.1:6379/0' 
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
 
 # Backend digunakan untuk menyimpan hasil tasks (opsional, tetapi direkomendasikan).
-CELERY_RESULT_BACKEND = 'redis://127.0.0.1:6379/0'
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
+
+# Load test / pengembangan tanpa Redis: tugas dijalankan langsung di proses web.
+# Hanya didefinisikan jika diminta; setting CELERY_* menimpa app.conf.task_always_eager
+# yang diubah saat runtime (tests, manage.py benchmark).
+if os.environ.get('CELERY_TASK_ALWAYS_EAGER') == '1':
+    CELERY_TASK_ALWAYS_EAGER = True
 
 CELERY_TIMEZONE = "Asia/Makassar" 
 
+# Worker memakai LOGGING di atas (JSON), bukan handler bawaan Celery
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+
+# Queue terpisah agar broadcast/ekspor besar tidak menunda email transaksi dan
+# penanganan deadline pembayaran. Tiap queue dijalankan worker sendiri, lihat
+# perintah di barokah/celery.py.
+#   critical : deadline pembayaran & kedaluwarsa diskon (latensi rendah, idempoten)
+#   email    : pengiriman email (SMTP, I/O-bound)
+#   batch    : broadcast, rollup, impor/ekspor (berat, jalan lama)
+#   celery   : sisanya (default), mis. render invoice yang ditunggu pelanggan
+CELERY_TASK_DEFAULT_QUEUE = 'celery'
+CELERY_TASK_QUEUES = (
+    Queue('critical'),
+    Queue('email'),
+    Queue('batch'),
+    Queue('celery'),
+)
+
+# acks_late (pesan di-ack setelah tugas selesai, dikirim ulang jika worker mati) hanya
+# untuk queue yang tugasnya singkat dan aman diulang. Tugas batch bisa berjalan lebih
+# lama dari visibility_timeout Redis sehingga akan dikirim ulang di tengah jalan.
+# Concurrency/prefetch per queue diatur di perintah worker (barokah/celery.py).
+ACKS_LATE_QUEUES = {'critical', 'email'}
+
+# Prioritas Redis: 0 = tertinggi (hanya berlaku di dalam satu queue).
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+}
+
+CELERY_TASK_ROUTES = {
+    # critical
+    'core.tasks.check_payment_deadlines': {'queue': 'critical', 'priority': 0},
+    'core.tasks.check_and_send_payment_reminder': {'queue': 'critical', 'priority': 2},
+    'core.tasks.disable_birthday_discounts': {'queue': 'critical', 'priority': 5},
+    'core.tasks.expire_discount_campaigns': {'queue': 'critical', 'priority': 5},
+    # email: email transaksi satuan didahulukan dari email massal
+    'core.tasks.send_notification_email': {'queue': 'email', 'priority': 0},
+    'core.tasks.send_notification_emails_batch': {'queue': 'email', 'priority': 3},
+    'core.tasks.send_feedback_reminder': {'queue': 'email', 'priority': 7},
+    'core.tasks.send_feedback_reminders_batch': {'queue': 'email', 'priority': 7},
+    # batch
+    'core.tasks.send_product_restock_broadcast': {'queue': 'batch', 'priority': 5},
+    'core.tasks.send_restock_digest': {'queue': 'batch', 'priority': 5},
+    'core.tasks.send_birthday_greetings': {'queue': 'batch', 'priority': 5},
+    'core.tasks.sweep_feedback_reminders': {'queue': 'batch', 'priority': 5},
+    'core.tasks.check_for_low_stock': {'queue': 'batch', 'priority': 5},
+    'core.tasks.export_transaksi_file': {'queue': 'batch', 'priority': 3},
+    'core.tasks.import_data_file': {'queue': 'batch', 'priority': 3},
+    'core.tasks.rebuild_product_recommendations': {'queue': 'batch', 'priority': 8},
+    'core.tasks.refresh_rfm_segments': {'queue': 'batch', 'priority': 8},
+    'core.tasks.prune_task_runs': {'queue': 'batch', 'priority': 9},
+    'core.tasks.prune_query_profiles': {'queue': 'batch', 'priority': 9},
+    'core.tasks.prune_exports': {'queue': 'batch', 'priority': 9},
+}
+
+# acks_late mengikuti queue tujuan tugas
+CELERY_TASK_ANNOTATIONS = {
+    task: {'acks_late': route['queue'] in ACKS_LATE_QUEUES}
+    for task, route in CELERY_TASK_ROUTES.items()
+}
+
 # 🚨 TAMBAHAN: Celery Beat Settings (Untuk Tugas Terjadwal)
+# Jadwal disimpan di database (django-celery-beat) dan bisa diubah lewat admin.
+# Hanya satu instance beat (pemegang lease pemimpin) yang mengirim tugas, lihat core/beat.py.
+CELERY_BEAT_SCHEDULER = 'core.beat:LeaderDatabaseScheduler'
+
+# Jadwal awal: entri yang belum ada di database ditambahkan saat beat start (core/beat.py).
+# Mengubah entri yang sudah ada di sini TIDAK mengubah database; ubah lewat admin.
 CELERY_BEAT_SCHEDULE = {
     # TUGAS 1: Cek Deadline Pembayaran (Berjalan setiap 5 menit)
     'check-payment-deadlines-every-5-minutes': {
         'task': 'core.tasks.check_payment_deadlines',
         'schedule': 300.0, # 300 detik = 5 menit
         'args': (),
-        'options': {'queue': 'celery'}
     },
     # TUGAS 2: Kirim Ucapan Ulang Tahun (Berjalan Setiap Hari jam 8 pagi)
     'send-daily-birthday-greetings': {
@@ -241,7 +426,6 @@ CELERY_BEAT_SCHEDULE = {
         # crontab(minute, hour, ...) -> Setiap hari pada pukul 08:00
         'schedule': crontab(hour=8, minute=0), 
         'args': (),
-        'options': {'queue': 'celery'}
     },
     # TUGAS 3: Menonaktifkan Diskon Ulang Tahun (Berjalan Setiap Awal Jam)
     'disable-expired-birthday-discounts': {
@@ -249,21 +433,68 @@ CELERY_BEAT_SCHEDULE = {
         # crontab(minute=0) -> Setiap jam pada menit ke-0 (misal 09:00, 10:00)
         'schedule': crontab(minute=0), 
         'args': (),
-        'options': {'queue': 'celery'}
     },
     # TUGAS 4: Pengingat Pra-Jatuh Tempo Pembayaran (Berjalan setiap 1 jam)
     'check-and-send-payment-reminder-every-hour': {
         'task': 'core.tasks.check_and_send_payment_reminder',
         'schedule': crontab(minute='0', hour='*'),
         'args': (),
-        'options': {'queue': 'celery'}
     },
     # TUGAS 5: Laporan Stok Rendah ke Admin (Setiap hari pukul 09:00)
     'check-for-low-stock-daily-9am': {
         'task': 'core.tasks.check_for_low_stock',
         'schedule': crontab(hour=9, minute=0),
         'args': (),
-        'options': {'queue': 'celery'}
+    },
+    # TUGAS 6: Hitung Ulang Rekomendasi "Sering Dibeli Bersama" (Setiap hari pukul 02:00)
+    'rebuild-product-recommendations-nightly': {
+        'task': 'core.tasks.rebuild_product_recommendations',
+        'schedule': crontab(hour=2, minute=0),
+        'args': (),
+    },
+    # TUGAS 7: Segmentasi RFM Penuh (Setiap hari pukul 01:30)
+    'refresh-rfm-segments-full-nightly': {
+        'task': 'core.tasks.refresh_rfm_segments',
+        'schedule': crontab(hour=1, minute=30),
+        'args': (True,),
+    },
+    # TUGAS 8: Segmentasi RFM Inkremental (Setiap jam pada menit ke-30)
+    'refresh-rfm-segments-hourly': {
+        'task': 'core.tasks.refresh_rfm_segments',
+        'schedule': crontab(minute=30),
+        'args': (),
+    },
+    # TUGAS 9: Mengakhiri Kampanye Diskon yang Kedaluwarsa (Setiap jam pada menit ke-5)
+    'expire-discount-campaigns-hourly': {
+        'task': 'core.tasks.expire_discount_campaigns',
+        'schedule': crontab(minute=5),
+        'args': (),
+    },
+    # TUGAS 10: Pengingat Feedback untuk Pesanan SELESAI > 72 Jam (Setiap jam pada menit ke-15)
+    'sweep-feedback-reminders-hourly': {
+        'task': 'core.tasks.sweep_feedback_reminders',
+        'schedule': crontab(minute=15),
+        'args': (),
+    },
+    # TUGAS 11: Hapus Riwayat Tugas Terjadwal > 30 Hari (Setiap hari pukul 03:00)
+    'prune-task-runs-daily': {
+        'task': 'core.tasks.prune_task_runs',
+        'schedule': crontab(hour=3, minute=0),
+        'args': (),
+    },
+
+    # TUGAS 12: Hapus Profil Request > 7 Hari (Setiap hari pukul 03:30)
+    'prune-query-profiles-daily': {
+        'task': 'core.tasks.prune_query_profiles',
+        'schedule': crontab(hour=3, minute=30),
+        'args': (),
+    },
+
+    # TUGAS 13: Hapus File Ekspor yang Tautannya Kedaluwarsa (Setiap hari pukul 03:45)
+    'prune-exports-daily': {
+        'task': 'core.tasks.prune_exports',
+        'schedule': crontab(hour=3, minute=45),
+        'args': (),
     },
 }
 # 🚨 AKHIR TAMBAHAN
@@ -274,10 +505,11 @@ CELERY_BEAT_SCHEDULE = {
 # Menggunakan SMTP Backend agar email dikirim sungguhan melalui server Gmail
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
-# Konfigurasi Server Gmail
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True # Penting untuk koneksi aman
+# Konfigurasi Server Gmail. Untuk load test arahkan ke smtp_sink lokal:
+# EMAIL_HOST=127.0.0.1 EMAIL_PORT=1025 EMAIL_USE_TLS=0 (lihat core/loadtest.py)
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '1') == '1' # Penting untuk koneksi aman
 
 # 🚨 GANTI DENGAN KREDENSIAL ASLI ANDA
 # 1. EMAIL_HOST_USER: Masukkan alamat email Gmail Anda yang sebenarnya
@@ -289,4 +521,7 @@ EMAIL_HOST_PASSWORD = 'xtia wsxi gfbw zdgf' # <--- HARUS DIGANTI!
 DEFAULT_FROM_EMAIL = 'setia170104@gmail.com' 
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# Alamat publik situs, dipakai untuk link absolut di email (core/notifications.py)
+SITE_URL = os.environ.get('SITE_URL', 'http://127.0.0.1:8000')
+
 # ... (Kode setting Django lainnya seperti STATIC_URL, TEMPLATES, WSGI_APPLICATION, dst.)
\ No newline at end of file
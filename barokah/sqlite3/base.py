@@ -0,0 +1,37 @@
+"""
+Backend SQLite proyek (DB_ENGINE=sqlite, lihat barokah/database.py).
+
+- PRAGMA di database.SQLITE_PRAGMAS diterapkan setiap koneksi baru dibuka.
+- Blok database.atomic_tulis() (checkout, kampanye, impor, ...) dimulai dengan
+  BEGIN IMMEDIATE: lock tulis diambil di awal, transaksi lain menunggu sampai
+  busy_timeout. Dengan BEGIN biasa (DEFERRED), transaksi yang membaca lalu
+  menulis langsung gagal "database is locked" jika penulis lain masuk lebih
+  dulu, tanpa menunggu busy_timeout. atomic biasa (admin, halaman baca_replika)
+  tetap BEGIN DEFERRED agar pembaca tidak antre di belakang penulis.
+  Karena itu job batch (rekomendasi, RFM, kampanye) menulis per chunk dalam
+  transaksi pendek, bukan satu atomic untuk seluruh job.
+"""
+from django.db.backends.sqlite3 import base
+
+from barokah.database import SQLITE_PRAGMAS
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Diisi atomic_tulis() tepat sebelum masuk atomic terluar
+    begin_immediate = False
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for nama, nilai in SQLITE_PRAGMAS.items():
+            conn.execute(f'PRAGMA {nama} = {nilai}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # Menimpa API privat Django 4.2: BaseDatabaseWrapper.set_autocommit() memanggil
+        # _start_transaction_under_autocommit() untuk BEGIN atomic di SQLite. Periksa
+        # lagi saat upgrade Django. OPTIONS transaction_mode (Django 5.1+) bukan
+        # pengganti: berlaku untuk semua atomic, termasuk yang hanya membaca.
+        if self.begin_immediate:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -14,10 +14,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from core.admin import penjualan_admin_site
+from core import caching, views as core_views
 
 urlpatterns = [
     path('admin/', penjualan_admin_site.urls),
+    path('metrics', core_views.metrics, name='metrics'),
     path('', include('core.urls', namespace='core')),
 ]
+
+if settings.SERVE_STATIC_MEDIA:
+    urlpatterns = [
+        re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$', caching.sajikan_file, {'root': 'STATIC_ROOT'}),
+        re_path(
+            rf'^{settings.MEDIA_URL.strip("/")}/(?P<path>.+)$', caching.sajikan_file,
+            {'root': 'MEDIA_ROOT', 'awalan': caching.MEDIA_PUBLIK},
+        ),
+    ] + urlpatterns
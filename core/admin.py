@@ -1,16 +1,41 @@
 from django.contrib import admin
-from django.db.models import Sum, F
+from django.db import router
+from django.db.models import Avg, Count, Max, Sum, F
+from django.db.models.deletion import Collector
 from django.utils import timezone
 from django.urls import path
 from django.shortcuts import render
 from django.db.models.functions import TruncMonth
 from django.template.response import TemplateResponse
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.forms.models import BaseInlineFormSet
+from django.core.files.storage import default_storage
+from django.core import signing
+from django.http import Http404, JsonResponse, StreamingHttpResponse, FileResponse
+from django.contrib import messages
+from django.utils.dateparse import parse_date
+from django.shortcuts import redirect
+from import_export.admin import ImportExportModelAdmin
+from import_export.formats.base_formats import DEFAULT_FORMATS
+from celery.result import AsyncResult
+from django_celery_beat.admin import PeriodicTaskAdmin, CrontabScheduleAdmin, IntervalScheduleAdmin
+from django_celery_beat.models import PeriodicTask, CrontabSchedule, IntervalSchedule
 import json
+import uuid
 from decimal import Decimal
-from .models import Pelanggan, Kategori, Produk, Transaksi, DetailTransaksi, Notifikasi, DiskonPelanggan
-
-# Status yang dihitung sebagai revenue
-REVENUE_STATUSES = ['DIBAYAR', 'DIKIRIM', 'SELESAI']
+from .models import (
+    Pelanggan, Kategori, Produk, Transaksi, DetailTransaksi, Notifikasi, DiskonPelanggan, SegmenPelanggan,
+    KampanyeDiskon, RiwayatTugas, EmailGagal, ProfilRequest, REVENUE_STATUSES, STATUS_TRANSAKSI_CHOICES,
+)
+from . import exports
+from .paginators import EstimatedCountPaginator
+from .transitions import ubah_status_massal, TRANSISI_STATUS
+from .campaigns import jalankan_kampanye, akhiri_kampanye, perbarui_kampanye_aktif
+from .pricing import invalidate_aturan
+from .mailer import kirim_ulang
+from .routers import baca_replika
+from .resources import KategoriResource, ProdukResource, PelangganResource
+from .tasks import import_data_file, export_transaksi_file, render_invoice_pdf
 
 # Helper function to format Rupiah
 def format_rupiah(amount):
@@ -25,9 +50,29 @@ def format_rupiah(amount):
     s = s.replace(',', 'X').replace('.', ',').replace('X', '.')
     return f"Rp{s}"
 
+# Formset DetailTransaksi: validasi harga semua baris dalam satu query
+class DetailTransaksiFormSet(BaseInlineFormSet):
+    def clean(self):
+        super().clean()
+        rows = [
+            form.cleaned_data for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get('DELETE') and form.cleaned_data.get('idProduk')
+        ]
+        # Harga terkini diambil sekali untuk semua produk; dipakai juga oleh save_formset
+        self.harga_produk = dict(
+            Produk.objects.filter(pk__in={row['idProduk'].pk for row in rows}).values_list('id', 'harga_produk')
+        )
+        for row in rows:
+            harga = self.harga_produk.get(row['idProduk'].pk)
+            if not harga or harga <= 0:
+                raise ValidationError(f"Produk '{row['idProduk'].nama_produk}' belum memiliki harga yang valid.")
+            if (row.get('jumlah_produk') or 0) <= 0:
+                raise ValidationError(f"Jumlah untuk produk '{row['idProduk'].nama_produk}' harus lebih dari 0.")
+
 # Inline Admin for DetailTransaksi
 class DetailTransaksiInline(admin.TabularInline):
     model = DetailTransaksi
+    formset = DetailTransaksiFormSet
     extra = 1
     fields = ('idProduk', 'jumlah_produk', 'sub_total')
     readonly_fields = ('sub_total',)
@@ -45,6 +90,8 @@ class PenjualanAdminSite(admin.AdminSite):
         ]
         return custom_urls + urls
 
+    # Agregat dashboard dibaca dari replika (jika ada dan lag-nya wajar)
+    @baca_replika()
     def index(self, request, extra_context=None):
         # Call the parent index method to get the default context with app list
         context = super().index(request, extra_context)
@@ -106,43 +153,225 @@ class PenjualanAdminSite(admin.AdminSite):
         else:
             return TemplateResponse(request, 'admin/index.html', context_dict)
 
+# Mixin untuk import file besar lewat Celery (lihat core.tasks.import_data_file)
+class AsyncImportMixin:
+    async_import_resource = None  # kunci di core.resources.RESOURCES
+    import_export_change_list_template = 'admin/core/change_list_import_export_async.html'
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        custom_urls = [
+            path('import-async/', self.admin_site.admin_view(self.async_import_view),
+                 name='%s_%s_import_async' % info),
+            path('import-async/<str:task_id>/', self.admin_site.admin_view(self.async_import_status_view),
+                 name='%s_%s_import_async_status' % info),
+        ]
+        return custom_urls + super().get_urls()
+
+    def async_import_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        if request.method == 'POST' and request.FILES.get('import_file'):
+            upload = request.FILES['import_file']
+            file_path = default_storage.save(f'imports/{uuid.uuid4().hex}_{upload.name}', upload)
+            result = import_data_file.delay(self.async_import_resource, file_path, request.POST.get('format', 'csv'))
+            info = self.opts.app_label, self.opts.model_name
+            return redirect('%s:%s_%s_import_async_status' % ((self.admin_site.name,) + info), task_id=result.id)
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.opts,
+            title=f'Import {self.opts.verbose_name_plural}',
+            formats=[f().get_title() for f in DEFAULT_FORMATS if f().can_import()],
+        )
+        return TemplateResponse(request, 'admin/core/import_async.html', context)
+
+    def async_import_status_view(self, request, task_id):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        result = AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'state': result.state, 'info': info})
+        progress = None
+        if result.state == 'PROGRESS' and info.get('total'):
+            progress = int(info['current'] * 100 / info['total'])
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.opts,
+            title=f'Import {self.opts.verbose_name_plural}',
+            task_id=task_id,
+            state=result.state,
+            ready=result.ready(),
+            progress=100 if result.successful() else progress,
+            summary=info if result.successful() else None,
+        )
+        return TemplateResponse(request, 'admin/core/import_async.html', context)
+
 # Custom Admin for Pelanggan model
-class PelangganAdmin(admin.ModelAdmin):
-    list_display = ('id', 'nama_pelanggan', 'email', 'no_hp', 'total_riwayat_belanja')
-    list_filter = ('is_birthday_discount_active',)
+class PelangganAdmin(AsyncImportMixin, ImportExportModelAdmin):
+    list_display = ('id', 'nama_pelanggan', 'email', 'no_hp', 'total_riwayat_belanja', 'display_segmen')
+    list_filter = ('is_birthday_discount_active', 'segmen_rfm__segmen')
+    list_select_related = ('segmen_rfm',)
     search_fields = ('nama_pelanggan', 'email', 'no_hp')
-    list_per_page = 5
+    list_per_page = 50
     list_max_show_all = 500
     list_display_links = ('id', 'nama_pelanggan')
+    resource_classes = [PelangganResource]
+    async_import_resource = 'pelanggan'
+
+    @admin.display(description='Segmen RFM', ordering='segmen_rfm__segmen')
+    def display_segmen(self, obj):
+        segmen = getattr(obj, 'segmen_rfm', None)
+        return segmen.get_segmen_display() if segmen else '-'
 
 # Custom Admin for Kategori model
-class KategoriAdmin(admin.ModelAdmin):
+class KategoriAdmin(AsyncImportMixin, ImportExportModelAdmin):
     list_display = ('id', 'nama_kategori')
     search_fields = ('nama_kategori',)
-    list_per_page = 5
+    list_per_page = 50
     list_max_show_all = 500
     list_display_links = ('id', 'nama_kategori')
+    resource_classes = [KategoriResource]
+    async_import_resource = 'kategori'
 
 # Custom Admin for Produk model
-class ProdukAdmin(admin.ModelAdmin):
+class ProdukAdmin(AsyncImportMixin, ImportExportModelAdmin):
     list_display = ('id', 'nama_produk', 'kategori', 'harga_produk', 'stok_produk')
+    list_select_related = ('kategori',)
     list_filter = ('kategori',)
     search_fields = ('nama_produk', 'deskripsi_produk')
     list_editable = ('stok_produk', 'harga_produk')
-    list_per_page = 5
+    list_per_page = 50
     list_max_show_all = 500
     list_display_links = ('id', 'nama_produk')
+    resource_classes = [ProdukResource]
+    async_import_resource = 'produk'
 
 # Custom Admin for Transaksi model
 class TransaksiAdmin(admin.ModelAdmin):
     list_display = ('id', 'idPelanggan', 'display_tanggal', 'display_total', 'status_transaksi')
+    list_select_related = ('idPelanggan',)
+    date_hierarchy = 'tanggal'
+    # Tabel besar: jangan jalankan COUNT(*) penuh di setiap halaman
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ('status_transaksi', 'tanggal')
     search_fields = ('id', 'idPelanggan__nama_pelanggan')
     readonly_fields = ('waktu_checkout', 'batas_waktu_bayar')
     inlines = [DetailTransaksiInline]
-    list_per_page = 5
+    actions = [
+        'action_tandai_dibayar', 'action_tandai_dikirim', 'action_tandai_selesai', 'action_tandai_dibatalkan',
+        'action_buat_invoice',
+    ]
+    list_per_page = 50
     list_max_show_all = 500
     list_display_links = ('id',)
+
+    def _ubah_status(self, request, queryset, status_baru):
+        status_asal = TRANSISI_STATUS[status_baru]
+        dilewati = list(
+            queryset.order_by('id').exclude(status_transaksi__in=status_asal).values_list('id', flat=True)
+        )
+        jumlah = ubah_status_massal(queryset, status_baru)
+        pesan = f"{jumlah} pesanan ditandai {status_baru}."
+        if dilewati:
+            daftar = ', '.join(f"#{transaksi_id}" for transaksi_id in dilewati[:20])
+            if len(dilewati) > 20:
+                daftar += f" dan {len(dilewati) - 20} lainnya"
+            pesan += (
+                f" {len(dilewati)} pesanan dilewati ({daftar}): hanya pesanan berstatus "
+                f"{', '.join(status_asal)} yang bisa diubah."
+            )
+        self.message_user(request, pesan, messages.WARNING if dilewati else messages.SUCCESS)
+
+    @admin.action(description='Tandai DIBAYAR')
+    def action_tandai_dibayar(self, request, queryset):
+        self._ubah_status(request, queryset, 'DIBAYAR')
+
+    @admin.action(description='Tandai DIKIRIM')
+    def action_tandai_dikirim(self, request, queryset):
+        self._ubah_status(request, queryset, 'DIKIRIM')
+
+    @admin.action(description='Tandai SELESAI')
+    def action_tandai_selesai(self, request, queryset):
+        self._ubah_status(request, queryset, 'SELESAI')
+
+    @admin.action(description='Tandai DIBATALKAN')
+    def action_tandai_dibatalkan(self, request, queryset):
+        self._ubah_status(request, queryset, 'DIBATALKAN')
+
+    @admin.action(description='Buat invoice PDF (di background)')
+    def action_buat_invoice(self, request, queryset):
+        ids = list(queryset.filter(status_transaksi__in=REVENUE_STATUSES).values_list('id', flat=True))
+        for transaksi_id in ids:
+            render_invoice_pdf.delay(transaksi_id)
+        self.message_user(request, f"{len(ids)} invoice dijadwalkan untuk dibuat.")
+
+    def get_urls(self):
+        custom_urls = [
+            path('export/', self.admin_site.admin_view(self.export_view), name='core_transaksi_export'),
+            path(
+                'export/unduh/<str:token>/', self.admin_site.admin_view(self.export_download_view),
+                name='core_transaksi_export_download',
+            ),
+        ]
+        return custom_urls + super().get_urls()
+
+    def export_view(self, request):
+        """Ekspor CSV/XLSX untuk akuntansi: dialirkan langsung, atau dibuat di background lalu dikirim via email."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        file_format = request.GET.get('format')
+        if file_format not in exports.FORMATS:
+            context = dict(
+                self.admin_site.each_context(request),
+                opts=self.opts,
+                title='Ekspor Transaksi',
+                status_choices=STATUS_TRANSAKSI_CHOICES,
+                formats=exports.FORMATS,
+            )
+            return TemplateResponse(request, 'admin/core/transaksi/export.html', context)
+
+        mulai = parse_date(request.GET.get('mulai') or '')
+        sampai = parse_date(request.GET.get('sampai') or '')
+        statuses = request.GET.getlist('status')
+
+        if request.GET.get('background'):
+            recipients = [request.user.email] if request.user.email else None
+            export_transaksi_file.delay(
+                mulai.isoformat() if mulai else None, sampai.isoformat() if sampai else None,
+                statuses, file_format, recipients,
+            )
+            messages.success(request, "Ekspor sedang diproses. Tautan unduhan akan dikirim lewat email.")
+            return redirect(f'{self.admin_site.name}:core_transaksi_changelist')
+
+        rows = exports.iter_rows(exports.export_queryset(mulai, sampai, statuses))
+        filename = exports.export_filename(file_format, mulai, sampai)
+        if file_format == 'xlsx':
+            return FileResponse(
+                exports.xlsx_tempfile(rows), as_attachment=True, filename=filename,
+                content_type=exports.CONTENT_TYPES['xlsx'],
+            )
+        response = StreamingHttpResponse(exports.stream_csv(rows), content_type=exports.CONTENT_TYPES['csv'])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def export_download_view(self, request, token):
+        """Unduh file ekspor background dari tautan email (token bertanda tangan, staff saja)."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            path = exports.path_dari_token(token)
+        except signing.BadSignature:
+            raise Http404("Tautan ekspor tidak valid atau sudah kedaluwarsa.")
+        storage = exports.storage_ekspor()
+        if not storage.exists(path):
+            raise Http404("File ekspor sudah dihapus.")
+        file_format = path.rsplit('.', 1)[-1]
+        return FileResponse(
+            storage.open(path), as_attachment=True, filename=path.rsplit('/', 1)[-1],
+            content_type=exports.CONTENT_TYPES.get(file_format),
+        )
     
     @admin.display(description='Tanggal Transaksi')
     def display_tanggal(self, obj):
@@ -154,49 +383,241 @@ class TransaksiAdmin(admin.ModelAdmin):
         return format_rupiah(obj.total)
     
     def save_formset(self, request, form, formset, change):
-        # Save the formset first
+        if formset.model is not DetailTransaksi:
+            return super().save_formset(request, form, formset, change)
+
+        # commit=False: kumpulkan baris baru/berubah tanpa save() per baris
+        # (save() per baris memicu signal sub_total + hitung ulang total untuk setiap item)
         instances = formset.save(commit=False)
-        
-        # Save each instance and calculate sub_total
+        produk_diganti = {
+            f.instance.pk for f in formset.forms if 'idProduk' in f.changed_data and f.instance.pk
+        }
+        baru, berubah = [], []
         for instance in instances:
-            if isinstance(instance, DetailTransaksi):
-                # Calculate sub_total if both idProduk and jumlah_produk are available
-                if instance.idProduk and instance.jumlah_produk:
-                    instance.sub_total = instance.idProduk.harga_produk * instance.jumlah_produk
-                instance.save()
-        
-        # Delete instances marked for deletion
-        for obj in formset.deleted_objects:
-            obj.delete()
-        
+            if instance.pk in produk_diganti:
+                # Harga diskon checkout milik produk lama tidak berlaku untuk produk pengganti
+                instance.harga_satuan = None
+            harga = instance.harga_satuan
+            if harga is None:
+                harga = formset.harga_produk[instance.idProduk_id]
+            instance.sub_total = harga * instance.jumlah_produk
+            (berubah if instance.pk else baru).append(instance)
+
+        DetailTransaksi.objects.bulk_create(baru)
+        DetailTransaksi.objects.bulk_update(berubah, ['idProduk', 'jumlah_produk', 'harga_satuan', 'sub_total'])
+        if formset.deleted_objects:
+            # Collector dengan instance dari formset (bukan queryset.delete() yang memuat ulang
+            # baris) agar penanda sampai ke handler post_delete: total tidak dihitung per baris
+            for obj in formset.deleted_objects:
+                obj._tanpa_hitung_total = True
+            collector = Collector(using=router.db_for_write(DetailTransaksi))
+            collector.collect(formset.deleted_objects)
+            collector.delete()
         formset.save_m2m()
-        
-        # After saving all DetailTransaksi items, recalculate the Transaksi total
+
+        # Satu aggregate untuk total (Sub Total + Ongkir)
         transaksi = form.instance
-        if transaksi.pk:  # Only if the Transaksi object has been saved
-            detail_transaksi_items = DetailTransaksi.objects.filter(idTransaksi=transaksi)
-            total = sum(item.sub_total or 0 for item in detail_transaksi_items)
-            transaksi.total = total
-            transaksi.save(update_fields=['total'])
+        if transaksi.pk:
+            transaksi.calculate_total()
 
 # Custom Admin for Notifikasi model
 class NotifikasiAdmin(admin.ModelAdmin):
     list_display = ('id', 'idPelanggan', 'tipe_pesan', 'is_read', 'created_at')
+    list_select_related = ('idPelanggan',)
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ('tipe_pesan', 'is_read', 'created_at')
     search_fields = ('idPelanggan__nama_pelanggan', 'isi_pesan')
-    list_per_page = 5
+    list_per_page = 50
     list_max_show_all = 500
     list_display_links = ('id',)
 
 # Custom Admin for DiskonPelanggan model
 class DiskonPelangganAdmin(admin.ModelAdmin):
-    list_display = ('id', 'idPelanggan', 'idProduk', 'persen_diskon', 'status')
-    list_filter = ('status', 'persen_diskon')
+    list_display = ('id', 'idPelanggan', 'idProduk', 'persen_diskon', 'status', 'kampanye')
+    list_select_related = ('idPelanggan', 'idProduk', 'kampanye')
+    date_hierarchy = 'tanggal_dibuat'
+    show_full_result_count = False
+    list_filter = ('status', 'persen_diskon', 'kampanye')
     search_fields = ('idPelanggan__nama_pelanggan', 'idProduk__nama_produk')
-    list_per_page = 5
+    list_per_page = 50
     list_max_show_all = 500
     list_display_links = ('id',)
 
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_aturan([obj.idPelanggan_id])
+
+    def delete_queryset(self, request, queryset):
+        pelanggan_ids = set(queryset.values_list('idPelanggan_id', flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_aturan(pelanggan_ids)
+
+# Custom Admin for KampanyeDiskon model
+class KampanyeDiskonAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nama', 'segmen', 'idProduk', 'persen_diskon', 'status', 'jumlah_penerima', 'berlaku_sampai')
+    list_filter = ('status', 'segmen')
+    list_select_related = ('idProduk',)
+    search_fields = ('nama',)
+    readonly_fields = ('status', 'jumlah_penerima')
+    actions = ['action_jalankan_kampanye', 'action_akhiri_kampanye']
+    list_per_page = 50
+    list_max_show_all = 500
+    list_display_links = ('id', 'nama')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and form.changed_data:
+            jumlah = perbarui_kampanye_aktif(obj, form.changed_data)
+            if jumlah:
+                self.message_user(request, f"Perubahan diterapkan ke {jumlah} diskon pelanggan.")
+
+    @admin.action(description='Jalankan kampanye (buat diskon untuk segmen)')
+    def action_jalankan_kampanye(self, request, queryset):
+        for kampanye in queryset.exclude(status='BERAKHIR'):
+            jumlah = jalankan_kampanye(kampanye)
+            self.message_user(request, f"Kampanye '{kampanye.nama}' aktif untuk {jumlah} pelanggan.")
+
+    @admin.action(description='Akhiri kampanye (nonaktifkan diskon)')
+    def action_akhiri_kampanye(self, request, queryset):
+        for kampanye in queryset.filter(status='AKTIF'):
+            jumlah = akhiri_kampanye(kampanye)
+            self.message_user(request, f"Kampanye '{kampanye.nama}' diakhiri, {jumlah} diskon dinonaktifkan.")
+
+# Custom Admin for SegmenPelanggan model (hasil pipeline RFM, hanya baca)
+class SegmenPelangganAdmin(admin.ModelAdmin):
+    list_display = ('idPelanggan', 'segmen', 'r_score', 'f_score', 'm_score', 'recency_hari', 'frequency', 'display_monetary', 'diperbarui_pada')
+    list_filter = ('segmen', 'r_score', 'f_score', 'm_score')
+    list_select_related = ('idPelanggan',)
+    search_fields = ('idPelanggan__nama_pelanggan',)
+    list_per_page = 50
+    list_max_show_all = 500
+
+    @admin.display(description='Monetary', ordering='monetary')
+    def display_monetary(self, obj):
+        return format_rupiah(obj.monetary)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# Custom Admin for RiwayatTugas model (eksekusi tugas terjadwal, hanya baca)
+class RiwayatTugasAdmin(admin.ModelAdmin):
+    list_display = ('nama_tugas', 'jendela', 'status', 'durasi_ms', 'jumlah_baris', 'dimulai_pada', 'selesai_pada')
+    list_filter = ('status', 'nama_tugas')
+    search_fields = ('nama_tugas',)
+    date_hierarchy = 'dimulai_pada'
+    ordering = ('-dimulai_pada',)
+    list_per_page = 50
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# Custom Admin for EmailGagal model (dead letter email notifikasi)
+class EmailGagalAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'display_penerima', 'jenis_error', 'jumlah_percobaan', 'status', 'dibuat_pada')
+    list_filter = ('status', 'jenis_error', 'dibuat_pada')
+    search_fields = ('subject', 'error')
+    date_hierarchy = 'dibuat_pada'
+    ordering = ('-dibuat_pada',)
+    actions = ['action_kirim_ulang']
+    list_per_page = 50
+    show_full_result_count = False
+
+    @admin.display(description='Penerima')
+    def display_penerima(self, obj):
+        return ', '.join(obj.recipient_list)
+
+    @admin.action(description='Kirim ulang email terpilih')
+    def action_kirim_ulang(self, request, queryset):
+        jumlah = kirim_ulang(queryset)
+        pesan = f"{jumlah} email dijadwalkan untuk dikirim ulang."
+        if jumlah == 0:
+            pesan += " Hanya email berstatus GAGAL yang bisa dikirim ulang."
+        self.message_user(request, pesan, messages.SUCCESS if jumlah else messages.WARNING)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# Custom Admin for ProfilRequest model (profiling query per request, hanya baca)
+class ProfilRequestAdmin(admin.ModelAdmin):
+    list_display = (
+        'endpoint', 'metode', 'status_code', 'jumlah_query', 'query_duplikat', 'durasi_db_ms',
+        'durasi_template_ms', 'durasi_ms', 'dibuat_pada',
+    )
+    list_filter = ('metode', 'status_code', 'dibuat_pada')
+    search_fields = ('endpoint', 'path')
+    date_hierarchy = 'dibuat_pada'
+    ordering = ('-dibuat_pada',)
+    list_per_page = 50
+    show_full_result_count = False
+
+    # Jendela ringkasan (jam) dan kolom urutan yang bisa dipilih
+    JENDELA_JAM = (1, 6, 24, 72)
+    URUTAN = {
+        'query': '-rata_query',
+        'duplikat': '-rata_duplikat',
+        'db': '-rata_db_ms',
+        'durasi': '-rata_durasi_ms',
+        'jumlah': '-jumlah',
+    }
+
+    def get_urls(self):
+        custom_urls = [
+            path('ringkasan/', self.admin_site.admin_view(self.ringkasan_view), name='core_profilrequest_ringkasan'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def ringkasan_view(self, request):
+        """Endpoint terburuk dalam jendela waktu terakhir, diagregasi dari ProfilRequest."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            jam = int(request.GET.get('jam', 24))
+        except ValueError:
+            jam = 24
+        urut = request.GET.get('urut') if request.GET.get('urut') in self.URUTAN else 'query'
+
+        endpoints = (
+            ProfilRequest.objects.filter(dibuat_pada__gte=timezone.now() - timezone.timedelta(hours=jam))
+            .values('endpoint')
+            .annotate(
+                jumlah=Count('id'),
+                rata_query=Avg('jumlah_query'), maks_query=Max('jumlah_query'),
+                rata_duplikat=Avg('query_duplikat'),
+                rata_db_ms=Avg('durasi_db_ms'), rata_template_ms=Avg('durasi_template_ms'),
+                rata_durasi_ms=Avg('durasi_ms'), maks_durasi_ms=Max('durasi_ms'),
+            )
+            .order_by(self.URUTAN[urut])[:50]
+        )
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.opts,
+            title='Ringkasan Profil Query',
+            endpoints=endpoints,
+            jam=jam,
+            urut=urut,
+            jendela_jam=self.JENDELA_JAM,
+            urutan=list(self.URUTAN),
+        )
+        return TemplateResponse(request, 'admin/core/profilrequest/ringkasan.html', context)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # Create custom admin site instance
 penjualan_admin_site = PenjualanAdminSite(name='penjualan_admin')
 
@@ -206,4 +627,14 @@ penjualan_admin_site.register(Kategori, KategoriAdmin)
 penjualan_admin_site.register(Produk, ProdukAdmin)
 penjualan_admin_site.register(Transaksi, TransaksiAdmin)
 penjualan_admin_site.register(Notifikasi, NotifikasiAdmin)
-penjualan_admin_site.register(DiskonPelanggan, DiskonPelangganAdmin)
\ No newline at end of file
+penjualan_admin_site.register(DiskonPelanggan, DiskonPelangganAdmin)
+penjualan_admin_site.register(KampanyeDiskon, KampanyeDiskonAdmin)
+penjualan_admin_site.register(SegmenPelanggan, SegmenPelangganAdmin)
+penjualan_admin_site.register(RiwayatTugas, RiwayatTugasAdmin)
+penjualan_admin_site.register(EmailGagal, EmailGagalAdmin)
+penjualan_admin_site.register(ProfilRequest, ProfilRequestAdmin)
+
+# Jadwal Celery beat (django-celery-beat), bisa diubah tanpa deploy ulang
+penjualan_admin_site.register(PeriodicTask, PeriodicTaskAdmin)
+penjualan_admin_site.register(CrontabSchedule, CrontabScheduleAdmin)
+penjualan_admin_site.register(IntervalSchedule, IntervalScheduleAdmin)
\ No newline at end of file
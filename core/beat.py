@@ -0,0 +1,128 @@
+"""
+Jadwal Celery beat berbasis database (django-celery-beat).
+
+- CELERY_BEAT_SCHEDULE di settings hanya menjadi jadwal awal: setiap start
+  beat membuat PeriodicTask untuk entri yang belum ada, tanpa menimpa
+  interval/crontab yang sudah diubah lewat admin. Migration 0013 mengisi
+  salinan beku jadwal tersebut untuk database baru.
+- LeaderDatabaseScheduler memakai KunciTugas (core/jobs.py) sebagai lease
+  pemimpin, jadi beberapa container beat bisa berjalan bersamaan tetapi hanya
+  satu yang mengirim tugas. Instance lain mengambil alih setelah lease habis.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from celery.schedules import crontab
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+from django_celery_beat.schedulers import DatabaseScheduler
+
+from .jobs import ambil_kunci, perpanjang_kunci, lepas_kunci
+
+logger = logging.getLogger(__name__)
+
+KUNCI_PEMIMPIN = 'celery.beat.pemimpin'
+# Lease pemimpin diperpanjang setiap tick (maksimal beat_max_loop_interval, default 5 detik)
+PEMIMPIN_TTL = 30
+# Seberapa sering instance pengikut mencoba mengambil alih
+PENGIKUT_INTERVAL = 10
+
+
+def _jadwal_model(schedule, CrontabSchedule, IntervalSchedule):
+    """(nama field, instance jadwal) untuk satu entri CELERY_BEAT_SCHEDULE."""
+    if isinstance(schedule, crontab):
+        fields = {
+            'minute': str(schedule._orig_minute),
+            'hour': str(schedule._orig_hour),
+            'day_of_week': str(schedule._orig_day_of_week),
+            'day_of_month': str(schedule._orig_day_of_month),
+            'month_of_year': str(schedule._orig_month_of_year),
+            'timezone': settings.CELERY_TIMEZONE,
+        }
+        return 'crontab', CrontabSchedule.objects.filter(**fields).first() or CrontabSchedule.objects.create(**fields)
+    detik = schedule.total_seconds() if isinstance(schedule, timedelta) else schedule
+    fields = {'every': int(detik), 'period': 'seconds'}
+    return 'interval', IntervalSchedule.objects.filter(**fields).first() or IntervalSchedule.objects.create(**fields)
+
+
+def tambah_jadwal_baru(beat_schedule, PeriodicTask, CrontabSchedule, IntervalSchedule):
+    """
+    Buat PeriodicTask untuk entri beat_schedule yang namanya belum ada di database.
+    Model dioper sebagai argumen agar bisa dipakai dari migration (model historis).
+    Mengembalikan jumlah entri yang ditambahkan.
+    """
+    sudah_ada = set(PeriodicTask.objects.filter(name__in=beat_schedule).values_list('name', flat=True))
+    jumlah = 0
+    for nama, entri in beat_schedule.items():
+        if nama in sudah_ada:
+            continue
+        field, jadwal = _jadwal_model(entri['schedule'], CrontabSchedule, IntervalSchedule)
+        options = entri.get('options', {})
+        try:
+            # Instance beat lain bisa menambahkan entri yang sama bersamaan (nama unik)
+            with transaction.atomic():
+                PeriodicTask.objects.create(
+                    name=nama,
+                    task=entri['task'],
+                    args=json.dumps(list(entri.get('args', ()))),
+                    kwargs=json.dumps(entri.get('kwargs', {})),
+                    queue=options.get('queue'),
+                    **{field: jadwal},
+                )
+        except IntegrityError:
+            continue
+        jumlah += 1
+    return jumlah
+
+
+class LeaderDatabaseScheduler(DatabaseScheduler):
+    """DatabaseScheduler yang hanya mengirim tugas selama memegang lease pemimpin."""
+
+    _token = None
+
+    def setup_schedule(self):
+        from django_celery_beat.models import PeriodicTask, CrontabSchedule, IntervalSchedule
+
+        # Bukan update_from_dict(): itu menimpa perubahan jadwal dari admin setiap beat start
+        self.install_default_entries(self.schedule)
+        jumlah = tambah_jadwal_baru(self.app.conf.beat_schedule, PeriodicTask, CrontabSchedule, IntervalSchedule)
+        if jumlah:
+            logger.info("Jadwal baru dari CELERY_BEAT_SCHEDULE ditambahkan", extra={'jumlah': jumlah})
+
+    def _muat_ulang_jadwal(self):
+        # Selama menjadi pengikut last_run_at di memori tidak ikut diperbarui
+        self._schedule = self.all_as_schedule()
+        self._heap = []
+        self._heap_invalidated = True
+
+    def is_leader(self):
+        now = timezone.now()
+        try:
+            if self._token and perpanjang_kunci(KUNCI_PEMIMPIN, self._token, PEMIMPIN_TTL, now):
+                return True
+            token = ambil_kunci(KUNCI_PEMIMPIN, PEMIMPIN_TTL, now)
+        except DatabaseError as e:
+            logger.error("Gagal memeriksa lease pemimpin beat", extra={'error': str(e)})
+            self._token = None
+            return False
+
+        if token:
+            logger.info("Instance beat ini menjadi pemimpin")
+            self._muat_ulang_jadwal()
+        elif self._token:
+            logger.warning("Lease pemimpin beat diambil instance lain, berhenti mengirim tugas")
+        self._token = token
+        return token is not None
+
+    def tick(self, *args, **kwargs):
+        if not self.is_leader():
+            return PENGIKUT_INTERVAL
+        return super().tick(*args, **kwargs)
+
+    def close(self):
+        super().close()
+        if self._token:
+            lepas_kunci(KUNCI_PEMIMPIN, self._token)
+            self._token = None
@@ -0,0 +1,282 @@
+"""
+Skenario benchmark untuk manage.py benchmark (data dari manage.py generate_data).
+
+Setiap skenario punya persiapan sekali (siapkan), persiapan per iterasi yang
+tidak diukur (sebelum) dan bagian yang diukur (jalankan). Aturan pengukuran:
+
+- seluruh run ada di dalam satu transaksi yang di-rollback di akhir, dan setiap
+  iterasi di savepoint sendiri yang juga di-rollback, jadi setiap iterasi
+  melihat data yang sama dan database tidak berubah;
+- callback transaction.on_commit (dispatch email/tugas) dijalankan langsung
+  setelah jalankan() dan ikut diukur, seperti yang terjadi saat commit;
+- Celery dijalankan eager dan email memakai backend locmem, jadi tugas anak
+  (mis. send_notification_email) ikut diukur tanpa worker maupun SMTP;
+- jumlah query dihitung lewat connection.execute_wrapper.
+"""
+import time
+from statistics import fmean, median
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from barokah.celery import app as celery_app
+from .models import Pelanggan, Produk, Transaksi
+
+SKENARIO = {}
+PERSENTIL = (50, 90, 95, 99)
+# Jumlah baris terbaru yang dipakai sebagai sampel (tanpa ORDER BY RANDOM() di tabel besar)
+UKURAN_SAMPEL = 200
+
+
+def skenario(nama):
+    def daftar(cls):
+        SKENARIO[nama] = cls
+        return cls
+    return daftar
+
+
+class Skenario:
+    def __init__(self, nama):
+        self.nama = nama
+        self.iterasi = 0
+
+    def siapkan(self):
+        pass
+
+    def sebelum(self):
+        pass
+
+    def jalankan(self):
+        raise NotImplementedError
+
+    def sampel(self, ids):
+        # Bergiliran (bukan acak) supaya hasil antar commit bisa dibandingkan
+        return ids[self.iterasi % len(ids)]
+
+
+def _ids(queryset):
+    ids = list(queryset.order_by('-id').values_list('id', flat=True)[:UKURAN_SAMPEL])
+    if not ids:
+        raise LookupError(f"Tidak ada data untuk {queryset.model.__name__}")
+    return ids
+
+
+class _SkenarioPelanggan(Skenario):
+    """Request storefront sebagai pelanggan yang login (session pelanggan_id)."""
+
+    def siapkan(self):
+        self.client = Client()
+        self.pelanggan_ids = _ids(Pelanggan.objects.all())
+        self.produk_ids = _ids(Produk.objects.filter(stok_produk__gte=10))
+        # Session dibuat di luar savepoint iterasi supaya barisnya tidak ikut di-rollback
+        self.client.session.save()
+
+    def isi_keranjang(self):
+        session = self.client.session
+        session['pelanggan_id'] = self.sampel(self.pelanggan_ids)
+        session['cart'] = [
+            {'product_id': self.produk_ids[(self.iterasi + i) % len(self.produk_ids)], 'qty': i + 1}
+            for i in range(3)
+        ]
+        session.save()
+
+    def periksa(self, response, status_code):
+        # Redirect ke login berarti session tidak terbaca; hasilnya tidak mengukur apa-apa
+        if response.status_code != status_code or response.get('Location') == reverse('core:login'):
+            raise AssertionError(f"{self.nama}: status {response.status_code} {response.get('Location', '')}")
+
+
+@skenario('checkout')
+class Checkout(_SkenarioPelanggan):
+    def sebelum(self):
+        self.isi_keranjang()
+
+    def jalankan(self):
+        self.periksa(self.client.post(reverse('core:checkout'), {'alamat_pengiriman': 'Jl. Benchmark'}), 302)
+
+
+@skenario('keranjang')
+class Keranjang(_SkenarioPelanggan):
+    def sebelum(self):
+        self.isi_keranjang()
+
+    def jalankan(self):
+        self.periksa(self.client.get(reverse('core:cart')), 200)
+
+
+@skenario('admin_dashboard')
+class AdminDashboard(Skenario):
+    def siapkan(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser('benchmark', 'benchmark@example.com', None))
+
+    def jalankan(self):
+        response = self.client.get(reverse('penjualan_admin:index'))
+        if response.status_code != 200:
+            raise AssertionError(f"{self.nama}: status {response.status_code}")
+
+
+@skenario('signal_transaksi_selesai')
+class SignalTransaksiSelesai(Skenario):
+    """Transaksi.save() DIKIRIM -> SELESAI beserta semua signal handler-nya."""
+
+    def siapkan(self):
+        self.transaksi_ids = _ids(Transaksi.objects.filter(status_transaksi='DIKIRIM'))
+
+    def sebelum(self):
+        self.transaksi = Transaksi.objects.select_related('idPelanggan').get(pk=self.sampel(self.transaksi_ids))
+
+    def jalankan(self):
+        self.transaksi.status_transaksi = 'SELESAI'
+        self.transaksi.save()
+
+
+@skenario('signal_restock')
+class SignalRestock(Skenario):
+    """Produk.save() dari stok habis ke tersedia (broadcast restock)."""
+
+    def siapkan(self):
+        self.produk_ids = _ids(Produk.objects.all())
+
+    def sebelum(self):
+        pk = self.sampel(self.produk_ids)
+        Produk.objects.filter(pk=pk).update(stok_produk=0, last_restock_trigger_date=None)
+        # Instance baru: stok awal (_original_stok) diambil saat __init__
+        self.produk = Produk.objects.get(pk=pk)
+
+    def jalankan(self):
+        self.produk.stok_produk = 100
+        self.produk.save()
+
+
+class TugasTerjadwal(Skenario):
+    def __init__(self, nama, task, args=(), kwargs=None):
+        super().__init__(nama)
+        self.task = task
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+
+    def jalankan(self):
+        celery_app.tasks[self.task](*self.args, **self.kwargs)
+
+
+def daftar_skenario():
+    """Semua skenario: yang terdaftar dengan @skenario + satu per entri CELERY_BEAT_SCHEDULE."""
+    semua = {nama: cls(nama) for nama, cls in SKENARIO.items()}
+    for key, entri in settings.CELERY_BEAT_SCHEDULE.items():
+        nama = f"tugas:{key}"
+        semua[nama] = TugasTerjadwal(nama, entri['task'], entri.get('args', ()), entri.get('kwargs'))
+    return semua
+
+
+class _PenghitungQuery:
+    def __init__(self):
+        self.jumlah = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.jumlah += 1
+        return execute(sql, params, many, context)
+
+
+def _jalankan_on_commit():
+    # Di dalam atomic luar, callback on_commit baru jalan saat commit (yang tidak pernah terjadi)
+    while connection.run_on_commit:
+        _, func, *_ = connection.run_on_commit.pop(0)
+        func()
+
+
+def persentil(nilai, p):
+    """Persentil dengan interpolasi linear; nilai sudah terurut."""
+    if len(nilai) == 1:
+        return nilai[0]
+    posisi = (len(nilai) - 1) * p / 100
+    bawah = int(posisi)
+    atas = min(bawah + 1, len(nilai) - 1)
+    return nilai[bawah] + (nilai[atas] - nilai[bawah]) * (posisi - bawah)
+
+
+def ringkas(durasi, query):
+    durasi_ms = sorted(d * 1000 for d in durasi)
+    latensi = {f'p{p}': round(persentil(durasi_ms, p), 3) for p in PERSENTIL}
+    latensi.update(maks=round(durasi_ms[-1], 3), rata=round(fmean(durasi_ms), 3))
+    return {
+        'iterasi': len(durasi_ms),
+        'latensi_ms': latensi,
+        'query': {'median': median(query), 'maks': max(query)},
+    }
+
+
+def _ukur(skenario_obj, iterasi, pemanasan):
+    from django.core import mail
+
+    durasi, query = [], []
+    for i in range(pemanasan + iterasi):
+        skenario_obj.iterasi = i
+        with transaction.atomic():
+            skenario_obj.sebelum()
+            _jalankan_on_commit()
+            penghitung = _PenghitungQuery()
+            t0 = time.perf_counter()
+            with connection.execute_wrapper(penghitung):
+                skenario_obj.jalankan()
+                _jalankan_on_commit()
+            selesai = time.perf_counter() - t0
+            transaction.set_rollback(True)
+        connection.run_on_commit.clear()
+        mail.outbox = []
+        if i >= pemanasan:
+            durasi.append(selesai)
+            query.append(penghitung.jumlah)
+    return ringkas(durasi, query)
+
+
+def jalankan_benchmark(skenario_list, iterasi=20, pemanasan=2, laporan=None):
+    """
+    Jalankan skenario (list objek Skenario, lihat daftar_skenario) dan kembalikan
+    {nama: ringkasan}. Database tidak berubah. laporan(nama, hasil) dipanggil
+    setelah setiap skenario selesai.
+    """
+    eager_lama = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    hasil = {}
+    try:
+        with override_settings(
+            DEBUG=False,
+            QUERY_PROFILING=False,
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ), transaction.atomic():
+            for skenario_obj in skenario_list:
+                with transaction.atomic():
+                    skenario_obj.siapkan()
+                    hasil[skenario_obj.nama] = _ukur(skenario_obj, iterasi, pemanasan)
+                    transaction.set_rollback(True)
+                if laporan:
+                    laporan(skenario_obj.nama, hasil[skenario_obj.nama])
+            transaction.set_rollback(True)
+    finally:
+        celery_app.conf.task_always_eager = eager_lama
+    return hasil
+
+
+def bandingkan(lama, baru, toleransi=0.10):
+    """
+    Regresi antara dua hasil benchmark (dict 'skenario' dari file JSON):
+    p95 naik lebih dari toleransi, atau median jumlah query bertambah.
+    Mengembalikan list (skenario, metrik, nilai_lama, nilai_baru).
+    """
+    regresi = []
+    for nama, hasil_baru in baru.items():
+        hasil_lama = lama.get(nama)
+        if hasil_lama is None:
+            continue
+        p95_lama, p95_baru = hasil_lama['latensi_ms']['p95'], hasil_baru['latensi_ms']['p95']
+        if p95_baru > p95_lama * (1 + toleransi):
+            regresi.append((nama, 'p95_ms', p95_lama, p95_baru))
+        query_lama, query_baru = hasil_lama['query']['median'], hasil_baru['query']['median']
+        if query_baru > query_lama:
+            regresi.append((nama, 'query_median', query_lama, query_baru))
+    return regresi
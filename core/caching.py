@@ -0,0 +1,173 @@
+"""
+HTTP caching untuk halaman katalog dan file static/media.
+
+Halaman katalog (home, products, product_detail) memakai @halaman_katalog:
+
+- ETag dari versi katalog: penghitung di cache yang dinaikkan setiap kali
+  Produk/Kategori disimpan atau dihapus (core/signals.py), setelah import
+  katalog massal dan setelah rekomendasi dihitung ulang. Halaman juga memuat
+  navbar login dan token CSRF, jadi ETag ikut dibedakan per pengunjung;
+- Last-Modified = waktu versi terakhir dinaikkan;
+- request dengan If-None-Match/If-Modified-Since yang masih cocok dijawab 304
+  tanpa query katalog dan tanpa render template;
+- Cache-Control per view, selalu private.
+
+Versi harus dibagi semua proses web dan worker Celery, jadi ETag hanya aktif
+jika KATALOG_ETAG (otomatis saat CACHE_URL/Redis dipakai). Tanpa itu halaman
+katalog dikirim dengan Cache-Control never-cache.
+
+Upload di UPLOAD_DIRS disimpan MediaStorage dengan hash isi di nama file, dan
+static diberi hash oleh ManifestStaticFilesStorage (collectstatic). URL-nya
+tidak pernah menunjuk isi lain, jadi sajikan_file mengirimnya dengan
+Cache-Control immutable selama satu tahun.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import time
+from functools import wraps
+from urllib.parse import unquote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.static import serve
+
+VERSI_KEY = 'katalog:versi'
+DIUBAH_KEY = 'katalog:diubah'
+SETAHUN = 365 * 24 * 60 * 60  # detik
+# upload_to FileField/ImageField di core/models.py
+UPLOAD_DIRS = ('produk_images/', 'feedback_images/', 'bukti_pembayaran/')
+# Satu-satunya folder media yang boleh diakses publik (bukti bayar dan feedback tidak)
+MEDIA_PUBLIK = ('produk_images/',)
+PANJANG_HASH = 12
+
+# nama.<hash>.ext, dengan sufiks acak get_available_name jika isi yang sama diupload lagi
+_BER_HASH = re.compile(rf'\.[0-9a-f]{{{PANJANG_HASH}}}(_[A-Za-z0-9]{{7}})?\.[^./]+$')
+
+
+def _versi_awal():
+    # Dari jam (ms): setelah cache dikosongkan, versi baru tidak mengulang ETag lama
+    return time.time_ns() // 1_000_000
+
+
+def naikkan_versi_katalog(**kwargs):
+    """Tandai katalog berubah; **kwargs supaya bisa langsung dipakai sebagai receiver signal."""
+    try:
+        cache.incr(VERSI_KEY)
+    except ValueError:
+        cache.add(VERSI_KEY, _versi_awal(), None)
+    cache.set(DIUBAH_KEY, int(time.time()), None)
+
+
+def versi_katalog():
+    """(versi, waktu perubahan terakhir dalam detik epoch)."""
+    data = cache.get_many([VERSI_KEY, DIUBAH_KEY])
+    if len(data) < 2:
+        cache.add(VERSI_KEY, _versi_awal(), None)
+        cache.add(DIUBAH_KEY, int(time.time()), None)
+        data = cache.get_many([VERSI_KEY, DIUBAH_KEY])
+    # Tanpa cache (DummyCache) versi selalu baru: tidak pernah 304, tetapi tidak pernah basi
+    return data.get(VERSI_KEY, _versi_awal()), data.get(DIUBAH_KEY, int(time.time()))
+
+
+def _validator(request):
+    """
+    (ETag, Last-Modified) untuk pengunjung ini. (None, None) jika KATALOG_ETAG
+    mati atau ada pesan (messages) yang belum ditampilkan: halaman itu harus
+    di-render ulang.
+    """
+    if not settings.KATALOG_ETAG:
+        return None, None
+    pelanggan_id = request.session.get('pelanggan_id')
+    if len(messages.get_messages(request)):
+        return None, None
+    versi, diubah = versi_katalog()
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    pengunjung = hashlib.sha256(f"{pelanggan_id}:{csrf}".encode()).hexdigest()[:PANJANG_HASH]
+    return quote_etag(f"{versi}-{pengunjung}"), diubah
+
+
+def halaman_katalog(**cache_control):
+    """
+    Decorator view katalog async: 304 selama versi katalog dan pengunjung sama,
+    dan Cache-Control dari `cache_control` (argumen patch_cache_control).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def _wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view_func(request, *args, **kwargs)
+
+            # Sesi dan messages bisa query ke database
+            etag, last_modified = await sync_to_async(_validator)(request)
+            response = None
+            if etag:
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+
+            if response.status_code not in (200, 304):
+                return response
+            if etag is None:
+                add_never_cache_headers(response)
+                return response
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+            patch_cache_control(response, private=True, **cache_control)
+            return response
+        return _wrapped
+    return decorator
+
+
+def nama_ber_hash(name, content, max_length=None):
+    """produk_images/foto.png -> produk_images/foto.<sha256 isi>.png"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    root, ext = os.path.splitext(name)
+    akhiran = f".{digest.hexdigest()[:PANJANG_HASH]}{ext}"
+    if max_length and len(root) + len(akhiran) > max_length:
+        # Potong nama asli, bukan hash-nya
+        root = root[:max_length - len(akhiran)]
+    return root + akhiran
+
+
+class MediaStorage(FileSystemStorage):
+    """Storage default (STORAGES): upload di UPLOAD_DIRS diberi hash isi di nama file."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if name.startswith(UPLOAD_DIRS):
+            name = nama_ber_hash(name, content, max_length)
+        return super().save(name, content, max_length)
+
+
+def sajikan_file(request, path, root, awalan=None):
+    """
+    django.views.static.serve untuk deployment tanpa nginx (SERVE_STATIC_MEDIA).
+    `root` adalah nama setting direktorinya (STATIC_ROOT/MEDIA_ROOT); jika
+    `awalan` diisi hanya file di folder tersebut yang disajikan.
+    """
+    # Normalisasi dulu: produk_images/../db.sqlite3 tidak boleh lolos dari pengecekan awalan
+    path = posixpath.normpath(unquote(path)).lstrip('/')
+    if path.startswith('..') or (awalan and not path.startswith(awalan)):
+        raise Http404("File tidak ditemukan.")
+    response = serve(request, path, document_root=getattr(settings, root))
+    if _BER_HASH.search(path):
+        patch_cache_control(response, public=True, max_age=SETAHUN, immutable=True)
+    else:
+        # Nama tanpa hash bisa berganti isi: selalu revalidasi (serve menjawab If-Modified-Since)
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
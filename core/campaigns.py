@@ -0,0 +1,162 @@
+"""
+Mesin kampanye diskon tertarget di atas DiskonPelanggan.
+
+- jalankan_kampanye: pilih pelanggan sesuai segmen kampanye lalu buat baris
+  DiskonPelanggan dengan bulk_create per chunk (tanpa save() per baris).
+- akhiri_kampanye: nonaktifkan semua diskon kampanye dengan satu UPDATE.
+- get_discount_lookup: peta {idProduk: persen} untuk satu pelanggan dalam satu
+  query, dipakai keranjang dan checkout tanpa query per baris. Diskon kampanye
+  yang sudah lewat berlaku_sampai tidak ikut, walau akhiri_kampanye_kedaluwarsa
+  belum berjalan.
+- perbarui_kampanye_aktif: perubahan kampanye AKTIF (persen, produk, pesan,
+  target) diterapkan ke DiskonPelanggan yang sudah dibuat.
+"""
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from barokah.database import atomic_tulis
+
+from .models import Pelanggan, DiskonPelanggan, KampanyeDiskon
+
+CHUNK_SIZE = 5000
+
+# Kunci lookup untuk diskon yang berlaku ke semua produk (idProduk kosong)
+SEMUA_PRODUK = None
+# Field kampanye yang disalin ke setiap DiskonPelanggan / yang menentukan penerimanya
+FIELD_DISALIN = ('idProduk', 'persen_diskon', 'pesan')
+FIELD_TARGET = ('segmen', 'min_total_belanja')
+
+
+def _invalidate_pricing():
+    # Import di sini untuk mencegah circular import (pricing memakai lookup dari modul ini)
+    from .pricing import invalidate_aturan
+    transaction.on_commit(invalidate_aturan)
+
+
+def segment_queryset(kampanye):
+    """Pelanggan yang menjadi target kampanye."""
+    qs = Pelanggan.objects.all()
+    if kampanye.segmen != 'SEMUA':
+        qs = qs.filter(segmen_rfm__segmen=kampanye.segmen)
+    if kampanye.min_total_belanja:
+        qs = qs.filter(total_riwayat_belanja__gte=kampanye.min_total_belanja)
+    return qs
+
+
+def jalankan_kampanye(kampanye, chunk_size=CHUNK_SIZE):
+    """
+    Materialisasi DiskonPelanggan untuk semua pelanggan dalam segmen kampanye.
+    Aman dijalankan ulang: diskon lama milik kampanye ini diganti.
+    Mengembalikan jumlah pelanggan penerima.
+
+    Setiap chunk di-commit sendiri agar lock tulis SQLite tidak ditahan selama
+    seluruh segmen diproses. Baris baru dibuat 'tidak_aktif' dan baru diaktifkan
+    (sekaligus menghapus diskon lama) di transaksi terakhir: selama berjalan,
+    atau jika proses berhenti di tengah, harga pelanggan tidak berubah. Sisa
+    baris dari proses yang gagal terhapus saat kampanye dijalankan ulang.
+    """
+    id_lama = kampanye.diskon.aggregate(terakhir=Max('id'))['terakhir'] or 0
+
+    jumlah = 0
+    batch = []
+    pelanggan_ids = segment_queryset(kampanye).order_by().values_list('id', flat=True)
+    for pelanggan_id in pelanggan_ids.iterator(chunk_size=chunk_size):
+        batch.append(DiskonPelanggan(
+            idPelanggan_id=pelanggan_id,
+            idProduk_id=kampanye.idProduk_id,
+            persen_diskon=kampanye.persen_diskon,
+            status='tidak_aktif',
+            pesan=kampanye.pesan,
+            kampanye=kampanye,
+        ))
+        if len(batch) >= chunk_size:
+            DiskonPelanggan.objects.bulk_create(batch)
+            jumlah += len(batch)
+            batch = []
+    DiskonPelanggan.objects.bulk_create(batch)
+    jumlah += len(batch)
+
+    with atomic_tulis():
+        if id_lama:
+            kampanye.diskon.filter(id__lte=id_lama).delete()
+        kampanye.diskon.filter(id__gt=id_lama).update(status='aktif')
+        kampanye.status = 'AKTIF'
+        kampanye.jumlah_penerima = jumlah
+        kampanye.save(update_fields=['status', 'jumlah_penerima'])
+        _invalidate_pricing()
+    return jumlah
+
+
+@transaction.atomic
+def akhiri_kampanye(kampanye):
+    """Nonaktifkan seluruh diskon kampanye. Mengembalikan jumlah diskon yang dinonaktifkan."""
+    jumlah = kampanye.diskon.filter(status='aktif').update(status='tidak_aktif')
+    kampanye.status = 'BERAKHIR'
+    kampanye.save(update_fields=['status'])
+    _invalidate_pricing()
+    return jumlah
+
+
+def akhiri_kampanye_kedaluwarsa(now=None):
+    """Akhiri semua kampanye aktif yang sudah melewati berlaku_sampai."""
+    now = now or timezone.now()
+    jumlah = 0
+    for kampanye in KampanyeDiskon.objects.filter(status='AKTIF', berlaku_sampai__lte=now):
+        jumlah += akhiri_kampanye(kampanye)
+    return jumlah
+
+
+def perbarui_kampanye_aktif(kampanye, diubah):
+    """
+    Terapkan perubahan kampanye AKTIF ke diskon yang sudah dimaterialisasi.
+    `diubah`: nama field yang berubah (mis. form.changed_data). Target berubah
+    berarti penerima dihitung ulang; selain itu cukup satu UPDATE.
+    Mengembalikan jumlah DiskonPelanggan yang diperbarui.
+    """
+    if kampanye.status != 'AKTIF':
+        return 0
+    diubah = set(diubah)
+    if diubah & set(FIELD_TARGET):
+        return jalankan_kampanye(kampanye)
+    jumlah = 0
+    with transaction.atomic():
+        if diubah & set(FIELD_DISALIN):
+            jumlah = kampanye.diskon.update(
+                idProduk_id=kampanye.idProduk_id, persen_diskon=kampanye.persen_diskon, pesan=kampanye.pesan,
+            )
+        if jumlah or 'berlaku_sampai' in diubah:
+            _invalidate_pricing()
+    return jumlah
+
+
+def lookup_diskon(pelanggan_id, now=None):
+    """
+    Satu query: (lookup, berakhir). lookup adalah persentase diskon aktif
+    terbesar per produk untuk pelanggan, dengan diskon tanpa produk di kunci
+    SEMUA_PRODUK; berakhir adalah berlaku_sampai kampanye paling awal di
+    antara diskon tersebut (None jika tidak ada), batas cache aturan harga.
+    """
+    now = now or timezone.now()
+    lookup = {}
+    berakhir = None
+    rows = DiskonPelanggan.objects.filter(
+        Q(kampanye__isnull=True) | Q(kampanye__berlaku_sampai__isnull=True) | Q(kampanye__berlaku_sampai__gt=now),
+        idPelanggan_id=pelanggan_id, status='aktif',
+    ).values_list('idProduk_id', 'persen_diskon', 'kampanye__berlaku_sampai')
+    for produk_id, persen, sampai in rows:
+        if persen > lookup.get(produk_id, 0):
+            lookup[produk_id] = persen
+        if sampai and (berakhir is None or sampai < berakhir):
+            berakhir = sampai
+    return lookup, berakhir
+
+
+def get_discount_lookup(pelanggan_id, now=None):
+    """Peta {idProduk: persen} dari lookup_diskon."""
+    return lookup_diskon(pelanggan_id, now)[0]
+
+
+def persen_diskon_produk(lookup, produk_id):
+    """Persentase diskon yang berlaku untuk produk_id berdasarkan lookup."""
+    return max(lookup.get(produk_id, 0), lookup.get(SEMUA_PRODUK, 0))
@@ -0,0 +1,182 @@
+"""
+Ekspor Transaksi + DetailTransaksi untuk akuntansi (satu baris per detail transaksi).
+
+Data dibaca per chunk dengan keyset pagination (id > id_terakhir) dan
+select_related ke transaksi, pelanggan dan produk, jadi memori tetap konstan
+berapa pun jumlah barisnya. Keyset dipakai (bukan .iterator() saja) karena
+driver MySQL memuat seluruh hasil query ke memori walau lewat iterator().
+
+- CSV dialirkan baris per baris (StreamingHttpResponse / stdout / file).
+- XLSX ditulis dengan openpyxl mode write_only ke file sementara.
+
+Ekspor background disimpan di storage privat STORAGES['ekspor'] (di luar
+MEDIA_ROOT, tanpa URL publik). Email hanya berisi tautan ke view admin
+core_transaksi_export_download dengan token bertanda tangan yang kedaluwarsa
+setelah MASA_BERLAKU; file-nya dihapus task prune_exports setelah itu.
+"""
+import csv
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.core import signing
+from django.core.files.storage import storages
+from django.utils import timezone
+
+from .models import DetailTransaksi
+from .routers import alias_laporan
+
+CHUNK_SIZE = 2000
+EKSPOR_DIR = 'exports'
+# Umur tautan unduhan dan file ekspor background
+MASA_BERLAKU = timedelta(days=3)
+_SALT_UNDUHAN = 'core.exports.unduhan'
+FORMATS = ('csv', 'xlsx')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+HEADERS = [
+    'ID Transaksi', 'Tanggal', 'Status', 'ID Pelanggan', 'Nama Pelanggan',
+    'ID Produk', 'Nama Produk', 'Jumlah', 'Harga Satuan', 'Sub Total',
+    'Ongkir', 'Total Transaksi',
+]
+
+
+def export_queryset(mulai=None, sampai=None, statuses=None):
+    """
+    DetailTransaksi dalam rentang tanggal (inklusif, tanggal lokal) dan status tertentu.
+    Dibaca dari replika jika sehat; alias dipilih di sini karena CSV dialirkan setelah
+    view selesai (di luar blok baca_replika).
+    """
+    # stok_produk ikut dimuat karena dibaca Produk.__init__ (deferred field = satu query per baris)
+    qs = DetailTransaksi.objects.using(alias_laporan()).select_related('idTransaksi__idPelanggan', 'idProduk').only(
+        'id', 'jumlah_produk', 'harga_satuan', 'sub_total',
+        'idProduk__id', 'idProduk__nama_produk', 'idProduk__stok_produk',
+        'idTransaksi__id', 'idTransaksi__tanggal', 'idTransaksi__status_transaksi',
+        'idTransaksi__ongkir', 'idTransaksi__total',
+        'idTransaksi__idPelanggan__id', 'idTransaksi__idPelanggan__nama_pelanggan',
+    )
+    # Rentang datetime (bukan __date) agar index pada kolom tanggal tetap bisa dipakai
+    if mulai:
+        qs = qs.filter(idTransaksi__tanggal__gte=timezone.make_aware(datetime.combine(mulai, time.min)))
+    if sampai:
+        qs = qs.filter(idTransaksi__tanggal__lt=timezone.make_aware(datetime.combine(sampai + timedelta(days=1), time.min)))
+    if statuses:
+        qs = qs.filter(idTransaksi__status_transaksi__in=statuses)
+    return qs
+
+
+def iter_details(qs, chunk_size=CHUNK_SIZE):
+    """Iterasi queryset per chunk berdasarkan id; tidak pernah memuat lebih dari satu chunk."""
+    last_id = 0
+    while True:
+        chunk = list(qs.filter(id__gt=last_id).order_by('id')[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1].id
+
+
+def iter_rows(qs, chunk_size=CHUNK_SIZE):
+    """Header lalu satu baris per DetailTransaksi."""
+    yield HEADERS
+    for detail in iter_details(qs, chunk_size):
+        transaksi = detail.idTransaksi
+        harga = detail.harga_satuan if detail.harga_satuan is not None else (
+            detail.sub_total / detail.jumlah_produk if detail.jumlah_produk else None
+        )
+        yield [
+            transaksi.id,
+            timezone.localtime(transaksi.tanggal).strftime('%Y-%m-%d %H:%M:%S'),
+            transaksi.status_transaksi,
+            transaksi.idPelanggan.id,
+            transaksi.idPelanggan.nama_pelanggan,
+            detail.idProduk.id,
+            detail.idProduk.nama_produk,
+            detail.jumlah_produk,
+            harga,
+            detail.sub_total,
+            transaksi.ongkir,
+            transaksi.total,
+        ]
+
+
+class Echo:
+    """Pseudo-buffer untuk csv.writer: write() langsung mengembalikan baris."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Generator string CSV per baris, untuk StreamingHttpResponse."""
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(rows, fileobj):
+    writer = csv.writer(fileobj)
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_xlsx(rows, fileobj):
+    """Tulis XLSX dengan workbook write_only (baris tidak disimpan di memori)."""
+    # openpyxl hanya dibutuhkan untuk ekspor XLSX
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Transaksi')
+    for row in rows:
+        sheet.append(row)
+    workbook.save(fileobj)
+
+
+def xlsx_tempfile(rows):
+    """XLSX ke file sementara yang sudah di-seek ke awal, siap dialirkan."""
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(rows, tmp)
+    tmp.seek(0)
+    return tmp
+
+
+def export_filename(file_format, mulai=None, sampai=None):
+    rentang = f"{mulai or 'awal'}_{sampai or timezone.localdate()}"
+    return f"transaksi_{rentang}.{file_format}"
+
+
+def storage_ekspor():
+    return storages['ekspor']
+
+
+def token_unduhan(path):
+    """Token bertanda tangan untuk path file ekspor (tautan di email)."""
+    return signing.dumps(path, salt=_SALT_UNDUHAN)
+
+
+def path_dari_token(token):
+    """
+    Path file ekspor dari token; signing.BadSignature (termasuk
+    SignatureExpired) jika token diubah atau lebih tua dari MASA_BERLAKU.
+    """
+    path = signing.loads(token, salt=_SALT_UNDUHAN, max_age=MASA_BERLAKU)
+    if not path.startswith(f"{EKSPOR_DIR}/") or '..' in path:
+        raise signing.BadSignature("Path ekspor tidak valid")
+    return path
+
+
+def hapus_ekspor_kedaluwarsa():
+    """Hapus file ekspor yang tautannya sudah kedaluwarsa. Mengembalikan jumlah file."""
+    storage = storage_ekspor()
+    if not storage.exists(EKSPOR_DIR):
+        return 0
+    batas = timezone.now() - MASA_BERLAKU
+    jumlah = 0
+    for nama in storage.listdir(EKSPOR_DIR)[1]:
+        path = f"{EKSPOR_DIR}/{nama}"
+        if storage.get_modified_time(path) < batas:
+            storage.delete(path)
+            jumlah += 1
+    return jumlah
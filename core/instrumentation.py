@@ -0,0 +1,215 @@
+"""
+Instrumentasi tugas Celery dan signal handler.
+
+- JsonFormatter: log terstruktur (satu objek JSON per baris) untuk konfigurasi
+  LOGGING di settings. Field `extra=` ikut ditulis, begitu juga nama tugas /
+  handler yang sedang berjalan (`span`).
+- @terukur: dekorator untuk tugas (di bawah @shared_task) dan signal handler
+  (di bawah @receiver). Setiap pemanggilan mencatat durasi, jumlah query,
+  baris yang ditulis (rowcount INSERT/UPDATE/DELETE) dan email yang diantrikan
+  (lihat catat_email), lalu menambahkannya ke metrik.
+- Metrik disimpan di cache Django (Redis di produksi) dengan cache.incr, jadi
+  worker dan web berbagi angka yang sama; /metrics (views.metrics) menampilkannya
+  dalam format teks Prometheus. Dengan LocMemCache (pengembangan) angka hanya
+  per proses.
+"""
+import contextvars
+import functools
+import json
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'barokah'
+# Batas atas bucket histogram durasi (detik)
+BUCKET_DURASI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+_KUNCI = 'metrik:{metrik}:{jenis}:{nama}'
+_MIKRO = 1_000_000
+
+# (jenis, nama) semua fungsi yang dibungkus @terukur di proses ini
+_TERDAFTAR = {}
+# Pengukuran yang sedang berjalan (bertingkat: tugas -> save() -> signal handler)
+_aktif = contextvars.ContextVar('instrumentasi_aktif', default=())
+
+_ATRIBUT_STANDAR = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+# Isi extra 'data' dari celery.app.trace yang bisa memuat isi email dan alamat penerima
+_DATA_TASK_DIBUANG = ('args', 'kwargs', 'return_value')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'waktu': datetime.fromtimestamp(record.created, dt_timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'pesan': record.getMessage(),
+        }
+        aktif = _aktif.get()
+        if aktif:
+            data['span'] = aktif[-1].nama
+        for key, value in vars(record).items():
+            if key not in _ATRIBUT_STANDAR and not key.startswith('_'):
+                data[key] = value
+        if record.name.startswith('celery') and isinstance(data.get('data'), dict):
+            data['data'] = {k: v for k, v in data['data'].items() if k not in _DATA_TASK_DIBUANG}
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class Pengukuran:
+    __slots__ = ('jenis', 'nama', 'query', 'baris', 'email', '_returning')
+
+    def __init__(self, jenis, nama):
+        self.jenis = jenis
+        self.nama = nama
+        self.query = 0
+        self.baris = 0
+        self.email = 0
+        self._returning = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper: hitung query dan baris yang ditulis
+        self.query += 1
+        hasil = execute(sql, params, many, context)
+        if not sql.lstrip()[:6].upper().startswith('SELECT'):
+            if 'RETURNING' in sql:
+                # rowcount INSERT ... RETURNING baru terisi setelah hasilnya di-fetch
+                self._returning.append(context['cursor'])
+            else:
+                self.baris += max(context['cursor'].rowcount, 0)
+        return hasil
+
+    def selesai(self):
+        self.baris += sum(max(cursor.rowcount, 0) for cursor in self._returning)
+        self._returning = []
+
+
+def catat_email(jumlah=1):
+    """Dipanggil saat email diantrikan (notifications.kirim/kirim_massal, mailer.kirim_ulang)."""
+    for pengukuran in _aktif.get():
+        pengukuran.email += jumlah
+
+
+def _incr(key, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Kunci belum ada; add() tidak menimpa jika proses lain baru saja membuatnya
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, delta)
+
+
+def _bucket(detik):
+    for batas in BUCKET_DURASI:
+        if detik <= batas:
+            return str(batas)
+    return '+Inf'
+
+
+def _simpan(pengukuran, detik, status):
+    kunci = functools.partial(_KUNCI.format, jenis=pengukuran.jenis, nama=pengukuran.nama)
+    try:
+        _incr(kunci(metrik=f'panggilan_{status}'), 1)
+        _incr(kunci(metrik=f'bucket_{_bucket(detik)}'), 1)
+        _incr(kunci(metrik='durasi_mikro'), int(detik * _MIKRO))
+        _incr(kunci(metrik='query'), pengukuran.query)
+        _incr(kunci(metrik='baris'), pengukuran.baris)
+        _incr(kunci(metrik='email'), pengukuran.email)
+    except Exception:
+        # Metrik tidak boleh menggagalkan tugas/handler (mis. Redis sedang down)
+        logger.warning("Gagal menyimpan metrik", extra={'nama': pengukuran.nama}, exc_info=True)
+
+
+def terukur(func=None, *, jenis=None):
+    """
+    Dekorator pengukuran. jenis: 'task' untuk modul tasks, selain itu 'signal'
+    (bisa di-override). Nama metrik = modul.fungsi (sama dengan nama tugas Celery).
+    """
+    if func is None:
+        return functools.partial(terukur, jenis=jenis)
+
+    jenis = jenis or ('task' if func.__module__.endswith('.tasks') else 'signal')
+    nama = f"{func.__module__}.{func.__name__}"
+    _TERDAFTAR[(jenis, nama)] = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        pengukuran = Pengukuran(jenis, nama)
+        token = _aktif.set(_aktif.get() + (pengukuran,))
+        status = 'gagal'
+        t0 = time.perf_counter()
+        try:
+            with connection.execute_wrapper(pengukuran):
+                hasil = func(*args, **kwargs)
+            status = 'sukses'
+            return hasil
+        finally:
+            detik = time.perf_counter() - t0
+            _aktif.reset(token)
+            pengukuran.selesai()
+            _simpan(pengukuran, detik, status)
+            logger.debug(
+                "Selesai %s", nama,
+                extra={
+                    'jenis': jenis, 'nama': nama, 'status': status, 'durasi_ms': round(detik * 1000, 2),
+                    'query': pengukuran.query, 'baris': pengukuran.baris, 'email': pengukuran.email,
+                },
+            )
+
+    return wrapper
+
+
+def _label(jenis, nama, **lain):
+    label = {'jenis': jenis, 'nama': nama, **lain}
+    return '{' + ','.join(f'{k}="{v}"' for k, v in label.items()) + '}'
+
+
+def ekspor_prometheus():
+    """Semua metrik dalam format teks Prometheus (text/plain; version=0.0.4)."""
+    seri = sorted(_TERDAFTAR)
+    bucket = [str(b) for b in BUCKET_DURASI] + ['+Inf']
+    metrik = ['panggilan_sukses', 'panggilan_gagal', 'durasi_mikro', 'query', 'baris', 'email']
+    metrik += [f'bucket_{b}' for b in bucket]
+    nilai = cache.get_many([_KUNCI.format(metrik=m, jenis=j, nama=n) for j, n in seri for m in metrik])
+
+    def ambil(m, jenis, nama):
+        return nilai.get(_KUNCI.format(metrik=m, jenis=jenis, nama=nama), 0)
+
+    baris = [
+        f'# HELP {PREFIX}_eksekusi_total Jumlah eksekusi tugas/signal handler.',
+        f'# TYPE {PREFIX}_eksekusi_total counter',
+    ]
+    for jenis, nama in seri:
+        for status in ('sukses', 'gagal'):
+            baris.append(f'{PREFIX}_eksekusi_total{_label(jenis, nama, status=status)} {ambil(f"panggilan_{status}", jenis, nama)}')
+
+    baris += [
+        f'# HELP {PREFIX}_durasi_detik Durasi eksekusi tugas/signal handler.',
+        f'# TYPE {PREFIX}_durasi_detik histogram',
+    ]
+    for jenis, nama in seri:
+        kumulatif = 0
+        for b in bucket:
+            kumulatif += ambil(f'bucket_{b}', jenis, nama)
+            baris.append(f'{PREFIX}_durasi_detik_bucket{_label(jenis, nama, le=b)} {kumulatif}')
+        baris.append(f'{PREFIX}_durasi_detik_sum{_label(jenis, nama)} {ambil("durasi_mikro", jenis, nama) / _MIKRO}')
+        baris.append(f'{PREFIX}_durasi_detik_count{_label(jenis, nama)} {kumulatif}')
+
+    for metrik_nama, kunci, keterangan in (
+        ('query_total', 'query', 'Jumlah query database.'),
+        ('baris_ditulis_total', 'baris', 'Jumlah baris yang ditulis (INSERT/UPDATE/DELETE).'),
+        ('email_diantrikan_total', 'email', 'Jumlah email yang diantrikan ke Celery.'),
+    ):
+        baris += [f'# HELP {PREFIX}_{metrik_nama} {keterangan}', f'# TYPE {PREFIX}_{metrik_nama} counter']
+        for jenis, nama in seri:
+            baris.append(f'{PREFIX}_{metrik_nama}{_label(jenis, nama)} {ambil(kunci, jenis, nama)}')
+    return '\n'.join(baris) + '\n'
@@ -0,0 +1,167 @@
+"""
+Invoice PDF per Transaksi (weasyprint).
+
+- Template Django, stylesheet yang sudah di-parse dan FontConfiguration
+  disimpan per proses (lru_cache), jadi render berikutnya di worker yang sama
+  tidak mem-parse ulang CSS atau memuat ulang font.
+- PDF disimpan content-addressed: nama file = sha256(CSS + HTML hasil render).
+  Download berulang cukup menyajikan file dari storage, dan perubahan data
+  transaksi (atau layout) otomatis menghasilkan file baru.
+- File disimpan di storage 'invoice' (di luar MEDIA_ROOT, lihat settings) karena
+  berisi nama, telepon dan alamat pelanggan; hanya disajikan lewat view
+  invoice_download yang memeriksa pemilik pesanan.
+- Render dijalankan di worker Celery (tasks.render_invoice_pdf) atau batch
+  multiprocess (manage.py render_invoices), bukan di request.
+- Dari halaman unduhan, render diantrikan lewat jadwalkan_render: paling
+  banyak sekali per RENDER_TIMEOUT per transaksi (penanda di cache), dan
+  kegagalan render dicatat di cache agar halaman menampilkan error alih-alih
+  terus memuat ulang. Penanda ini hanya berlaku lintas proses web/worker jika
+  cache dibagi (CACHE_URL); dengan LocMemCache tiap proses punya penanda
+  sendiri, jadi render bisa diantrikan sekali per proses web dan error dari
+  worker tidak terlihat oleh halaman.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db.models import Prefetch
+from django.template.loader import get_template
+
+from .models import Transaksi, DetailTransaksi
+
+INVOICE_TEMPLATE = 'core/invoice.html'
+INVOICE_CSS = os.path.join(os.path.dirname(__file__), 'templates', 'core', 'invoice.css')
+INVOICE_DIR = 'invoices'
+# Lama penanda "sedang dirender" / "gagal" di cache (detik)
+RENDER_TIMEOUT = 120
+
+
+def storage_invoice():
+    return storages['invoice']
+
+
+def weasyprint_tersedia():
+    """weasyprint butuh library sistem (Pango); False jika tidak bisa di-import."""
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+def invoice_queryset():
+    """Transaksi beserta pelanggan dan item (dua query untuk satu atau banyak invoice)."""
+    return Transaksi.objects.select_related('idPelanggan').prefetch_related(
+        Prefetch('detailtransaksi_set', queryset=DetailTransaksi.objects.select_related('idProduk').order_by('id'))
+    )
+
+
+@lru_cache(maxsize=None)
+def _template():
+    return get_template(INVOICE_TEMPLATE)
+
+
+@lru_cache(maxsize=None)
+def _css_digest():
+    with open(INVOICE_CSS, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _font_config():
+    from weasyprint.text.fonts import FontConfiguration
+    return FontConfiguration()
+
+
+@lru_cache(maxsize=None)
+def _stylesheet():
+    from weasyprint import CSS
+    return CSS(filename=INVOICE_CSS, font_config=_font_config())
+
+
+def render_invoice_html(transaksi):
+    """HTML invoice. transaksi sebaiknya berasal dari invoice_queryset() agar tanpa query tambahan."""
+    items = list(transaksi.detailtransaksi_set.all())
+    for item in items:
+        item.harga = item.harga_satuan if item.harga_satuan is not None else item.idProduk.harga_produk
+    return _template().render({
+        'order': transaksi,
+        'pelanggan': transaksi.idPelanggan,
+        'items': items,
+        'subtotal': sum((item.sub_total or 0) for item in items),
+    })
+
+
+def invoice_path(html):
+    """Path storage content-addressed untuk HTML invoice."""
+    digest = hashlib.sha256(f"{_css_digest()}\n{html}".encode('utf-8')).hexdigest()
+    return f"{INVOICE_DIR}/{digest[:2]}/{digest}.pdf"
+
+
+def render_pdf(html):
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf(stylesheets=[_stylesheet()], font_config=_font_config())
+
+
+def cached_invoice(transaksi):
+    """Path PDF jika invoice untuk data transaksi saat ini sudah pernah dibuat, selain itu None."""
+    path = invoice_path(render_invoice_html(transaksi))
+    return path if storage_invoice().exists(path) else None
+
+
+def generate_invoice(transaksi, force=False):
+    """
+    Buat PDF invoice jika belum ada di storage.
+    Mengembalikan (path, dibuat) — dibuat=False berarti file yang sama sudah tersedia.
+    """
+    html = render_invoice_html(transaksi)
+    path = invoice_path(html)
+    storage = storage_invoice()
+    if storage.exists(path):
+        if not force:
+            return path, False
+        storage.delete(path)
+    saved = storage.save(path, ContentFile(render_pdf(html)))
+    return saved, True
+
+
+def _kunci_render(transaksi_id):
+    return f"invoice-render:{transaksi_id}"
+
+
+def _kunci_gagal(transaksi_id):
+    return f"invoice-gagal:{transaksi_id}"
+
+
+def jadwalkan_render(transaksi_id):
+    """
+    Antrikan tasks.render_invoice_pdf kecuali sudah diantrikan dalam
+    RENDER_TIMEOUT terakhir. Mengembalikan True jika task baru diantrikan.
+    """
+    from .tasks import render_invoice_pdf
+
+    if not cache.add(_kunci_render(transaksi_id), 1, RENDER_TIMEOUT):
+        return False
+    cache.delete(_kunci_gagal(transaksi_id))
+    render_invoice_pdf.delay(transaksi_id)
+    return True
+
+
+def tandai_render_selesai(transaksi_id, error=None):
+    """Hapus penanda antrean; jika `error` diisi, simpan sebagai penanda gagal."""
+    if error is not None:
+        cache.set(_kunci_gagal(transaksi_id), str(error) or error.__class__.__name__, RENDER_TIMEOUT)
+    cache.delete(_kunci_render(transaksi_id))
+
+
+def render_gagal(transaksi_id):
+    """Pesan error render terakhir untuk transaksi ini, atau None."""
+    return cache.get(_kunci_gagal(transaksi_id))
+
+
+def ulangi_render(transaksi_id):
+    """Lupakan kegagalan sebelumnya sehingga jadwalkan_render boleh mencoba lagi."""
+    cache.delete_many([_kunci_gagal(transaksi_id), _kunci_render(transaksi_id)])
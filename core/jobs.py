@@ -0,0 +1,152 @@
+"""
+Kerangka eksekusi tugas terjadwal (Celery beat) di core/tasks.py.
+
+Setiap tugas yang dibungkus @tugas_terjadwal:
+
+1. mengambil advisory lock di database (KunciTugas, satu baris per tugas) dengan
+   UPDATE bersyarat, sehingga dua worker tidak menjalankan tugas yang sama
+   bersamaan walaupun eksekusi sebelumnya lambat. Lock punya TTL agar worker
+   yang mati tidak mengunci tugas selamanya;
+2. mengklaim kunci idempotensi (nama tugas, jendela waktu) lewat unique
+   constraint RiwayatTugas, sehingga pesan beat yang terkirim ulang dalam
+   jendela yang sama dilewati;
+3. mencatat durasi, jumlah baris yang diproses (nilai kembalian tugas) dan
+   error ke RiwayatTugas.
+
+Pemanggilan langsung (tasks.nama_tugas() di shell/tes) tidak melewati lock
+dan idempotensi.
+"""
+import functools
+import logging
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from celery import current_task
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import KunciTugas, RiwayatTugas
+
+logger = logging.getLogger(__name__)
+
+# Riwayat yang lebih lama dari ini dihapus oleh tasks.prune_task_runs
+RIWAYAT_RETENSI_HARI = 30
+
+_EPOCH = datetime(2000, 1, 1)
+
+
+def awal_jendela(now, jendela):
+    """
+    Awal jendela idempotensi (aware datetime) berukuran `jendela` detik yang memuat now.
+    Dihitung pada jam lokal (CELERY_TIMEZONE sama dengan TIME_ZONE), jadi jendela
+    harian = satu hari kalender seperti jadwal crontab-nya.
+    """
+    lokal = timezone.localtime(now).replace(tzinfo=None)
+    detik = (lokal - _EPOCH).total_seconds()
+    return timezone.make_aware(_EPOCH + timedelta(seconds=detik // jendela * jendela))
+
+
+def ambil_kunci(nama, ttl, now=None):
+    """Token pemilik jika lock didapat, None jika sedang dipegang eksekusi lain."""
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+    kedaluwarsa = now + timedelta(seconds=ttl)
+    try:
+        with transaction.atomic():
+            KunciTugas.objects.create(nama=nama, pemilik=token, kedaluwarsa=kedaluwarsa)
+        return token
+    except IntegrityError:
+        pass
+    # Baris sudah ada: ambil alih hanya jika lock sebelumnya sudah kedaluwarsa
+    diambil = KunciTugas.objects.filter(nama=nama, kedaluwarsa__lte=now).update(
+        pemilik=token, kedaluwarsa=kedaluwarsa,
+    )
+    return token if diambil else None
+
+
+def perpanjang_kunci(nama, token, ttl, now=None):
+    """Perpanjang lock yang masih dipegang token; False jika sudah diambil alih."""
+    now = now or timezone.now()
+    return bool(KunciTugas.objects.filter(nama=nama, pemilik=token, kedaluwarsa__gt=now).update(
+        kedaluwarsa=now + timedelta(seconds=ttl),
+    ))
+
+
+def lepas_kunci(nama, token):
+    KunciTugas.objects.filter(nama=nama, pemilik=token).delete()
+
+
+def klaim_jendela(nama, jendela, now):
+    """
+    RiwayatTugas berstatus BERJALAN untuk (nama, jendela), atau None jika jendela
+    ini sudah dijalankan. Jendela yang sebelumnya GAGAL boleh dicoba lagi.
+    """
+    try:
+        with transaction.atomic():
+            return RiwayatTugas.objects.create(nama_tugas=nama, jendela=jendela, status='BERJALAN', dimulai_pada=now)
+    except IntegrityError:
+        pass
+    diklaim = RiwayatTugas.objects.filter(nama_tugas=nama, jendela=jendela, status='GAGAL').update(
+        status='BERJALAN', dimulai_pada=now, selesai_pada=None, durasi_ms=None, jumlah_baris=None, error='',
+    )
+    return RiwayatTugas.objects.get(nama_tugas=nama, jendela=jendela) if diklaim else None
+
+
+def _nama_eksekusi(task_name, args, kwargs):
+    # Satu tugas bisa dijadwalkan dengan argumen berbeda (mis. refresh_rfm_segments(True))
+    argumen = [repr(a) for a in args] + [f"{k}={kwargs[k]!r}" for k in sorted(kwargs)]
+    return f"{task_name}({','.join(argumen)})" if argumen else task_name
+
+
+def tugas_terjadwal(jendela, ttl=None):
+    """
+    Dekorator untuk fungsi tugas beat; dipasang di bawah @shared_task.
+    jendela: ukuran jendela idempotensi dalam detik (biasanya sama dengan interval jadwal).
+    ttl: umur maksimum lock dalam detik (default: jendela, minimal 10 menit).
+    """
+    ttl = ttl or max(jendela, 600)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            task = current_task
+            if task is None or task.request.called_directly:
+                return func(*args, **kwargs)
+
+            nama_kunci = task.name
+            nama = _nama_eksekusi(task.name, args, kwargs)
+            now = timezone.now()
+
+            token = ambil_kunci(nama_kunci, ttl, now)
+            if token is None:
+                logger.info("Tugas dilewati: eksekusi sebelumnya masih berjalan", extra={'tugas': nama})
+                return None
+            try:
+                riwayat = klaim_jendela(nama, awal_jendela(now, jendela), now)
+                if riwayat is None:
+                    logger.info("Tugas dilewati: jendela ini sudah dijalankan", extra={'tugas': nama})
+                    return None
+
+                t0 = time.perf_counter()
+                try:
+                    hasil = func(*args, **kwargs)
+                except Exception:
+                    riwayat.status = 'GAGAL'
+                    riwayat.error = traceback.format_exc()
+                    raise
+                else:
+                    riwayat.status = 'SUKSES'
+                    riwayat.jumlah_baris = hasil if isinstance(hasil, int) else None
+                    return hasil
+                finally:
+                    riwayat.selesai_pada = timezone.now()
+                    riwayat.durasi_ms = int((time.perf_counter() - t0) * 1000)
+                    riwayat.save(update_fields=['status', 'error', 'jumlah_baris', 'selesai_pada', 'durasi_ms'])
+            finally:
+                lepas_kunci(nama_kunci, token)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,273 @@
+"""
+Load test storefront (manage.py loadtest) terhadap server yang sedang berjalan.
+
+Setiap pengguna virtual adalah satu thread dengan cookie jar sendiri: login,
+lalu berulang kali menjalankan satu alur dengan jeda acak di antara langkahnya:
+
+- belanja: daftar produk, detail produk, tambah ke keranjang, keranjang,
+  checkout, upload bukti bayar dan detail pesanan;
+- katalog: hanya baca (home, daftar produk, detail produk, riwayat dan detail
+  pesanan), untuk mengukur throughput koneksi bersamaan.
+
+Hasil dikelompokkan per nama URL (core/urls.py) dengan throughput, persentil
+latensi dan rasio error.
+
+Urutan menjalankan lokal (database yang sama dengan server):
+
+    python manage.py generate_data --skala 100k
+    python manage.py smtp_sink --port 1025
+    CELERY_TASK_ALWAYS_EAGER=1 EMAIL_HOST=127.0.0.1 EMAIL_PORT=1025 EMAIL_USE_TLS=0 \\
+        python manage.py runserver --noreload 127.0.0.1:8000   # atau: gunicorn barokah.wsgi -w 4
+    python manage.py loadtest --host http://127.0.0.1:8000 --siapkan-pelanggan 50 --pengguna 50 --durasi 120
+
+Tanpa CELERY_TASK_ALWAYS_EAGER, jalankan redis-server dan worker Celery (lihat
+barokah/celery.py) dengan EMAIL_* yang sama supaya email masuk ke smtp_sink.
+
+WSGI vs ASGI (view storefront async, lihat barokah/asgi.py): jalankan server
+bergantian dengan database dan jumlah proses yang sama, tanpa jeda antar langkah:
+
+    gunicorn barokah.wsgi -w 4 -b 127.0.0.1:8000
+    python manage.py loadtest --alur katalog --pengguna 200 --jeda-min 0 --jeda-maks 0 --output wsgi.json
+    uvicorn barokah.asgi:application --workers 4 --port 8000
+    python manage.py loadtest --alur katalog --pengguna 200 --jeda-min 0 --jeda-maks 0 --output asgi.json \\
+        --bandingkan wsgi.json
+"""
+import http.cookiejar
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+
+from django.urls import Resolver404, resolve, reverse
+
+from .benchmarks import persentil
+
+ALUR = ('belanja', 'katalog')
+PASSWORD_DEFAULT = 'loadtest-barokah'
+PREFIX_USERNAME = 'loadtest'
+TIMEOUT = 30  # detik
+
+_PRODUK = re.compile(r'/products/(\d+)/')
+_ORDER = re.compile(r'/orders/(\d+)/')
+# PNG 1x1 untuk upload bukti bayar
+BUKTI_BAYAR = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+
+
+class _TanpaRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirect dicatat sebagai respons sendiri (mis. POST checkout -> 302), tidak diikuti
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def nama_url(path):
+    """Nama URL Django (mis. 'core:cart_add') untuk path; path apa adanya jika tidak cocok."""
+    try:
+        return resolve(urllib.parse.urlsplit(path).path).view_name
+    except Resolver404:
+        return path
+
+
+class Statistik:
+    """Latensi dan error per nama URL, aman dipakai bersama oleh banyak thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latensi = defaultdict(list)
+        self.error = defaultdict(int)
+        self.contoh_error = {}
+
+    def catat(self, nama, detik, error=None):
+        with self._lock:
+            self.latensi[nama].append(detik)
+            if error:
+                self.error[nama] += 1
+                self.contoh_error.setdefault(nama, error)
+
+    def ringkas(self, durasi):
+        hasil = {}
+        with self._lock:
+            for nama, nilai in sorted(self.latensi.items()):
+                nilai_ms = sorted(d * 1000 for d in nilai)
+                hasil[nama] = {
+                    'request': len(nilai_ms),
+                    'rps': round(len(nilai_ms) / durasi, 2),
+                    'error': self.error[nama],
+                    'rasio_error': round(self.error[nama] / len(nilai_ms), 4),
+                    'latensi_ms': {f'p{p}': round(persentil(nilai_ms, p), 1) for p in (50, 95, 99)},
+                    'contoh_error': self.contoh_error.get(nama, ''),
+                }
+        return hasil
+
+
+class PenggunaVirtual:
+    def __init__(self, host, username, password, statistik, berhenti, jeda=(0.5, 2.0), rng=None):
+        self.host = host.rstrip('/')
+        self.berhenti = berhenti
+        self.username = username
+        self.password = password
+        self.statistik = statistik
+        self.jeda = jeda
+        self.rng = rng or random.Random()
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _TanpaRedirect(),
+        )
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def request(self, path, data=None, files=None, harap=(200,)):
+        """
+        Kirim request dan catat hasilnya. Mengembalikan (status, body, location);
+        status 0 untuk error koneksi/timeout. Status di luar `harap` dihitung error.
+        """
+        headers = {'Referer': self.host + path}
+        body = None
+        if data is not None or files:
+            data = dict(data or {}, csrfmiddlewaretoken=self._csrf())
+            if files:
+                body, headers['Content-Type'] = _multipart(data, files)
+            else:
+                body = urllib.parse.urlencode(data).encode()
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        req = urllib.request.Request(self.host + path, data=body, headers=headers)
+        t0 = time.perf_counter()
+        status, isi, location, error = 0, '', '', None
+        try:
+            with self.opener.open(req, timeout=TIMEOUT) as response:
+                status, isi = response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as exc:
+            # 3xx juga masuk sini karena redirect tidak diikuti
+            status, location = exc.code, exc.headers.get('Location', '')
+            exc.close()
+        except OSError as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        detik = time.perf_counter() - t0
+
+        if error is None and status not in harap:
+            error = f"HTTP {status}"
+        elif error is None and location == reverse('core:login'):
+            error = "Redirect ke login"
+        self.statistik.catat(nama_url(path), detik, error)
+        return status, isi, location
+
+    def tunggu(self):
+        """Jeda acak antar langkah; True jika load test sudah harus berhenti."""
+        return self.berhenti.wait(self.rng.uniform(*self.jeda))
+
+    def login(self):
+        self.request(reverse('core:login'))
+        status, _, location = self.request(
+            reverse('core:login'), {'username': self.username, 'password': self.password}, harap=(302,),
+        )
+        return status == 302 and location == reverse('core:home')
+
+    def belanja(self):
+        """Satu sesi belanja penuh; berhenti di langkah yang gagal."""
+        status, isi, _ = self.request(reverse('core:products'))
+        produk_ids = list(dict.fromkeys(_PRODUK.findall(isi))) if status == 200 else []
+        if not produk_ids or self.tunggu():
+            return
+
+        for produk_id in self.rng.sample(produk_ids, min(len(produk_ids), self.rng.randint(1, 3))):
+            self.request(reverse('core:product_detail', args=[produk_id]))
+            if self.tunggu():
+                return
+            self.request(reverse('core:cart_add', args=[produk_id]), {}, harap=(302,))
+
+        self.request(reverse('core:cart'))
+        if self.tunggu():
+            return
+        self.request(reverse('core:checkout'))
+        status, _, location = self.request(
+            reverse('core:checkout'), {'alamat_pengiriman': 'Jl. Load Test'}, harap=(302,),
+        )
+        order = _ORDER.search(location) if status == 302 else None
+        if not order or self.tunggu():
+            return
+
+        order_id = order.group(1)
+        self.request(reverse('core:payment_upload', args=[order_id]))
+        self.request(
+            reverse('core:payment_upload', args=[order_id]),
+            files={'bukti': ('bukti.png', 'image/png', BUKTI_BAYAR)}, harap=(302,),
+        )
+        self.request(reverse('core:order_detail', args=[order_id]))
+
+    def katalog(self):
+        """Satu putaran halaman baca saja (view async)."""
+        self.request(reverse('core:home'))
+        if self.tunggu():
+            return
+        status, isi, _ = self.request(reverse('core:products'))
+        produk_ids = list(dict.fromkeys(_PRODUK.findall(isi))) if status == 200 else []
+        for produk_id in self.rng.sample(produk_ids, min(len(produk_ids), 3)):
+            if self.tunggu():
+                return
+            self.request(reverse('core:product_detail', args=[produk_id]))
+
+        if self.tunggu():
+            return
+        status, isi, _ = self.request(reverse('core:order_history'))
+        order = _ORDER.search(isi) if status == 200 else None
+        if order and not self.tunggu():
+            self.request(reverse('core:order_detail', args=[order.group(1)]))
+
+    def jalankan(self, alur='belanja'):
+        if not self.login():
+            return
+        langkah = getattr(self, alur)
+        while not self.berhenti.is_set():
+            langkah()
+            self.tunggu()
+
+
+def _multipart(data, files):
+    batas = uuid.uuid4().hex
+    bagian = []
+    for key, value in data.items():
+        bagian.append(f'--{batas}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode())
+    for key, (filename, content_type, isi) in files.items():
+        bagian.append(
+            f'--{batas}\r\nContent-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + isi + b'\r\n'
+        )
+    bagian.append(f'--{batas}--\r\n'.encode())
+    return b''.join(bagian), f'multipart/form-data; boundary={batas}'
+
+
+def jalankan_load_test(host, usernames, password, durasi, ramp_up=0, jeda=(0.5, 2.0), seed=None, alur='belanja'):
+    """
+    Satu pengguna virtual per username selama `durasi` detik; pengguna mulai
+    bertahap selama `ramp_up` detik. Mengembalikan (ringkasan per URL, durasi nyata).
+    """
+    if alur not in ALUR:
+        raise ValueError(f"Alur tidak dikenal: {alur!r} (pilihan: {', '.join(ALUR)})")
+    statistik = Statistik()
+    berhenti = threading.Event()
+    rng = random.Random(seed)
+    threads = []
+    t0 = time.perf_counter()
+    for i, username in enumerate(usernames):
+        pengguna = PenggunaVirtual(host, username, password, statistik, berhenti, jeda, random.Random(rng.random()))
+        thread = threading.Thread(target=pengguna.jalankan, args=(alur,), name=f'loadtest-{i}', daemon=True)
+        thread.start()
+        threads.append(thread)
+        if ramp_up and i < len(usernames) - 1 and berhenti.wait(ramp_up / len(usernames)):
+            break
+
+    berhenti.wait(max(durasi - (time.perf_counter() - t0), 0))
+    berhenti.set()
+    for thread in threads:
+        thread.join(TIMEOUT)
+    nyata = time.perf_counter() - t0
+    return statistik.ringkas(nyata), nyata
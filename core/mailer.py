@@ -0,0 +1,171 @@
+"""
+Kebijakan retry pengiriman email (tasks.send_notification_email dan
+tasks.send_notification_emails_batch).
+
+- Error SMTP diklasifikasikan PERMANEN (alamat ditolak 5xx, autentikasi gagal,
+  header/alamat tidak valid) atau SEMENTARA (koneksi putus, timeout, 4xx).
+  Error permanen tidak di-retry.
+- Retry memakai exponential backoff dengan jitter, jadi task yang gagal
+  bersamaan saat provider down tidak mencoba ulang serentak.
+- Setelah gangguan koneksi, SMTP dianggap down selama SMTP_JEDA_GANGGUAN detik
+  (disimpan di cache): task lain langsung dijadwalkan ulang tanpa membuka
+  koneksi SMTP baru.
+- Email yang gagal permanen atau kehabisan retry disimpan di EmailGagal
+  (dead letter) dan bisa dikirim ulang massal dari admin.
+"""
+import logging
+import random
+import smtplib
+
+from django.core.cache import cache
+from django.core.mail import BadHeaderError
+from django.db import transaction
+from django.utils import timezone
+
+from .instrumentation import catat_email
+from .models import EmailGagal
+
+logger = logging.getLogger(__name__)
+
+PERMANEN = 'PERMANEN'
+SEMENTARA = 'SEMENTARA'
+
+EMAIL_MAX_RETRIES = 6
+BACKOFF_DASAR = 60  # detik
+BACKOFF_MAKS = 3600  # detik
+
+# Lebih pendek dari jeda retry pertama (BACKOFF_DASAR / 2), jadi retry task yang membuka
+# jeda ini tetap mencoba SMTP lagi; yang ditahan hanya task lain selama gangguan.
+SMTP_JEDA_GANGGUAN = 30  # detik
+_KUNCI_GANGGUAN = 'smtp:gangguan'
+
+
+class SMTPGangguan(Exception):
+    """SMTP baru saja gagal dihubungi; pengiriman ditunda tanpa membuka koneksi."""
+
+
+def klasifikasi_error(exc):
+    """PERMANEN atau SEMENTARA untuk exception dari pengiriman email."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in exc.recipients.values()]
+        return PERMANEN if codes and all(code >= 500 for code in codes) else SEMENTARA
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        return PERMANEN
+    if isinstance(exc, (smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected)):
+        return SEMENTARA
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return PERMANEN if exc.smtp_code >= 500 else SEMENTARA
+    if isinstance(exc, (BadHeaderError, UnicodeError, ValueError)):
+        return PERMANEN
+    # Timeout, koneksi ditolak, DNS, SMTPGangguan, dan error yang tidak dikenal
+    return SEMENTARA
+
+
+def error_per_pesan(exc):
+    """True jika error hanya mengenai satu email, bukan koneksi SMTP-nya."""
+    return isinstance(exc, (
+        smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+        BadHeaderError, UnicodeError, ValueError,
+    ))
+
+
+def hitung_backoff(retries):
+    """Jeda retry ke-(retries+1): exponential dengan equal jitter, dibatasi BACKOFF_MAKS."""
+    batas = min(BACKOFF_MAKS, BACKOFF_DASAR * 2 ** retries)
+    return int(batas / 2 + random.uniform(0, batas / 2))
+
+
+def smtp_sedang_gangguan():
+    return cache.get(_KUNCI_GANGGUAN) is not None
+
+
+def tandai_gangguan_smtp(exc):
+    """Buka jeda gangguan untuk error koneksi sementara (bukan error per email atau autentikasi)."""
+    if klasifikasi_error(exc) == SEMENTARA and not error_per_pesan(exc) and not isinstance(exc, SMTPGangguan):
+        cache.set(_KUNCI_GANGGUAN, str(exc), SMTP_JEDA_GANGGUAN)
+
+
+def tambah_link(message, link_url, link_text="Lihat Detail"):
+    # Hanya untuk pesan lama yang belum dirender lewat core/notifications.py
+    if link_url:
+        return f"{message}\n\n[Link: {link_text}]({link_url})"
+    return message
+
+
+ITEM_FIELDS = ('subject', 'message', 'recipient_list', 'link_url', 'link_text', 'html_message')
+
+
+def normalisasi_item(item):
+    """
+    Item email batch sebagai dict ITEM_FIELDS. Menerima dict (notifications.item_email)
+    atau list lama [subject, message, recipient_list, link_url(, link_text)].
+    """
+    if not isinstance(item, dict):
+        item = dict(zip(ITEM_FIELDS, item))
+    return {
+        'subject': item['subject'],
+        'message': item['message'],
+        'recipient_list': list(item['recipient_list']),
+        'link_url': item.get('link_url') or '',
+        'link_text': item.get('link_text') or 'Lihat Detail',
+        'html_message': item.get('html_message') or '',
+    }
+
+
+def buat_email(item, connection=None):
+    """EmailMultiAlternatives (teks + HTML jika ada) dari satu item batch."""
+    from django.conf import settings
+    from django.core.mail import EmailMultiAlternatives
+
+    item = normalisasi_item(item)
+    email = EmailMultiAlternatives(
+        item['subject'], tambah_link(item['message'], item['link_url'], item['link_text']),
+        settings.DEFAULT_FROM_EMAIL, item['recipient_list'], connection=connection,
+    )
+    if item['html_message']:
+        email.attach_alternative(item['html_message'], 'text/html')
+    return email
+
+
+def catat_email_gagal(items, exc, jumlah_percobaan):
+    """Simpan email ke dead letter. items: list item batch (lihat normalisasi_item)."""
+    jenis = klasifikasi_error(exc)
+    EmailGagal.objects.bulk_create([
+        EmailGagal(
+            **dict(item, subject=item['subject'][:255]),
+            jenis_error=jenis, error=f"{type(exc).__name__}: {exc}",
+            jumlah_percobaan=jumlah_percobaan,
+        )
+        for item in map(normalisasi_item, items)
+    ])
+    logger.error("Email masuk dead letter", extra={'jumlah': len(items), 'jenis_error': jenis, 'error': str(exc)})
+
+
+def kirim_ulang(queryset, batch_size=100):
+    """
+    Kirim ulang email di dead letter per kelompok batch_size lewat
+    send_notification_emails_batch (satu koneksi SMTP per kelompok).
+    Mengembalikan jumlah email yang dijadwalkan ulang.
+    """
+    # Import di sini untuk mencegah circular import (tasks -> mailer)
+    from .tasks import send_notification_emails_batch
+
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(status='GAGAL').select_for_update()
+            .values_list('id', *ITEM_FIELDS)
+        )
+        if not rows:
+            return 0
+        EmailGagal.objects.filter(pk__in=[row[0] for row in rows]).update(
+            status='DIKIRIM_ULANG', dikirim_ulang_pada=timezone.now(),
+        )
+        messages = [dict(zip(ITEM_FIELDS, row[1:])) for row in rows]
+
+        def dispatch():
+            catat_email(len(messages))
+            for i in range(0, len(messages), batch_size):
+                send_notification_emails_batch.delay(messages[i:i + batch_size])
+
+        transaction.on_commit(dispatch)
+    return len(rows)
@@ -0,0 +1,96 @@
+import json
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core import benchmarks
+from core.models import Kategori, Produk, Pelanggan, Transaksi, DetailTransaksi
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark checkout, keranjang, dashboard admin, semua tugas CELERY_BEAT_SCHEDULE dan "
+        "rantai signal pada data yang ada (lihat generate_data). Hasil (persentil latensi dan "
+        "jumlah query) disimpan sebagai JSON; semua perubahan di-rollback."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterasi', type=int, default=20)
+        parser.add_argument('--pemanasan', type=int, default=2, help='Iterasi awal yang tidak dihitung')
+        parser.add_argument('--skenario', action='append', help='Hanya skenario yang namanya diawali ini (bisa berulang)')
+        parser.add_argument('--output', help='Default: benchmarks/<waktu>-<commit>.json')
+        parser.add_argument('--bandingkan', help='File JSON hasil sebelumnya')
+        parser.add_argument('--toleransi', type=float, default=10.0, help='Kenaikan p95 yang masih diterima (persen)')
+        parser.add_argument('--gagal-jika-regresi', action='store_true')
+
+    def handle(self, *args, **options):
+        jumlah_data = {model.__name__: model.objects.count() for model in (Kategori, Produk, Pelanggan, Transaksi, DetailTransaksi)}
+        if not jumlah_data['Transaksi'] or not jumlah_data['Pelanggan']:
+            raise CommandError("Belum ada data; jalankan manage.py generate_data terlebih dahulu.")
+
+        semua = benchmarks.daftar_skenario()
+        filter_nama = options['skenario']
+        dipilih = [s for nama, s in semua.items() if not filter_nama or nama.startswith(tuple(filter_nama))]
+        if not dipilih:
+            raise CommandError(f"Tidak ada skenario yang cocok. Pilihan: {', '.join(semua)}")
+
+        waktu = timezone.now()
+        commit = _commit()
+        self.stdout.write(f"Commit {commit}, {connection.vendor}, data: {jumlah_data}")
+        try:
+            hasil = benchmarks.jalankan_benchmark(
+                dipilih, iterasi=options['iterasi'], pemanasan=options['pemanasan'], laporan=self._tulis_baris,
+            )
+        except LookupError as exc:
+            raise CommandError(f"{exc}; jalankan manage.py generate_data terlebih dahulu.")
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / f"{waktu:%Y%m%d-%H%M%S}-{commit}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({
+            'commit': commit,
+            'waktu': waktu.isoformat(),
+            'database': connection.vendor,
+            'jumlah_data': jumlah_data,
+            'iterasi': options['iterasi'],
+            'skenario': hasil,
+        }, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Hasil disimpan ke {output}"))
+
+        if options['bandingkan']:
+            self._bandingkan(options['bandingkan'], hasil, options['toleransi'] / 100, options['gagal_jika_regresi'])
+
+    def _tulis_baris(self, nama, hasil):
+        latensi = hasil['latensi_ms']
+        self.stdout.write(
+            f"{nama:<55} p50 {latensi['p50']:>9.2f}  p95 {latensi['p95']:>9.2f}  p99 {latensi['p99']:>9.2f} ms  "
+            f"query {hasil['query']['median']:g} (maks {hasil['query']['maks']})"
+        )
+
+    def _bandingkan(self, path, hasil, toleransi, gagal_jika_regresi):
+        try:
+            lama = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Tidak bisa membaca {path}: {exc}")
+
+        regresi = benchmarks.bandingkan(lama['skenario'], hasil, toleransi)
+        if not regresi:
+            self.stdout.write(self.style.SUCCESS(f"Tidak ada regresi dibanding commit {lama.get('commit')}."))
+            return
+        for nama, metrik, nilai_lama, nilai_baru in regresi:
+            self.stdout.write(self.style.WARNING(f"REGRESI {nama}: {metrik} {nilai_lama} -> {nilai_baru}"))
+        if gagal_jika_regresi:
+            raise CommandError(f"{len(regresi)} regresi dibanding commit {lama.get('commit')}.")
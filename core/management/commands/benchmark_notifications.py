@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import linebreaks
+
+from core import notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark render email notifikasi: render_to_string per email (cari template, "
+        "Context baru dan layout HTML penuh setiap kali) dibanding notifications.render_massal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=10_000, help='Jumlah email yang dirender')
+        parser.add_argument('--notifikasi', default='perubahan_status', choices=sorted(notifications.NOTIFIKASI))
+
+    def handle(self, *args, **options):
+        jumlah = options['messages']
+        nama = options['notifikasi']
+        contexts = [
+            {
+                'nama': f"Pelanggan {i}", 'transaksi_id': i, 'total': '150000.00', 'status': 'DIPROSES',
+                'status_lama': 'DIBAYAR', 'status_baru': 'DIKIRIM', 'produk': ['Semen', 'Beton'],
+                'link_url': reverse('core:order_detail', args=[i]),
+            }
+            for i in range(jumlah)
+        ]
+        template = notifications.NOTIFIKASI[nama]
+
+        t0 = time.perf_counter()
+        for context in contexts:
+            # Cara lama yang setara: template dicari per email, HTML dirender dari hasil teks
+            pesan = render_to_string(f'core/email/{nama}.txt', context).strip()
+            render_to_string('core/email/base.html', {
+                'subject': template.subject_source, 'pesan_html': linebreaks(pesan), 'link_text': template.link_text,
+                'link_url': notifications.absolut(context['link_url']),
+            })
+        naif = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        notifications.render_massal(nama, contexts)
+        registry = time.perf_counter() - t0
+
+        per_10k = 10_000 / jumlah * 1000
+        self.stdout.write(f"{nama}: {jumlah} email")
+        self.stdout.write(f"render_to_string : {naif * per_10k:.0f} ms per 10k email")
+        self.stdout.write(f"render_massal    : {registry * per_10k:.0f} ms per 10k email")
+        self.stdout.write(self.style.SUCCESS(f"Percepatan {naif / registry:.1f}x"))
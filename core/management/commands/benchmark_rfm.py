@@ -0,0 +1,82 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Pelanggan, Transaksi
+from core.segmentation import refresh_segments
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark pipeline segmentasi RFM pada dataset sintetis. "
+        "Data dibuat di dalam transaksi dan di-rollback di akhir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000, help='Jumlah transaksi sintetis')
+        parser.add_argument('--pelanggan', type=int, default=50_000, help='Jumlah pelanggan sintetis')
+        parser.add_argument('--changed', type=float, default=0.01, help='Porsi transaksi yang diubah sebelum run inkremental')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            t0 = time.perf_counter()
+            pelanggan_ids = self._buat_pelanggan(options['pelanggan'], batch_size)
+            self._buat_transaksi(rng, pelanggan_ids, options['orders'], batch_size)
+            self.stdout.write(f"Dataset: {options['orders']} transaksi / {len(pelanggan_ids)} pelanggan "
+                              f"dibuat dalam {time.perf_counter() - t0:.1f} detik")
+
+            t0 = time.perf_counter()
+            proses = refresh_segments(full=True)
+            self.stdout.write(f"FULL        : {proses.jumlah_pelanggan} pelanggan dalam {time.perf_counter() - t0:.2f} detik")
+
+            # Simulasikan perubahan status pada sebagian transaksi lalu jalankan mode inkremental
+            jumlah_berubah = int(options['orders'] * options['changed'])
+            sample_ids = list(
+                Transaksi.objects.order_by('?').values_list('id', flat=True)[:jumlah_berubah]
+            )
+            Transaksi.objects.filter(id__in=sample_ids).update(
+                status_transaksi='SELESAI', updated_at=timezone.now() + timedelta(seconds=1)
+            )
+            t0 = time.perf_counter()
+            proses = refresh_segments(now=timezone.now() + timedelta(seconds=2))
+            self.stdout.write(f"INKREMENTAL : {proses.jumlah_pelanggan} pelanggan dalam {time.perf_counter() - t0:.2f} detik")
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Selesai; dataset sintetis di-rollback."))
+
+    def _buat_pelanggan(self, jumlah, batch_size):
+        prefix = f"bench{int(time.time())}"
+        for start in range(0, jumlah, batch_size):
+            Pelanggan.objects.bulk_create([
+                Pelanggan(
+                    nama_pelanggan=f"Pelanggan {i}", alamat='-', tanggal_lahir=date(1990, 1, 1),
+                    no_hp='0', username=f"{prefix}_{i}", password='!',
+                )
+                for i in range(start, min(start + batch_size, jumlah))
+            ])
+        return list(Pelanggan.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+
+    def _buat_transaksi(self, rng, pelanggan_ids, jumlah, batch_size):
+        now = timezone.now()
+        statuses = ['SELESAI'] * 6 + ['DIBAYAR', 'DIKIRIM', 'DIBATALKAN', 'DIPROSES']
+        for start in range(0, jumlah, batch_size):
+            batch = []
+            for _ in range(min(batch_size, jumlah - start)):
+                tanggal = now - timedelta(days=rng.randint(0, 730), seconds=rng.randint(0, 86400))
+                batch.append(Transaksi(
+                    idPelanggan_id=rng.choice(pelanggan_ids),
+                    tanggal=tanggal, waktu_checkout=tanggal,
+                    total=Decimal(rng.randint(50, 50_000)) * 1000,
+                    status_transaksi=rng.choice(statuses),
+                ))
+            Transaksi.objects.bulk_create(batch)
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core import exports
+from core.models import STATUS_TRANSAKSI_CHOICES
+from core.tasks import export_transaksi_file
+
+
+def _tanggal(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise CommandError(f"Tanggal tidak valid: {value} (format YYYY-MM-DD)")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Ekspor Transaksi + DetailTransaksi ke CSV/XLSX untuk akuntansi. "
+        "Data dibaca per chunk sehingga memori tetap konstan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mulai', type=_tanggal, help='Tanggal awal (YYYY-MM-DD, inklusif)')
+        parser.add_argument('--sampai', type=_tanggal, help='Tanggal akhir (YYYY-MM-DD, inklusif)')
+        parser.add_argument(
+            '--status', action='append', choices=[value for value, _ in STATUS_TRANSAKSI_CHOICES],
+            help='Filter status; boleh diulang. Default semua status.',
+        )
+        parser.add_argument('--format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='File tujuan. Default stdout (khusus CSV).')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Jalankan lewat Celery: file disimpan di storage dan admin diberi email.',
+        )
+
+    def handle(self, *args, **options):
+        mulai, sampai, statuses = options['mulai'], options['sampai'], options['status']
+        file_format = options['format']
+
+        if options['background']:
+            result = export_transaksi_file.delay(
+                mulai.isoformat() if mulai else None, sampai.isoformat() if sampai else None,
+                statuses, file_format,
+            )
+            self.stderr.write(self.style.SUCCESS(f"Ekspor dijadwalkan (task {result.id})."))
+            return
+
+        rows = exports.iter_rows(exports.export_queryset(mulai, sampai, statuses), options['chunk_size'])
+        output = options['output']
+        if file_format == 'xlsx':
+            if not output:
+                raise CommandError("Ekspor XLSX membutuhkan --output.")
+            exports.write_xlsx(rows, output)
+        elif output:
+            with open(output, 'w', newline='', encoding='utf-8') as f:
+                exports.write_csv(rows, f)
+        else:
+            exports.write_csv(rows, self.stdout)
+
+        if output:
+            self.stderr.write(self.style.SUCCESS(f"Ekspor selesai: {output}"))
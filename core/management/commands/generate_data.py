@@ -0,0 +1,186 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import (
+    Kategori, Produk, Pelanggan, Transaksi, DetailTransaksi, STATUS_TANPA_PENGINGAT_BAYAR,
+)
+
+# Perkiraan total baris (semua tabel) -> jumlah transaksi; rata-rata 3 detail per transaksi
+SKALA = {
+    '10k': 2_000,
+    '100k': 20_000,
+    '1m': 200_000,
+    '10m': 2_000_000,
+}
+
+# Bobot status: mayoritas pesanan lama sudah selesai
+STATUS_BOBOT = [('SELESAI', 60), ('DIKIRIM', 8), ('DIBAYAR', 8), ('DIBATALKAN', 10), ('DIPROSES', 9), ('MENUNGGU VERIFIKASI', 5)]
+STATUS_MENUNGGU = {'DIPROSES', 'MENUNGGU VERIFIKASI'}
+
+NAMA_DEPAN = ['Agus', 'Budi', 'Citra', 'Dewi', 'Eko', 'Fitri', 'Gita', 'Hadi', 'Indah', 'Joko', 'Kartika', 'Lestari']
+NAMA_BELAKANG = ['Santoso', 'Wijaya', 'Saputra', 'Lestari', 'Pratama', 'Nugroho', 'Hidayat', 'Kusuma']
+KATEGORI = ['Semen', 'Pasir', 'Batu Bata', 'Beton Cor', 'Besi', 'Paving', 'Genteng', 'Keramik', 'Kayu', 'Cat']
+
+
+class Command(BaseCommand):
+    help = (
+        "Buat data sintetis (Kategori, Produk, Pelanggan, Transaksi, DetailTransaksi) dengan "
+        "bulk_create per batch, tanpa signal/email. Gunakan database terpisah untuk benchmark."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skala', choices=sorted(SKALA), default='10k', help='Perkiraan total baris')
+        parser.add_argument('--transaksi', type=int, help='Jumlah transaksi (menimpa --skala)')
+        parser.add_argument('--pelanggan', type=int, help='Default: transaksi / 10')
+        parser.add_argument('--produk', type=int, help='Default: transaksi / 100 (100 - 5000)')
+        parser.add_argument('--kategori', type=int, default=len(KATEGORI))
+        parser.add_argument('--hari', type=int, default=730, help='Rentang tanggal transaksi ke belakang')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        jumlah_transaksi = options['transaksi'] or SKALA[options['skala']]
+        jumlah_pelanggan = options['pelanggan'] or max(jumlah_transaksi // 10, 1)
+        jumlah_produk = options['produk'] or min(max(jumlah_transaksi // 100, 100), 5_000)
+
+        t0 = time.perf_counter()
+        kategori_ids = self._buat_kategori(options['kategori'])
+        produk = self._buat_produk(jumlah_produk, kategori_ids)
+        pelanggan_ids = self._buat_pelanggan(jumlah_pelanggan)
+        jumlah_detail = self._buat_transaksi(jumlah_transaksi, pelanggan_ids, produk, options['hari'])
+        self._reset_sequence()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai dalam {time.perf_counter() - t0:.1f} detik: {len(kategori_ids)} kategori, {len(produk)} produk, "
+            f"{len(pelanggan_ids)} pelanggan, {jumlah_transaksi} transaksi, {jumlah_detail} detail transaksi."
+        ))
+
+    def _id_awal(self, model):
+        # ID diisi sendiri (bukan dari bulk_create) agar detail bisa merujuk transaksi tanpa query balik
+        return (model.objects.aggregate(maks=Max('id'))['maks'] or 0) + 1
+
+    def _simpan(self, model, objs):
+        for start in range(0, len(objs), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(objs[start:start + self.batch_size])
+
+    def _buat_kategori(self, jumlah):
+        awal = self._id_awal(Kategori)
+        objs = [
+            Kategori(id=awal + i, nama_kategori=KATEGORI[i % len(KATEGORI)] + (f" {i // len(KATEGORI) + 1}" if i >= len(KATEGORI) else ''))
+            for i in range(jumlah)
+        ]
+        self._simpan(Kategori, objs)
+        return [obj.id for obj in objs]
+
+    def _buat_produk(self, jumlah, kategori_ids):
+        """Mengembalikan list (id, harga) untuk dipakai detail transaksi."""
+        awal = self._id_awal(Produk)
+        objs = []
+        for i in range(jumlah):
+            objs.append(Produk(
+                id=awal + i,
+                nama_produk=f"Produk {awal + i}",
+                deskripsi_produk='Data sintetis',
+                foto_produk='',
+                # ~10% produk stok rendah supaya laporan stok rendah punya isi
+                stok_produk=self.rng.randint(0, 4) if self.rng.random() < 0.1 else self.rng.randint(10, 500),
+                harga_produk=Decimal(self.rng.randint(5, 2_000)) * 1000,
+                kategori_id=self.rng.choice(kategori_ids),
+            ))
+        self._simpan(Produk, objs)
+        return [(obj.id, obj.harga_produk) for obj in objs]
+
+    def _buat_pelanggan(self, jumlah):
+        awal = self._id_awal(Pelanggan)
+        for start in range(0, jumlah, self.batch_size):
+            with transaction.atomic():
+                Pelanggan.objects.bulk_create([
+                    Pelanggan(
+                        id=awal + i,
+                        nama_pelanggan=f"{self.rng.choice(NAMA_DEPAN)} {self.rng.choice(NAMA_BELAKANG)}",
+                        alamat='Jl. Sintetis',
+                        tanggal_lahir=date(1960, 1, 1) + timedelta(days=self.rng.randint(0, 365 * 45)),
+                        no_hp=f"08{self.rng.randint(10**9, 10**10 - 1)}",
+                        username=f"gen{awal + i}",
+                        password='!',
+                        email=f"gen{awal + i}@example.com",
+                    )
+                    for i in range(start, min(start + self.batch_size, jumlah))
+                ])
+        return range(awal, awal + jumlah)
+
+    def _pilih(self, items):
+        # Distribusi miring: sebagian kecil pelanggan/produk menyumbang sebagian besar transaksi
+        return items[int(len(items) * self.rng.random() ** 2)]
+
+    def _buat_transaksi(self, jumlah, pelanggan_ids, produk, hari):
+        statuses, bobot = zip(*STATUS_BOBOT)
+        transaksi_awal = self._id_awal(Transaksi)
+        detail_id = self._id_awal(DetailTransaksi)
+        jumlah_detail = 0
+
+        for start in range(0, jumlah, self.batch_size):
+            transaksi, detail = [], []
+            for i in range(start, min(start + self.batch_size, jumlah)):
+                transaksi_id = transaksi_awal + i
+                status = self.rng.choices(statuses, bobot)[0]
+                if status in STATUS_MENUNGGU:
+                    # Pesanan yang belum dibayar hanya dari 2 hari terakhir (sebagian sudah lewat batas bayar)
+                    tanggal = self.now - timedelta(seconds=self.rng.randint(0, 2 * 86400))
+                else:
+                    tanggal = self.now - timedelta(days=self.rng.randint(1, hari), seconds=self.rng.randint(0, 86400))
+
+                sub_total = Decimal('0.00')
+                for _ in range(self.rng.choices([1, 2, 3, 4, 5], [25, 25, 20, 15, 15])[0]):
+                    produk_id, harga = self._pilih(produk)
+                    qty = self.rng.randint(1, 20)
+                    detail.append(DetailTransaksi(
+                        id=detail_id, idTransaksi_id=transaksi_id, idProduk_id=produk_id,
+                        jumlah_produk=qty, harga_satuan=harga, sub_total=harga * qty,
+                    ))
+                    detail_id += 1
+                    sub_total += harga * qty
+
+                ongkir = Decimal(self.rng.choice([0, 25, 50, 100])) * 1000
+                selesai_at = tanggal + timedelta(days=self.rng.randint(1, 7)) if status == 'SELESAI' else None
+                transaksi.append(Transaksi(
+                    id=transaksi_id,
+                    idPelanggan_id=self._pilih(pelanggan_ids),
+                    tanggal=tanggal,
+                    waktu_checkout=tanggal,
+                    batas_waktu_bayar=tanggal + timedelta(hours=24),
+                    status_transaksi=status,
+                    ongkir=ongkir,
+                    total=sub_total + ongkir,
+                    alamat_pengiriman='Jl. Sintetis',
+                    is_payment_reminder_sent=status in STATUS_TANPA_PENGINGAT_BAYAR,
+                    selesai_at=min(selesai_at, self.now) if selesai_at else None,
+                    # Pesanan lama dianggap sudah diingatkan; hanya yang baru selesai masuk sweep
+                    is_feedback_reminder_sent=bool(selesai_at) and selesai_at < self.now - timedelta(days=4),
+                ))
+
+            with transaction.atomic():
+                Transaksi.objects.bulk_create(transaksi)
+                DetailTransaksi.objects.bulk_create(detail, batch_size=self.batch_size)
+            jumlah_detail += len(detail)
+            self.stdout.write(f"  {start + len(transaksi)}/{jumlah} transaksi")
+        return jumlah_detail
+
+    def _reset_sequence(self):
+        # PostgreSQL: sequence id tidak ikut maju karena id diisi sendiri
+        sql = connection.ops.sequence_reset_sql(no_style(), [Kategori, Produk, Pelanggan, Transaksi, DetailTransaksi])
+        with connection.cursor() as cursor:
+            for statement in sql:
+                cursor.execute(statement)
@@ -0,0 +1,133 @@
+import json
+from datetime import date
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import loadtest
+from core.models import Pelanggan
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test storefront terhadap server yang sedang berjalan (login, produk, keranjang, "
+        "checkout, upload bukti bayar). Laporan per URL: throughput, p50/p95/p99 dan rasio error. "
+        "Lihat core/loadtest.py untuk menyiapkan server, Celery dan smtp_sink, dan untuk "
+        "membandingkan deployment WSGI dengan ASGI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='http://127.0.0.1:8000')
+        parser.add_argument('--alur', choices=loadtest.ALUR, default='belanja', help='belanja (default) atau katalog (hanya baca)')
+        parser.add_argument('--pengguna', type=int, default=10, help='Jumlah pengguna virtual bersamaan (0: hanya siapkan akun)')
+        parser.add_argument('--durasi', type=float, default=60, help='Lama load test (detik)')
+        parser.add_argument('--ramp-up', type=float, default=10, help='Pengguna mulai bertahap selama N detik')
+        parser.add_argument('--jeda-min', type=float, default=0.5, help='Jeda minimal antar langkah (detik)')
+        parser.add_argument('--jeda-maks', type=float, default=2.0)
+        parser.add_argument('--password', default=loadtest.PASSWORD_DEFAULT)
+        parser.add_argument(
+            '--siapkan-pelanggan', type=int, default=0,
+            help=f"Buat akun {loadtest.PREFIX_USERNAME}<n> yang belum ada (database yang sama dengan server)",
+        )
+        parser.add_argument('--output', help='Simpan hasil sebagai JSON')
+        parser.add_argument('--bandingkan', help='File JSON hasil sebelumnya (mis. deployment WSGI) untuk dibandingkan per URL')
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        if options['siapkan_pelanggan']:
+            self._siapkan_pelanggan(options['siapkan_pelanggan'], options['password'])
+        if not options['pengguna']:
+            return
+
+        usernames = list(
+            Pelanggan.objects.filter(username__startswith=loadtest.PREFIX_USERNAME)
+            .order_by('id').values_list('username', flat=True)[:options['pengguna']]
+        )
+        if len(usernames) < options['pengguna']:
+            raise CommandError(
+                f"Hanya ada {len(usernames)} akun {loadtest.PREFIX_USERNAME}<n>; "
+                f"jalankan dengan --siapkan-pelanggan {options['pengguna']}."
+            )
+
+        lama = None
+        if options['bandingkan']:
+            try:
+                lama = json.loads(Path(options['bandingkan']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Tidak bisa membaca {options['bandingkan']}: {exc}")
+
+        self.stdout.write(
+            f"{len(usernames)} pengguna (alur {options['alur']}) ke {options['host']} selama {options['durasi']:g} detik..."
+        )
+        hasil, durasi = loadtest.jalankan_load_test(
+            options['host'], usernames, options['password'], options['durasi'], options['ramp_up'],
+            jeda=(options['jeda_min'], options['jeda_maks']), seed=options['seed'], alur=options['alur'],
+        )
+        if not hasil:
+            raise CommandError("Tidak ada request yang tercatat.")
+        self._tulis_tabel(hasil, durasi)
+        if lama:
+            self._tulis_perbandingan(lama, hasil, durasi)
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({
+                'waktu': timezone.now().isoformat(),
+                'host': options['host'],
+                'alur': options['alur'],
+                'pengguna': len(usernames),
+                'durasi_detik': round(durasi, 1),
+                'url': hasil,
+            }, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Hasil disimpan ke {options['output']}"))
+
+    def _siapkan_pelanggan(self, jumlah, password):
+        ada = set(Pelanggan.objects.filter(username__startswith=loadtest.PREFIX_USERNAME).values_list('username', flat=True))
+        # Satu hash untuk semua akun; hashing per akun hanya memperlambat persiapan
+        hash_password = make_password(password)
+        baru = [
+            Pelanggan(
+                nama_pelanggan=f"Load Test {i}", alamat='Jl. Load Test', tanggal_lahir=date(1990, 1, 1),
+                no_hp='0', username=f"{loadtest.PREFIX_USERNAME}{i}", password=hash_password,
+                email=f"{loadtest.PREFIX_USERNAME}{i}@example.com",
+            )
+            for i in range(jumlah) if f"{loadtest.PREFIX_USERNAME}{i}" not in ada
+        ]
+        Pelanggan.objects.bulk_create(baru)
+        self.stdout.write(f"{len(baru)} akun load test dibuat.")
+
+    def _tulis_tabel(self, hasil, durasi):
+        self.stdout.write(f"{'URL':<24}{'request':>9}{'rps':>8}{'error':>8}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+        total = error = 0
+        for nama, data in hasil.items():
+            latensi = data['latensi_ms']
+            baris = (
+                f"{nama:<24}{data['request']:>9}{data['rps']:>8.1f}{data['rasio_error']:>8.1%}"
+                f"{latensi['p50']:>9.0f}{latensi['p95']:>9.0f}{latensi['p99']:>9.0f}"
+            )
+            self.stdout.write(self.style.WARNING(baris) if data['error'] else baris)
+            if data['contoh_error']:
+                self.stdout.write(f"{'':<24}contoh error: {data['contoh_error']}")
+            total += data['request']
+            error += data['error']
+        self.stdout.write(self.style.SUCCESS(
+            f"Total {total} request dalam {durasi:.1f} detik ({total / durasi:.1f} rps), error {error / total:.1%}"
+        ))
+
+    def _tulis_perbandingan(self, lama, hasil, durasi):
+        self.stdout.write(f"\nDibandingkan dengan {lama.get('host', '-')} ({lama.get('waktu', '-')}):")
+        self.stdout.write(f"{'URL':<24}{'rps lama':>10}{'rps baru':>10}{'p95 lama':>10}{'p95 baru':>10}  (ms)")
+        for nama, data in hasil.items():
+            sebelumnya = lama['url'].get(nama)
+            if sebelumnya is None:
+                continue
+            self.stdout.write(
+                f"{nama:<24}{sebelumnya['rps']:>10.1f}{data['rps']:>10.1f}"
+                f"{sebelumnya['latensi_ms']['p95']:>10.0f}{data['latensi_ms']['p95']:>10.0f}"
+            )
+        total_lama = sum(data['request'] for data in lama['url'].values()) / lama['durasi_detik']
+        total_baru = sum(data['request'] for data in hasil.values()) / durasi
+        self.stdout.write(self.style.SUCCESS(
+            f"Throughput total {total_lama:.1f} -> {total_baru:.1f} rps ({total_baru / total_lama - 1:+.0%})"
+        ))
@@ -0,0 +1,94 @@
+import multiprocessing
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from core.invoices import generate_invoice, invoice_queryset, weasyprint_tersedia
+from core.models import Transaksi, REVENUE_STATUSES
+
+
+def _bulan(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Bulan tidak valid: {value} (format YYYY-MM)")
+
+
+def _init_worker():
+    # Koneksi database hasil fork tidak boleh dipakai bersama proses induk
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _render_chunk(args):
+    """Render satu chunk invoice di proses worker. Mengembalikan [(id, detik, dibuat)]."""
+    ids, force = args
+    hasil = []
+    for transaksi in invoice_queryset().filter(pk__in=ids).order_by('id'):
+        t0 = time.perf_counter()
+        _, dibuat = generate_invoice(transaksi, force=force)
+        hasil.append((transaksi.id, time.perf_counter() - t0, dibuat))
+    return hasil
+
+
+def _persentil(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Render invoice PDF untuk semua transaksi sukses dalam satu bulan secara paralel "
+        "(multiprocessing) dan laporkan waktu render per invoice serta throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bulan', type=_bulan, help='Bulan transaksi (YYYY-MM). Default bulan ini.')
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--chunk-size', type=int, default=50)
+        parser.add_argument('--force', action='store_true', help='Render ulang walau PDF sudah ada (untuk benchmark).')
+
+    def handle(self, *args, **options):
+        if not weasyprint_tersedia():
+            raise CommandError("weasyprint tidak bisa di-import (cek library Pango di sistem).")
+
+        awal = options['bulan'] or timezone.localdate().replace(day=1)
+        akhir = (awal.replace(day=28) + timedelta(days=4)).replace(day=1)
+        ids = list(
+            Transaksi.objects.filter(
+                status_transaksi__in=REVENUE_STATUSES,
+                tanggal__gte=timezone.make_aware(datetime.combine(awal, datetime.min.time())),
+                tanggal__lt=timezone.make_aware(datetime.combine(akhir, datetime.min.time())),
+            ).order_by('id').values_list('id', flat=True)
+        )
+        if not ids:
+            self.stdout.write(f"Tidak ada transaksi sukses pada {awal:%Y-%m}.")
+            return
+
+        chunk_size = options['chunk_size']
+        chunks = [(ids[i:i + chunk_size], options['force']) for i in range(0, len(ids), chunk_size)]
+        processes = max(1, min(options['processes'], len(chunks)))
+        self.stdout.write(f"Render {len(ids)} invoice {awal:%Y-%m} dengan {processes} proses...")
+
+        # Tutup koneksi sebelum fork agar tiap worker membuka koneksinya sendiri
+        connections.close_all()
+        t0 = time.perf_counter()
+        with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+            hasil = [row for chunk in pool.imap_unordered(_render_chunk, chunks) for row in chunk]
+        wall = time.perf_counter() - t0
+
+        durasi = [detik for _, detik, dibuat in hasil if dibuat]
+        dibuat = len(durasi)
+        self.stdout.write(f"Selesai dalam {wall:.2f} detik: {dibuat} dibuat, {len(hasil) - dibuat} sudah ada di storage.")
+        self.stdout.write(f"Throughput : {len(hasil) / wall:.1f} invoice/detik")
+        if durasi:
+            self.stdout.write(
+                f"Render/PDF : p50 {statistics.median(durasi) * 1000:.0f} ms, "
+                f"p95 {_persentil(durasi, 95) * 1000:.0f} ms, maks {max(durasi) * 1000:.0f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS("Selesai."))
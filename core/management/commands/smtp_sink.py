@@ -0,0 +1,98 @@
+import asyncio
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+
+class SMTPSink:
+    """
+    Server SMTP minimal untuk load test: menerima semua email (AUTH apa pun
+    diterima) tanpa meneruskannya. Tidak mendukung STARTTLS, jadi server yang
+    dites harus memakai EMAIL_USE_TLS=0.
+    """
+
+    def __init__(self, simpan_ke=None):
+        self.simpan_ke = Path(simpan_ke) if simpan_ke else None
+        self.jumlah = 0
+        self.penerima = 0
+        self.koneksi = 0
+
+    async def tangani(self, reader, writer):
+        self.koneksi += 1
+        penerima = 0
+
+        async def balas(baris):
+            writer.write(baris.encode() + b'\r\n')
+            await writer.drain()
+
+        await balas('220 barokah smtp_sink')
+        try:
+            while line := await reader.readline():
+                perintah = line.decode('utf-8', 'replace').strip().split(' ', 1)[0].upper()
+                if perintah == 'EHLO':
+                    await balas('250-smtp_sink\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SMTPUTF8')
+                elif perintah == 'AUTH':
+                    await balas('235 2.7.0 Authentication successful')
+                elif perintah == 'RCPT':
+                    penerima += 1
+                    await balas('250 OK')
+                elif perintah == 'DATA':
+                    await balas('354 End data with <CR><LF>.<CR><LF>')
+                    data = await reader.readuntil(b'\r\n.\r\n')
+                    self.jumlah += 1
+                    self.penerima += penerima
+                    penerima = 0
+                    if self.simpan_ke:
+                        (self.simpan_ke / f"{time.time_ns()}-{self.jumlah}.eml").write_bytes(data[:-5])
+                    await balas('250 OK')
+                elif perintah == 'QUIT':
+                    await balas('221 Bye')
+                    break
+                else:
+                    # HELO, MAIL, RSET, NOOP, dll.
+                    if perintah in ('MAIL', 'RSET'):
+                        penerima = 0
+                    await balas('250 OK')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "SMTP sink lokal untuk load test: menerima dan menghitung email tanpa mengirimkannya. "
+        "Jalankan server dengan EMAIL_HOST=127.0.0.1 EMAIL_PORT=<port> EMAIL_USE_TLS=0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--simpan-ke', help='Direktori untuk menyimpan email sebagai .eml (default: tidak disimpan)')
+        parser.add_argument('--interval', type=float, default=10.0, help='Jeda laporan jumlah email (detik)')
+
+    def handle(self, *args, **options):
+        if options['simpan_ke']:
+            Path(options['simpan_ke']).mkdir(parents=True, exist_ok=True)
+        sink = SMTPSink(options['simpan_ke'])
+        try:
+            asyncio.run(self.serve(sink, options))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f"Total {sink.jumlah} email ({sink.penerima} penerima) dari {sink.koneksi} koneksi."
+        ))
+
+    async def serve(self, sink, options):
+        server = await asyncio.start_server(sink.tangani, options['host'], options['port'])
+        self.stdout.write(f"smtp_sink mendengarkan di {options['host']}:{options['port']}")
+        async with server:
+            sebelumnya, t0 = 0, time.perf_counter()
+            while True:
+                await asyncio.sleep(options['interval'])
+                t1 = time.perf_counter()
+                self.stdout.write(
+                    f"{sink.jumlah} email ({(sink.jumlah - sebelumnya) / (t1 - t0):.1f}/detik), {sink.koneksi} koneksi"
+                )
+                sebelumnya, t0 = sink.jumlah, t1
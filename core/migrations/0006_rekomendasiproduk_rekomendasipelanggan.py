@@ -0,0 +1,68 @@
+# Generated by Django 4.2 on 2026-10-19 08:19
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_produk_last_restock_trigger_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='detailtransaksi',
+            name='jumlah_produk',
+            field=models.IntegerField(default=1, verbose_name='Jumlah Produk'),
+        ),
+        migrations.AlterField(
+            model_name='detailtransaksi',
+            name='sub_total',
+            field=models.DecimalField(blank=True, decimal_places=2, default=Decimal('0.00'), max_digits=10, null=True, verbose_name='Sub Total'),
+        ),
+        migrations.AlterField(
+            model_name='transaksi',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Total Keseluruhan'),
+        ),
+        migrations.CreateModel(
+            name='RekomendasiProduk',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('skor', models.IntegerField(default=0, verbose_name='Jumlah Transaksi Bersama')),
+                ('peringkat', models.PositiveSmallIntegerField(verbose_name='Peringkat')),
+                ('idProduk', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rekomendasi', to='core.produk', verbose_name='Produk')),
+                ('produk_terkait', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.produk', verbose_name='Produk Terkait')),
+            ],
+            options={
+                'verbose_name_plural': 'Rekomendasi Produk',
+                'db_table': 'rekomendasi_produk',
+                'ordering': ['idProduk', 'peringkat'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RekomendasiPelanggan',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('skor', models.IntegerField(default=0, verbose_name='Skor')),
+                ('peringkat', models.PositiveSmallIntegerField(verbose_name='Peringkat')),
+                ('idPelanggan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rekomendasi', to='core.pelanggan', verbose_name='Pelanggan')),
+                ('idProduk', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.produk', verbose_name='Produk')),
+            ],
+            options={
+                'verbose_name_plural': 'Rekomendasi Pelanggan',
+                'db_table': 'rekomendasi_pelanggan',
+                'ordering': ['idPelanggan', 'peringkat'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='rekomendasiproduk',
+            index=models.Index(fields=['idProduk', 'peringkat'], name='rekomendasi_idProdu_eca880_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rekomendasipelanggan',
+            index=models.Index(fields=['idPelanggan', 'peringkat'], name='rekomendasi_idPelan_e8384b_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2 on 2026-10-19 08:20
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_rekomendasiproduk_rekomendasipelanggan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProsesSegmentasi',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('mode', models.CharField(choices=[('FULL', 'Penuh'), ('INKREMENTAL', 'Inkremental')], max_length=20, verbose_name='Mode')),
+                ('dimulai_pada', models.DateTimeField(verbose_name='Dimulai Pada')),
+                ('selesai_pada', models.DateTimeField(blank=True, null=True, verbose_name='Selesai Pada')),
+                ('jumlah_pelanggan', models.IntegerField(default=0, verbose_name='Jumlah Pelanggan Diproses')),
+                ('batas_kuintil', models.JSONField(default=dict, verbose_name='Batas Kuintil')),
+            ],
+            options={
+                'verbose_name_plural': 'Proses Segmentasi',
+                'db_table': 'proses_segmentasi',
+                'get_latest_by': 'dimulai_pada',
+            },
+        ),
+        migrations.CreateModel(
+            name='SegmenPelanggan',
+            fields=[
+                ('idPelanggan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='segmen_rfm', serialize=False, to='core.pelanggan', verbose_name='Pelanggan')),
+                ('transaksi_terakhir', models.DateTimeField(blank=True, null=True, verbose_name='Transaksi Terakhir')),
+                ('recency_hari', models.IntegerField(blank=True, null=True, verbose_name='Recency (Hari)')),
+                ('frequency', models.IntegerField(default=0, verbose_name='Frequency')),
+                ('monetary', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Monetary')),
+                ('r_score', models.PositiveSmallIntegerField(default=0, verbose_name='Skor R')),
+                ('f_score', models.PositiveSmallIntegerField(default=0, verbose_name='Skor F')),
+                ('m_score', models.PositiveSmallIntegerField(default=0, verbose_name='Skor M')),
+                ('segmen', models.CharField(choices=[('CHAMPIONS', 'Champions'), ('LOYAL', 'Pelanggan Loyal'), ('POTENSIAL', 'Potensial'), ('BARU', 'Pelanggan Baru'), ('BERISIKO', 'Berisiko'), ('HIBERNASI', 'Hibernasi'), ('HILANG', 'Hilang'), ('BELUM_BELANJA', 'Belum Belanja')], db_index=True, max_length=20, verbose_name='Segmen')),
+                ('diperbarui_pada', models.DateTimeField(verbose_name='Diperbarui Pada')),
+            ],
+            options={
+                'verbose_name_plural': 'Segmen Pelanggan',
+                'db_table': 'segmen_pelanggan',
+            },
+        ),
+        migrations.AddField(
+            model_name='transaksi',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Terakhir Diperbarui'),
+        ),
+    ]
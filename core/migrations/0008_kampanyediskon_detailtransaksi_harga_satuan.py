@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-19 08:22
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_segmenpelanggan_prosessegmentasi_transaksi_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KampanyeDiskon',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('nama', models.CharField(max_length=255, verbose_name='Nama Kampanye')),
+                ('segmen', models.CharField(choices=[('SEMUA', 'Semua Pelanggan'), ('CHAMPIONS', 'Champions'), ('LOYAL', 'Pelanggan Loyal'), ('POTENSIAL', 'Potensial'), ('BARU', 'Pelanggan Baru'), ('BERISIKO', 'Berisiko'), ('HIBERNASI', 'Hibernasi'), ('HILANG', 'Hilang'), ('BELUM_BELANJA', 'Belum Belanja')], default='SEMUA', max_length=20, verbose_name='Segmen RFM')),
+                ('min_total_belanja', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Minimal Total Riwayat Belanja')),
+                ('persen_diskon', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)], verbose_name='Persen Diskon')),
+                ('pesan', models.TextField(blank=True, null=True, verbose_name='Pesan')),
+                ('berlaku_sampai', models.DateTimeField(blank=True, null=True, verbose_name='Berlaku Sampai')),
+                ('status', models.CharField(choices=[('DRAFT', 'Draft'), ('AKTIF', 'Aktif'), ('BERAKHIR', 'Berakhir')], default='DRAFT', max_length=20, verbose_name='Status')),
+                ('jumlah_penerima', models.IntegerField(default=0, verbose_name='Jumlah Penerima')),
+                ('tanggal_dibuat', models.DateTimeField(auto_now_add=True, verbose_name='Tanggal Dibuat')),
+            ],
+            options={
+                'verbose_name_plural': 'Kampanye Diskon',
+                'db_table': 'kampanye_diskon',
+            },
+        ),
+        migrations.AddField(
+            model_name='detailtransaksi',
+            name='harga_satuan',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Harga Satuan'),
+        ),
+        migrations.AddIndex(
+            model_name='diskonpelanggan',
+            index=models.Index(fields=['idPelanggan', 'status'], name='diskon_pela_idPelan_16dc1e_idx'),
+        ),
+        migrations.AddField(
+            model_name='kampanyediskon',
+            name='idProduk',
+            field=models.ForeignKey(blank=True, help_text='Kosongkan agar diskon berlaku untuk semua produk.', null=True, on_delete=django.db.models.deletion.CASCADE, to='core.produk', verbose_name='Produk'),
+        ),
+        migrations.AddField(
+            model_name='diskonpelanggan',
+            name='kampanye',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='diskon', to='core.kampanyediskon', verbose_name='Kampanye'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_kampanyediskon_detailtransaksi_harga_satuan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['idPelanggan', '-tanggal', '-id'], name='transaksi_riwayat_idx'),
+        ),
+    ]
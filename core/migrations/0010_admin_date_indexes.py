@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-19 08:34
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_transaksi_riwayat_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notifikasi',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Waktu Dibuat'),
+        ),
+        migrations.AlterField(
+            model_name='transaksi',
+            name='tanggal',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Tanggal Transaksi'),
+        ),
+    ]
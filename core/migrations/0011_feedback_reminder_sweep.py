@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 08:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def tandai_pesanan_selesai_lama(apps, schema_editor):
+    # Pesanan SELESAI sebelum migrasi ini sudah punya task pengingat ber-ETA di broker
+    # (atau sudah diingatkan); tandai agar sweep baru tidak mengirim ulang.
+    Transaksi = apps.get_model('core', 'Transaksi')
+    Transaksi.objects.filter(status_transaksi='SELESAI').update(
+        is_feedback_reminder_sent=True, selesai_at=F('updated_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaksi',
+            name='is_feedback_reminder_sent',
+            field=models.BooleanField(default=False, verbose_name='Pengingat Feedback Terkirim'),
+        ),
+        migrations.AddField(
+            model_name='transaksi',
+            name='selesai_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Waktu Selesai'),
+        ),
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['status_transaksi', 'is_feedback_reminder_sent', 'selesai_at'], name='transaksi_feedback_idx'),
+        ),
+        migrations.RunPython(tandai_pesanan_selesai_lama, migrations.RunPython.noop),
+    ]
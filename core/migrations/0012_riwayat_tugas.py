@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-19 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_feedback_reminder_sweep'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KunciTugas',
+            fields=[
+                ('nama', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='Nama Tugas')),
+                ('pemilik', models.CharField(max_length=64, verbose_name='Token Pemilik')),
+                ('kedaluwarsa', models.DateTimeField(verbose_name='Kedaluwarsa')),
+            ],
+            options={
+                'verbose_name_plural': 'Kunci Tugas',
+                'db_table': 'kunci_tugas',
+            },
+        ),
+        migrations.CreateModel(
+            name='RiwayatTugas',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('nama_tugas', models.CharField(max_length=200, verbose_name='Nama Tugas')),
+                ('jendela', models.DateTimeField(verbose_name='Awal Jendela')),
+                ('status', models.CharField(choices=[('BERJALAN', 'Berjalan'), ('SUKSES', 'Sukses'), ('GAGAL', 'Gagal')], max_length=20, verbose_name='Status')),
+                ('dimulai_pada', models.DateTimeField(verbose_name='Dimulai Pada')),
+                ('selesai_pada', models.DateTimeField(blank=True, null=True, verbose_name='Selesai Pada')),
+                ('durasi_ms', models.IntegerField(blank=True, null=True, verbose_name='Durasi (ms)')),
+                ('jumlah_baris', models.IntegerField(blank=True, null=True, verbose_name='Baris Diproses')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+            ],
+            options={
+                'verbose_name_plural': 'Riwayat Tugas',
+                'db_table': 'riwayat_tugas',
+                'get_latest_by': 'dimulai_pada',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='riwayattugas',
+            index=models.Index(fields=['dimulai_pada'], name='riwayat_tugas_dimulai_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='riwayattugas',
+            constraint=models.UniqueConstraint(fields=('nama_tugas', 'jendela'), name='riwayat_tugas_unik_jendela'),
+        ),
+    ]
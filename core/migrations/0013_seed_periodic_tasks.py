@@ -0,0 +1,67 @@
+# Generated by Django 4.2 on 2026-10-19 08:43
+
+import json
+
+from django.db import IntegrityError, migrations, transaction
+
+# Salinan beku CELERY_BEAT_SCHEDULE saat migration ini dibuat. Jangan diganti
+# dengan import dari settings/core.beat: entri yang ditambahkan kemudian dibuat
+# oleh LeaderDatabaseScheduler saat beat start (atau migration baru).
+ZONA_WAKTU = 'Asia/Makassar'
+# nama: (task, args, crontab (minute, hour) atau interval dalam detik)
+JADWAL_AWAL = {
+    'check-payment-deadlines-every-5-minutes': ('core.tasks.check_payment_deadlines', [], 300),
+    'send-daily-birthday-greetings': ('core.tasks.send_birthday_greetings', [], ('0', '8')),
+    'disable-expired-birthday-discounts': ('core.tasks.disable_birthday_discounts', [], ('0', '*')),
+    'check-and-send-payment-reminder-every-hour': ('core.tasks.check_and_send_payment_reminder', [], ('0', '*')),
+    'check-for-low-stock-daily-9am': ('core.tasks.check_for_low_stock', [], ('0', '9')),
+    'rebuild-product-recommendations-nightly': ('core.tasks.rebuild_product_recommendations', [], ('0', '2')),
+    'refresh-rfm-segments-full-nightly': ('core.tasks.refresh_rfm_segments', [True], ('30', '1')),
+    'refresh-rfm-segments-hourly': ('core.tasks.refresh_rfm_segments', [], ('30', '*')),
+    'expire-discount-campaigns-hourly': ('core.tasks.expire_discount_campaigns', [], ('5', '*')),
+    'sweep-feedback-reminders-hourly': ('core.tasks.sweep_feedback_reminders', [], ('15', '*')),
+    'prune-task-runs-daily': ('core.tasks.prune_task_runs', [], ('0', '3')),
+    'prune-query-profiles-daily': ('core.tasks.prune_query_profiles', [], ('30', '3')),
+    'prune-exports-daily': ('core.tasks.prune_exports', [], ('45', '3')),
+}
+
+
+def isi_jadwal_beat(apps, schema_editor):
+    # Entri yang sudah ada (mis. diubah lewat admin) tidak disentuh
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    CrontabSchedule = apps.get_model('django_celery_beat', 'CrontabSchedule')
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+
+    sudah_ada = set(PeriodicTask.objects.filter(name__in=list(JADWAL_AWAL)).values_list('name', flat=True))
+    for nama, (task, args, jadwal) in JADWAL_AWAL.items():
+        if nama in sudah_ada:
+            continue
+        if isinstance(jadwal, tuple):
+            minute, hour = jadwal
+            fields = {
+                'minute': minute, 'hour': hour, 'day_of_week': '*', 'day_of_month': '*',
+                'month_of_year': '*', 'timezone': ZONA_WAKTU,
+            }
+            field = 'crontab'
+            instance = CrontabSchedule.objects.filter(**fields).first() or CrontabSchedule.objects.create(**fields)
+        else:
+            fields = {'every': jadwal, 'period': 'seconds'}
+            field = 'interval'
+            instance = IntervalSchedule.objects.filter(**fields).first() or IntervalSchedule.objects.create(**fields)
+        try:
+            with transaction.atomic():
+                PeriodicTask.objects.create(name=nama, task=task, args=json.dumps(args), kwargs='{}', **{field: instance})
+        except IntegrityError:
+            continue
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_riwayat_tugas'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(isi_jadwal_beat, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 09:02
+
+from django.db import migrations
+
+# Nama jadwal yang dibuat 0013 (dibekukan, bukan dibaca dari settings)
+JADWAL_AWAL = [
+    'check-payment-deadlines-every-5-minutes',
+    'send-daily-birthday-greetings',
+    'disable-expired-birthday-discounts',
+    'check-and-send-payment-reminder-every-hour',
+    'check-for-low-stock-daily-9am',
+    'rebuild-product-recommendations-nightly',
+    'refresh-rfm-segments-full-nightly',
+    'refresh-rfm-segments-hourly',
+    'expire-discount-campaigns-hourly',
+    'sweep-feedback-reminders-hourly',
+    'prune-task-runs-daily',
+    'prune-query-profiles-daily',
+    'prune-exports-daily',
+]
+
+
+def hapus_queue_default(apps, schema_editor):
+    # Jadwal awal dibuat dengan queue='celery' eksplisit, yang menimpa CELERY_TASK_ROUTES.
+    # Kosongkan agar tugas beat mengikuti routing (critical/email/batch).
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(name__in=JADWAL_AWAL, queue='celery').update(queue=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_seed_periodic_tasks'),
+    ]
+
+    operations = [
+        migrations.RunPython(hapus_queue_default, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_beat_routing_queues'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailGagal',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('subject', models.CharField(max_length=255, verbose_name='Subjek')),
+                ('message', models.TextField(verbose_name='Pesan')),
+                ('recipient_list', models.JSONField(default=list, verbose_name='Penerima')),
+                ('link_url', models.CharField(blank=True, default='', max_length=500, verbose_name='Link')),
+                ('link_text', models.CharField(default='Lihat Detail', max_length=100, verbose_name='Teks Link')),
+                ('jenis_error', models.CharField(choices=[('PERMANEN', 'Permanen'), ('SEMENTARA', 'Sementara (retry habis)')], max_length=20, verbose_name='Jenis Error')),
+                ('error', models.TextField(verbose_name='Error')),
+                ('jumlah_percobaan', models.IntegerField(default=1, verbose_name='Jumlah Percobaan')),
+                ('status', models.CharField(choices=[('GAGAL', 'Gagal'), ('DIKIRIM_ULANG', 'Dikirim Ulang')], default='GAGAL', max_length=20, verbose_name='Status')),
+                ('dibuat_pada', models.DateTimeField(auto_now_add=True, verbose_name='Dibuat Pada')),
+                ('dikirim_ulang_pada', models.DateTimeField(blank=True, null=True, verbose_name='Dikirim Ulang Pada')),
+            ],
+            options={
+                'verbose_name_plural': 'Email Gagal',
+                'db_table': 'email_gagal',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='emailgagal',
+            index=models.Index(fields=['status', 'dibuat_pada'], name='email_gagal_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_email_gagal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailgagal',
+            name='html_message',
+            field=models.TextField(blank=True, default='', verbose_name='Pesan HTML'),
+        ),
+    ]
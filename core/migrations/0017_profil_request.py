@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_email_gagal_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilRequest',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('endpoint', models.CharField(max_length=200, verbose_name='Endpoint')),
+                ('metode', models.CharField(max_length=10, verbose_name='Metode')),
+                ('path', models.CharField(max_length=500, verbose_name='Path')),
+                ('status_code', models.IntegerField(verbose_name='Status')),
+                ('durasi_ms', models.FloatField(verbose_name='Durasi (ms)')),
+                ('jumlah_query', models.IntegerField(verbose_name='Jumlah Query')),
+                ('durasi_db_ms', models.FloatField(verbose_name='Waktu DB (ms)')),
+                ('query_duplikat', models.IntegerField(verbose_name='Query Duplikat')),
+                ('durasi_template_ms', models.FloatField(verbose_name='Render Template (ms)')),
+                ('duplikat_teratas', models.TextField(blank=True, default='', verbose_name='Query Duplikat Teratas')),
+                ('dibuat_pada', models.DateTimeField(auto_now_add=True, verbose_name='Dibuat Pada')),
+            ],
+            options={
+                'verbose_name_plural': 'Profil Request',
+                'db_table': 'profil_request',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='profilrequest',
+            index=models.Index(fields=['dibuat_pada', 'endpoint'], name='profil_request_waktu_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 09:45
+
+from django.db import migrations
+
+
+def perbaiki_status_checkout(apps, schema_editor):
+    # Checkout dulu menulis 'MENUNGGU_VERIFIKASI_PEMBAYARAN' yang tidak ada di pilihan status,
+    # sehingga pesanan itu tidak bisa diubah lewat aksi admin dan tidak pernah diingatkan.
+    Transaksi = apps.get_model('core', 'Transaksi')
+    lama = Transaksi.objects.filter(status_transaksi='MENUNGGU_VERIFIKASI_PEMBAYARAN')
+    lama.exclude(bukti_bayar='').exclude(bukti_bayar__isnull=True).update(status_transaksi='MENUNGGU VERIFIKASI')
+    lama.update(status_transaksi='DIPROSES')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_profil_request'),
+    ]
+
+    operations = [
+        migrations.RunPython(perbaiki_status_checkout, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models import Sum, F
 from django.utils import timezone 
 from django.contrib.auth.hashers import make_password, check_password, identify_hasher
@@ -148,10 +149,15 @@ STATUS_TRANSAKSI_CHOICES = [
     ('DIBATALKAN', 'Dibatalkan'),
 ]
 
+# Status yang dihitung sebagai pembelian sukses (revenue)
+REVENUE_STATUSES = ['DIBAYAR', 'DIKIRIM', 'SELESAI']
+# Status yang tidak lagi membutuhkan pengingat pembayaran
+STATUS_TANPA_PENGINGAT_BAYAR = ['DIBAYAR', 'DIBATALKAN', 'SELESAI']
+
 # --- Model Transaksi (Dengan Logika Notifikasi Perubahan Status) ---
 class Transaksi(models.Model):
     id = models.AutoField(primary_key=True)
-    tanggal = models.DateTimeField(default=timezone.now, verbose_name="Tanggal Transaksi") 
+    tanggal = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Tanggal Transaksi") 
     total = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Total Keseluruhan", default=Decimal('0.00')) # Ditingkatkan max_digits dan default
     ongkir = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Ongkos Kirim", default=Decimal('0.00')) # Default Decimal
     status_transaksi = models.CharField(
@@ -169,6 +175,11 @@ class Transaksi(models.Model):
     waktu_checkout = models.DateTimeField(default=timezone.now)
     batas_waktu_bayar = models.DateTimeField(null=True, blank=True)
     is_payment_reminder_sent = models.BooleanField(default=False, verbose_name="Pengingat Pra-Jatuh Tempo Terkirim")
+    # Diisi saat status berubah menjadi SELESAI; dipakai sweep pengingat feedback (tasks.sweep_feedback_reminders)
+    selesai_at = models.DateTimeField(null=True, blank=True, verbose_name="Waktu Selesai")
+    is_feedback_reminder_sent = models.BooleanField(default=False, verbose_name="Pengingat Feedback Terkirim")
+    # Dipakai refresh segmentasi RFM inkremental untuk mendeteksi pesanan yang berubah
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Terakhir Diperbarui")
     
     # 🚨 TAMBAHAN UNTUK NOTIFIKASI PERUBAHAN STATUS
     _original_status = None 
@@ -184,10 +195,11 @@ class Transaksi(models.Model):
         
         # Perbarui flag pengingat pembayaran
         if status_changed:
-            if self.status_transaksi in ['DIBAYAR', 'DIBATALKAN', 'SELESAI']:
-                self.is_payment_reminder_sent = True
-            else:
-                self.is_payment_reminder_sent = False
+            self.is_payment_reminder_sent = self.status_transaksi in STATUS_TANPA_PENGINGAT_BAYAR
+            if self.status_transaksi == 'SELESAI':
+                self.selesai_at = timezone.now()
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'selesai_at'}
 
         # 1. Simpan objek terlebih dahulu
         super().save(*args, **kwargs)
@@ -195,41 +207,47 @@ class Transaksi(models.Model):
         # 2. Jika status berubah, kirim notifikasi (LOGIC CELERY TIDAK DIGANGGU)
         if status_changed and self.idPelanggan.email:
             # Import tugas Celery di sini untuk mencegah Circular Import
-            from .tasks import send_notification_email 
+            from django.urls import reverse
+            from . import notifications
             
-            subject = f"📣 Perubahan Status Pesanan #{self.id} (Barokah Beton)"
-            message = (
-                f"Hai {self.idPelanggan.nama_pelanggan},\n\n"
-                f"Status pesanan Anda dengan nomor **#{self.id}** telah diperbarui oleh Admin.\n\n"
-                f"Status Lama: {self._original_status}\n"
-                f"Status Baru: **{self.status_transaksi}**\n\n"
-                f"Silakan cek detail pesanan Anda di website."
+            email = notifications.render(
+                'perubahan_status', nama=self.idPelanggan.nama_pelanggan, transaksi_id=self.id,
+                status_lama=self._original_status, status_baru=self.status_transaksi,
+                link_url=reverse('core:order_detail', args=[self.id]),
             )
             
             # Kirim notifikasi menggunakan Celery (asynchronous)
-            send_notification_email.delay(subject, message, [self.idPelanggan.email])
+            notifications.kirim(email, [self.idPelanggan.email])
 
         # 3. Update status lama untuk panggilan save() berikutnya (penting)
         self._original_status = self.status_transaksi
     
     def calculate_total(self):
         """Menghitung dan memperbarui Transaksi.total (Sub Total Detail + Ongkir)"""
-        # Hitung Sub Total dari semua Detail Transaksi
+        # Hitung Sub Total dari semua Detail Transaksi (satu aggregate di database)
         sub_total_result = self.detailtransaksi_set.aggregate(sum_sub_total=Sum('sub_total'))
         sub_total = sub_total_result['sum_sub_total'] or Decimal('0.00')
         
         # Hitung Total Keseluruhan (Sub Total + Ongkir)
         new_total = sub_total + (self.ongkir or Decimal('0.00'))
 
-        # Perbarui field total jika ada perubahan
+        # Perbarui field total jika ada perubahan. Memakai UPDATE langsung (bukan save())
+        # agar signal post_save Transaksi (notifikasi status) tidak terpicu ulang hanya karena total berubah.
         if self.total != new_total:
             self.total = new_total
-            self.save(update_fields=['total'])
+            self.updated_at = timezone.now()
+            Transaksi.objects.filter(pk=self.pk).update(total=new_total, updated_at=self.updated_at)
 
 
     class Meta:
         verbose_name_plural = "Transaksi"
         db_table = 'transaksi'
+        indexes = [
+            # Riwayat pesanan pelanggan dengan keyset pagination (tanggal, id)
+            models.Index(fields=['idPelanggan', '-tanggal', '-id'], name='transaksi_riwayat_idx'),
+            # Sweep pengingat feedback: SELESAI, belum diingatkan, selesai_at sudah lewat 72 jam
+            models.Index(fields=['status_transaksi', 'is_feedback_reminder_sent', 'selesai_at'], name='transaksi_feedback_idx'),
+        ]
 
     def __str__(self):
         pelanggan_nama = getattr(self.idPelanggan, 'nama_pelanggan', 'Pelanggan')
@@ -241,6 +259,8 @@ class DetailTransaksi(models.Model):
     idTransaksi = models.ForeignKey(Transaksi, on_delete=models.CASCADE, verbose_name="Transaksi")
     idProduk = models.ForeignKey(Produk, on_delete=models.CASCADE, verbose_name="Produk")
     jumlah_produk = models.IntegerField(verbose_name="Jumlah Produk", default=1)
+    # Harga satuan setelah diskon saat checkout; kosong = pakai harga_produk saat ini
+    harga_satuan = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Harga Satuan", null=True, blank=True)
     # Default Decimal ditambahkan
     sub_total = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Sub Total", default=Decimal('0.00'), blank=True, null=True)
 
@@ -261,8 +281,8 @@ def calculate_sub_total(sender, instance, **kwargs):
     if instance.idProduk and instance.jumlah_produk is not None:
         # Pastikan idProduk sudah dimuat untuk mendapatkan harga
         try:
-            # Menggunakan harga_produk dari Produk terkait
-            harga = instance.idProduk.harga_produk
+            # Harga satuan hasil diskon (jika ada) diutamakan, selain itu harga_produk dari Produk terkait
+            harga = instance.harga_satuan if instance.harga_satuan is not None else instance.idProduk.harga_produk
             instance.sub_total = harga * instance.jumlah_produk
         except Produk.DoesNotExist:
             # Handle case where related Produk is not found (shouldn't happen with FK)
@@ -280,6 +300,9 @@ def update_transaction_total_on_detail_change(sender, instance, **kwargs):
 @receiver(post_delete, sender=DetailTransaksi)
 def update_transaction_total_on_detail_delete(sender, instance, **kwargs):
     """Perbarui total Transaksi setelah DetailTransaksi dihapus (post_delete)"""
+    # Hapus massal dari admin (TransaksiAdmin.save_formset) menghitung total sekali di akhir
+    if getattr(instance, '_tanpa_hitung_total', False):
+        return
     if instance.idTransaksi:
         # Transaksi mungkin sudah terhapus, jadi cek keberadaan
         try:
@@ -287,29 +310,6 @@ def update_transaction_total_on_detail_delete(sender, instance, **kwargs):
         except Transaksi.DoesNotExist:
             pass
 
-@receiver(pre_save, sender=Transaksi)
-def update_total_on_ongkir_change(sender, instance, **kwargs):
-    """Hitung ulang total jika Transaksi.ongkir berubah (pre_save)"""
-    # Hanya jalankan jika instance sudah memiliki primary key (bukan object baru)
-    if instance.pk:
-        # Load nilai lama dari database untuk perbandingan
-        try:
-            old_instance = Transaksi.objects.get(pk=instance.pk)
-            # Cek jika ongkir atau status_transaksi berubah (status change trigger save, yang memanggil calculate_total)
-            if old_instance.ongkir != instance.ongkir:
-                # Karena ini pre_save, kita tidak bisa memanggil calculate_total() yang melakukan save().
-                # calculate_total akan dipanggil di post_save dari DetailTransaksi, atau 
-                # kita biarkan Transaksi.save() di admin.py/form save yang akan memicu ini.
-                # Untuk kasus perubahan Ongkir saja, kita akan membiarkan Trannsaksi.calculate_total() 
-                # dipanggil secara terpisah. Disini kita hanya perlu memastikan totalnya diperbarui.
-
-                # Kita akan memanggil calculate_total pada post_save Transaksi. 
-                # Namun untuk admin, karena kita menghapus save_formset, 
-                # kita perlu memastikan calculate_total dipanggil saat save Transaksi di admin.
-                pass 
-        except Transaksi.DoesNotExist:
-            pass
-
 @receiver(post_save, sender=Transaksi)
 def call_calculate_total_on_transaksi_save(sender, instance, **kwargs):
     """Pastikan total diperbarui saat Transaksi (termasuk ongkir) disimpan"""
@@ -318,12 +318,61 @@ def call_calculate_total_on_transaksi_save(sender, instance, **kwargs):
     instance.calculate_total()
 
 
-# --- Model DiskonPelanggan (Tidak Berubah) ---
+# --- Pilihan segmen RFM (dipakai SegmenPelanggan dan KampanyeDiskon) ---
+SEGMEN_RFM_CHOICES = [
+    ('CHAMPIONS', 'Champions'),
+    ('LOYAL', 'Pelanggan Loyal'),
+    ('POTENSIAL', 'Potensial'),
+    ('BARU', 'Pelanggan Baru'),
+    ('BERISIKO', 'Berisiko'),
+    ('HIBERNASI', 'Hibernasi'),
+    ('HILANG', 'Hilang'),
+    ('BELUM_BELANJA', 'Belum Belanja'),
+]
+
+# --- Model KampanyeDiskon & DiskonPelanggan ---
 STATUS_DISKON_CHOICES = [
     ('aktif', 'Aktif'),
     ('tidak_aktif', 'Tidak Aktif'),
 ]
 
+class KampanyeDiskon(models.Model):
+    """Kampanye diskon tertarget: satu persentase untuk semua pelanggan dalam satu segmen."""
+    STATUS_CHOICES = [
+        ('DRAFT', 'Draft'),
+        ('AKTIF', 'Aktif'),
+        ('BERAKHIR', 'Berakhir'),
+    ]
+    SEGMEN_CHOICES = [('SEMUA', 'Semua Pelanggan')] + SEGMEN_RFM_CHOICES
+
+    id = models.AutoField(primary_key=True)
+    nama = models.CharField(max_length=255, verbose_name="Nama Kampanye")
+    segmen = models.CharField(max_length=20, choices=SEGMEN_CHOICES, default='SEMUA', verbose_name="Segmen RFM")
+    min_total_belanja = models.DecimalField(
+        max_digits=15, decimal_places=2, default=Decimal('0.00'),
+        verbose_name="Minimal Total Riwayat Belanja"
+    )
+    idProduk = models.ForeignKey(
+        Produk, on_delete=models.CASCADE, null=True, blank=True,
+        verbose_name="Produk", help_text="Kosongkan agar diskon berlaku untuk semua produk."
+    )
+    persen_diskon = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(100)], verbose_name="Persen Diskon"
+    )
+    pesan = models.TextField(verbose_name="Pesan", null=True, blank=True)
+    berlaku_sampai = models.DateTimeField(null=True, blank=True, verbose_name="Berlaku Sampai")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT', verbose_name="Status")
+    jumlah_penerima = models.IntegerField(default=0, verbose_name="Jumlah Penerima")
+    tanggal_dibuat = models.DateTimeField(auto_now_add=True, verbose_name="Tanggal Dibuat")
+
+    class Meta:
+        verbose_name_plural = "Kampanye Diskon"
+        db_table = 'kampanye_diskon'
+
+    def __str__(self):
+        return f"{self.nama} ({self.persen_diskon}%)"
+
+
 class DiskonPelanggan(models.Model):
     id = models.AutoField(primary_key=True)
     idPelanggan = models.ForeignKey(Pelanggan, on_delete=models.CASCADE, verbose_name="Pelanggan")
@@ -337,10 +386,15 @@ class DiskonPelanggan(models.Model):
     )
     pesan = models.TextField(verbose_name="Pesan", null=True, blank=True)
     tanggal_dibuat = models.DateTimeField(auto_now_add=True, verbose_name="Tanggal Dibuat")
+    kampanye = models.ForeignKey(
+        KampanyeDiskon, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='diskon', verbose_name="Kampanye"
+    )
 
     class Meta:
         verbose_name_plural = "Diskon Pelanggan"
         db_table = 'diskon_pelanggan'
+        indexes = [models.Index(fields=['idPelanggan', 'status'])]
 
     def __str__(self):
         pelanggan_nama = getattr(self.idPelanggan, 'nama_pelanggan', 'Pelanggan')
@@ -353,7 +407,7 @@ class Notifikasi(models.Model):
     tipe_pesan = models.CharField(max_length=50, verbose_name="Tipe Pesan")
     isi_pesan = models.TextField(verbose_name="Isi Pesan")
     is_read = models.BooleanField(default=False, verbose_name="Sudah Dibaca")
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Waktu Dibuat")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Waktu Dibuat")
 
     class Meta:
         verbose_name_plural = "Notifikasi"
@@ -361,4 +415,185 @@ class Notifikasi(models.Model):
     
     def __str__(self):
         pelanggan_nama = getattr(self.idPelanggan, 'nama_pelanggan', 'Pelanggan')
-        return f"Notifikasi untuk {pelanggan_nama}"
\ No newline at end of file
+        return f"Notifikasi untuk {pelanggan_nama}"
+
+# --- Model Rekomendasi (Diisi oleh job Celery malam, lihat core/recommendations.py) ---
+class RekomendasiProduk(models.Model):
+    """Daftar produk yang sering dibeli bersama untuk satu produk (item-to-item)."""
+    id = models.AutoField(primary_key=True)
+    idProduk = models.ForeignKey(Produk, on_delete=models.CASCADE, related_name='rekomendasi', verbose_name="Produk")
+    produk_terkait = models.ForeignKey(Produk, on_delete=models.CASCADE, related_name='+', verbose_name="Produk Terkait")
+    skor = models.IntegerField(default=0, verbose_name="Jumlah Transaksi Bersama")
+    peringkat = models.PositiveSmallIntegerField(verbose_name="Peringkat")
+
+    class Meta:
+        verbose_name_plural = "Rekomendasi Produk"
+        db_table = 'rekomendasi_produk'
+        ordering = ['idProduk', 'peringkat']
+        indexes = [models.Index(fields=['idProduk', 'peringkat'])]
+
+    def __str__(self):
+        return f"#{self.peringkat} untuk Produk #{self.idProduk_id}: Produk #{self.produk_terkait_id}"
+
+
+class RekomendasiPelanggan(models.Model):
+    """Top-N produk yang direkomendasikan untuk satu pelanggan."""
+    id = models.AutoField(primary_key=True)
+    idPelanggan = models.ForeignKey(Pelanggan, on_delete=models.CASCADE, related_name='rekomendasi', verbose_name="Pelanggan")
+    idProduk = models.ForeignKey(Produk, on_delete=models.CASCADE, related_name='+', verbose_name="Produk")
+    skor = models.IntegerField(default=0, verbose_name="Skor")
+    peringkat = models.PositiveSmallIntegerField(verbose_name="Peringkat")
+
+    class Meta:
+        verbose_name_plural = "Rekomendasi Pelanggan"
+        db_table = 'rekomendasi_pelanggan'
+        ordering = ['idPelanggan', 'peringkat']
+        indexes = [models.Index(fields=['idPelanggan', 'peringkat'])]
+
+    def __str__(self):
+        return f"#{self.peringkat} untuk Pelanggan #{self.idPelanggan_id}: Produk #{self.idProduk_id}"
+
+
+# --- Model Segmentasi RFM (Diisi oleh pipeline di core/segmentation.py) ---
+class SegmenPelanggan(models.Model):
+    """Skor Recency/Frequency/Monetary terakhir untuk satu pelanggan."""
+    idPelanggan = models.OneToOneField(
+        Pelanggan, on_delete=models.CASCADE, primary_key=True,
+        related_name='segmen_rfm', verbose_name="Pelanggan"
+    )
+    transaksi_terakhir = models.DateTimeField(null=True, blank=True, verbose_name="Transaksi Terakhir")
+    recency_hari = models.IntegerField(null=True, blank=True, verbose_name="Recency (Hari)")
+    frequency = models.IntegerField(default=0, verbose_name="Frequency")
+    monetary = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name="Monetary")
+    r_score = models.PositiveSmallIntegerField(default=0, verbose_name="Skor R")
+    f_score = models.PositiveSmallIntegerField(default=0, verbose_name="Skor F")
+    m_score = models.PositiveSmallIntegerField(default=0, verbose_name="Skor M")
+    segmen = models.CharField(max_length=20, choices=SEGMEN_RFM_CHOICES, db_index=True, verbose_name="Segmen")
+    diperbarui_pada = models.DateTimeField(verbose_name="Diperbarui Pada")
+
+    class Meta:
+        verbose_name_plural = "Segmen Pelanggan"
+        db_table = 'segmen_pelanggan'
+
+    def __str__(self):
+        return f"{self.get_segmen_display()} (R{self.r_score}F{self.f_score}M{self.m_score})"
+
+
+class ProsesSegmentasi(models.Model):
+    """Riwayat eksekusi pipeline RFM, termasuk batas kuintil yang dipakai."""
+    MODE_CHOICES = [('FULL', 'Penuh'), ('INKREMENTAL', 'Inkremental')]
+
+    id = models.AutoField(primary_key=True)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, verbose_name="Mode")
+    dimulai_pada = models.DateTimeField(verbose_name="Dimulai Pada")
+    selesai_pada = models.DateTimeField(null=True, blank=True, verbose_name="Selesai Pada")
+    jumlah_pelanggan = models.IntegerField(default=0, verbose_name="Jumlah Pelanggan Diproses")
+    batas_kuintil = models.JSONField(default=dict, verbose_name="Batas Kuintil")
+
+    class Meta:
+        verbose_name_plural = "Proses Segmentasi"
+        db_table = 'proses_segmentasi'
+        get_latest_by = 'dimulai_pada'
+
+    def __str__(self):
+        return f"Segmentasi {self.mode} {self.dimulai_pada:%d %b %Y %H:%M}"
+
+
+class KunciTugas(models.Model):
+    """Advisory lock tugas terjadwal, satu baris per tugas (lihat core/jobs.py)."""
+    nama = models.CharField(max_length=200, primary_key=True, verbose_name="Nama Tugas")
+    pemilik = models.CharField(max_length=64, verbose_name="Token Pemilik")
+    kedaluwarsa = models.DateTimeField(verbose_name="Kedaluwarsa")
+
+    class Meta:
+        verbose_name_plural = "Kunci Tugas"
+        db_table = 'kunci_tugas'
+
+    def __str__(self):
+        return self.nama
+
+
+class RiwayatTugas(models.Model):
+    """Satu eksekusi tugas terjadwal per (tugas, jendela waktu), lihat core/jobs.py."""
+    STATUS_CHOICES = [('BERJALAN', 'Berjalan'), ('SUKSES', 'Sukses'), ('GAGAL', 'Gagal')]
+
+    id = models.AutoField(primary_key=True)
+    nama_tugas = models.CharField(max_length=200, verbose_name="Nama Tugas")
+    jendela = models.DateTimeField(verbose_name="Awal Jendela")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, verbose_name="Status")
+    dimulai_pada = models.DateTimeField(verbose_name="Dimulai Pada")
+    selesai_pada = models.DateTimeField(null=True, blank=True, verbose_name="Selesai Pada")
+    durasi_ms = models.IntegerField(null=True, blank=True, verbose_name="Durasi (ms)")
+    jumlah_baris = models.IntegerField(null=True, blank=True, verbose_name="Baris Diproses")
+    error = models.TextField(blank=True, default='', verbose_name="Error")
+
+    class Meta:
+        verbose_name_plural = "Riwayat Tugas"
+        db_table = 'riwayat_tugas'
+        get_latest_by = 'dimulai_pada'
+        constraints = [
+            # Kunci idempotensi: satu eksekusi per tugas per jendela
+            models.UniqueConstraint(fields=['nama_tugas', 'jendela'], name='riwayat_tugas_unik_jendela'),
+        ]
+        indexes = [
+            models.Index(fields=['dimulai_pada'], name='riwayat_tugas_dimulai_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nama_tugas} {self.jendela:%d %b %Y %H:%M} ({self.status})"
+
+
+class EmailGagal(models.Model):
+    """Dead letter email notifikasi yang gagal permanen atau kehabisan retry (lihat core/mailer.py)."""
+    JENIS_ERROR_CHOICES = [('PERMANEN', 'Permanen'), ('SEMENTARA', 'Sementara (retry habis)')]
+    STATUS_CHOICES = [('GAGAL', 'Gagal'), ('DIKIRIM_ULANG', 'Dikirim Ulang')]
+
+    id = models.AutoField(primary_key=True)
+    subject = models.CharField(max_length=255, verbose_name="Subjek")
+    message = models.TextField(verbose_name="Pesan")
+    recipient_list = models.JSONField(default=list, verbose_name="Penerima")
+    link_url = models.CharField(max_length=500, blank=True, default='', verbose_name="Link")
+    link_text = models.CharField(max_length=100, default='Lihat Detail', verbose_name="Teks Link")
+    html_message = models.TextField(blank=True, default='', verbose_name="Pesan HTML")
+    jenis_error = models.CharField(max_length=20, choices=JENIS_ERROR_CHOICES, verbose_name="Jenis Error")
+    error = models.TextField(verbose_name="Error")
+    jumlah_percobaan = models.IntegerField(default=1, verbose_name="Jumlah Percobaan")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='GAGAL', verbose_name="Status")
+    dibuat_pada = models.DateTimeField(auto_now_add=True, verbose_name="Dibuat Pada")
+    dikirim_ulang_pada = models.DateTimeField(null=True, blank=True, verbose_name="Dikirim Ulang Pada")
+
+    class Meta:
+        verbose_name_plural = "Email Gagal"
+        db_table = 'email_gagal'
+        indexes = [
+            models.Index(fields=['status', 'dibuat_pada'], name='email_gagal_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipient_list)}"
+
+
+class ProfilRequest(models.Model):
+    """Hasil profiling query satu request (lihat core/profiling.py)."""
+    id = models.AutoField(primary_key=True)
+    endpoint = models.CharField(max_length=200, verbose_name="Endpoint")
+    metode = models.CharField(max_length=10, verbose_name="Metode")
+    path = models.CharField(max_length=500, verbose_name="Path")
+    status_code = models.IntegerField(verbose_name="Status")
+    durasi_ms = models.FloatField(verbose_name="Durasi (ms)")
+    jumlah_query = models.IntegerField(verbose_name="Jumlah Query")
+    durasi_db_ms = models.FloatField(verbose_name="Waktu DB (ms)")
+    query_duplikat = models.IntegerField(verbose_name="Query Duplikat")
+    durasi_template_ms = models.FloatField(verbose_name="Render Template (ms)")
+    duplikat_teratas = models.TextField(blank=True, default='', verbose_name="Query Duplikat Teratas")
+    dibuat_pada = models.DateTimeField(auto_now_add=True, verbose_name="Dibuat Pada")
+
+    class Meta:
+        verbose_name_plural = "Profil Request"
+        db_table = 'profil_request'
+        indexes = [
+            models.Index(fields=['dibuat_pada', 'endpoint'], name='profil_request_waktu_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.metode} {self.path} ({self.jumlah_query} query)"
@@ -0,0 +1,156 @@
+"""
+Registry template notifikasi email/in-app.
+
+Setiap notifikasi punya subject (template satu baris) dan isi teks di
+core/templates/core/email/<nama>.txt. Versi HTML dibuat dari isi teks yang
+sama lewat core/email/base.html, jadi email selalu multipart teks + HTML dan
+link (absolut, berbasis SITE_URL) tampil sebagai tombol, bukan markdown palsu.
+
+Template di-compile sekali per proses (cached_property pada entri registry).
+render_massal() merender banyak penerima dalam satu Context yang di-push/pop
+per penerima, tanpa membuat Context dan mencari template ulang per email.
+Layout HTML (base.html) dirender sekali per panggilan dengan penanda, lalu
+per penerima hanya subject, isi dan link yang disisipkan (sudah di-escape).
+"""
+from collections import namedtuple
+from functools import cached_property, lru_cache
+
+from django.conf import settings
+from django.template import Context, engines
+from django.utils.html import escape, linebreaks
+from django.utils.safestring import mark_safe
+
+from .instrumentation import catat_email
+
+# Jumlah email per task send_notification_emails_batch (satu koneksi SMTP per task)
+EMAIL_BATCH_SIZE = 100
+
+EmailNotifikasi = namedtuple('EmailNotifikasi', 'subject pesan text html')
+
+
+@lru_cache(maxsize=None)
+def _engine():
+    return engines['django'].engine
+
+
+class TemplateNotifikasi:
+    def __init__(self, nama, subject, link_text="Lihat Detail"):
+        self.nama = nama
+        self.subject_source = subject
+        self.link_text = link_text
+
+    @cached_property
+    def subject(self):
+        return _engine().from_string(self.subject_source)
+
+    @cached_property
+    def body(self):
+        return _engine().get_template(f'core/email/{self.nama}.txt')
+
+
+NOTIFIKASI = {t.nama: t for t in [
+    TemplateNotifikasi('transaksi_dibuat', "🥳 Transaksi Berhasil Dibuat (#ID{{ transaksi_id }})"),
+    TemplateNotifikasi('transaksi_selesai', "✅ Pesanan Anda Selesai dan Diterima! (#ID{{ transaksi_id }})"),
+    TemplateNotifikasi('perubahan_status', "📣 Perubahan Status Pesanan #{{ transaksi_id }} (Barokah Beton)"),
+    TemplateNotifikasi('pembatalan_otomatis', "❌ Pesanan Dibatalkan Otomatis #{{ transaksi_id }} (Barokah Beton)"),
+    TemplateNotifikasi('bukti_pembayaran_diterima', "📩 Bukti Pembayaran Diterima untuk Pesanan #{{ transaksi_id }}"),
+    TemplateNotifikasi('pengingat_pembayaran', "⏰ Pengingat Pembayaran: Pesanan #{{ transaksi_id }}", "Bayar Sekarang"),
+    TemplateNotifikasi('pengingat_feedback', "📝 Pengingat: Mohon Berikan Feedback untuk Pesanan #{{ transaksi_id }}", "Beri Feedback"),
+    TemplateNotifikasi('ulang_tahun', "🥳 Selamat Ulang Tahun & Klaim Diskon Anda, {{ nama }}!", "Belanja Sekarang"),
+    TemplateNotifikasi('restock_produk', "🛍️ Produk Kembali Tersedia: {{ produk }}", "Lihat Produk"),
+    TemplateNotifikasi('restock_digest', "🛍️ {{ produk|length }} Produk Kembali Tersedia di Barokah Beton", "Lihat Produk"),
+    TemplateNotifikasi('admin_transaksi_baru', "📥 Transaksi Baru / Perlu Proses: #{{ transaksi_id }}"),
+    TemplateNotifikasi('admin_bukti_pembayaran', "🔔 Bukti Pembayaran Siap Diverifikasi: Pesanan #{{ transaksi_id }}"),
+    TemplateNotifikasi('admin_stok_rendah', "⚠️ Laporan Stok Rendah - Barokah"),
+    TemplateNotifikasi('admin_ekspor_siap', "📊 Ekspor Transaksi Siap Diunduh", "Unduh File"),
+]}
+
+
+@lru_cache(maxsize=None)
+def _base_html():
+    return _engine().get_template('core/email/base.html')
+
+
+def absolut(path):
+    """URL absolut untuk path situs (SITE_URL + path); URL yang sudah absolut dikembalikan apa adanya."""
+    if not path or '://' in path:
+        return path
+    return settings.SITE_URL.rstrip('/') + '/' + path.lstrip('/')
+
+
+# Penanda di layout HTML yang diganti per penerima (lihat _kerangka_html)
+_PENANDA_SUBJECT = '\x00subject\x00'
+_PENANDA_PESAN = '\x00pesan\x00'
+_PENANDA_LINK = '\x00link_url\x00'
+
+
+def _kerangka_html(link_text, ada_link):
+    """base.html yang dirender dengan penanda untuk subject, isi dan link."""
+    return _base_html().render(Context({
+        'site_url': settings.SITE_URL,
+        'link_text': link_text,
+        'subject': mark_safe(_PENANDA_SUBJECT),
+        'pesan_html': mark_safe(_PENANDA_PESAN),
+        'link_url': mark_safe(_PENANDA_LINK) if ada_link else '',
+    }))
+
+
+def render_massal(nama, contexts, umum=None):
+    """
+    Render notifikasi `nama` untuk banyak penerima sekaligus.
+    contexts: iterable dict per penerima (boleh berisi link_url berupa path).
+    umum: context yang sama untuk semua penerima (dirender sekali ke Context dasar).
+    Mengembalikan list EmailNotifikasi(subject, pesan, text, html);
+    pesan = isi tanpa link (untuk Notifikasi in-app).
+    """
+    template = NOTIFIKASI[nama]
+    dasar = {'site_url': settings.SITE_URL, 'link_text': template.link_text, **(umum or {})}
+    teks = Context(dasar, autoescape=False)
+    kerangka = {}
+
+    hasil = []
+    for context in contexts:
+        link_url = absolut(context.get('link_url') or dasar.get('link_url'))
+        with teks.push(context, link_url=link_url):
+            subject = ' '.join(template.subject.render(teks).split())
+            pesan = template.body.render(teks).strip()
+        text = f"{pesan}\n\n{template.link_text}: {link_url}" if link_url else pesan
+
+        ada_link = bool(link_url)
+        if ada_link not in kerangka:
+            kerangka[ada_link] = _kerangka_html(template.link_text, ada_link)
+        html = (
+            kerangka[ada_link]
+            .replace(_PENANDA_SUBJECT, escape(subject))
+            .replace(_PENANDA_PESAN, linebreaks(pesan, autoescape=True))
+            .replace(_PENANDA_LINK, escape(link_url or ''))
+        )
+        hasil.append(EmailNotifikasi(subject, pesan, text, html))
+    return hasil
+
+
+def render(nama, /, **context):
+    return render_massal(nama, [context])[0]
+
+
+def item_email(email, recipient_list):
+    """Item untuk tasks.send_notification_emails_batch."""
+    return {'subject': email.subject, 'message': email.text, 'recipient_list': recipient_list, 'html_message': email.html}
+
+
+def kirim(email, recipient_list):
+    """Kirim satu EmailNotifikasi lewat tasks.send_notification_email."""
+    # Import di sini untuk mencegah circular import (tasks -> notifications)
+    from .tasks import send_notification_email
+
+    catat_email()
+    send_notification_email.delay(email.subject, email.text, recipient_list, html_message=email.html)
+
+
+def kirim_massal(items):
+    """Kirim list item_email() per kelompok EMAIL_BATCH_SIZE (satu koneksi SMTP per kelompok)."""
+    from .tasks import send_notification_emails_batch
+
+    catat_email(len(items))
+    for i in range(0, len(items), EMAIL_BATCH_SIZE):
+        send_notification_emails_batch.delay(items[i:i + EMAIL_BATCH_SIZE])
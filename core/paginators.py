@@ -0,0 +1,47 @@
+"""
+Paginator untuk changelist admin pada tabel besar (transaksi, notifikasi).
+
+Paginator bawaan menjalankan COUNT(*) di setiap halaman, yang pada MySQL/InnoDB
+berarti memindai seluruh tabel. Untuk changelist tanpa filter, jumlah baris
+diambil dari statistik tabel database (perkiraan); hasil filter/pencarian tetap
+dihitung persis karena biasanya jauh lebih kecil.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Di bawah angka ini COUNT(*) masih murah, jadi tetap dihitung persis
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimate_row_count(model, using='default'):
+    """Perkiraan jumlah baris dari statistik database; None jika backend tidak menyediakannya."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    # reltuples bernilai -1 untuk tabel yang belum pernah di-ANALYZE
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
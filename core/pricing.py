@@ -0,0 +1,164 @@
+"""
+Mesin harga keranjang & checkout.
+
+Harga per baris = harga dasar produk
+                  x (100 - diskon produk DiskonPelanggan terbesar) / 100
+                  x (100 - diskon loyalitas ulang tahun) / 100
+dibulatkan SEKALI ke 2 desimal (ROUND_HALF_UP); total baris = harga satuan x qty.
+
+Aturan aktif per pelanggan (lookup DiskonPelanggan + status diskon loyalitas)
+di-cache. Masa berlaku cache tidak melewati berakhirnya diskon ulang tahun
+(birthday_discount_activated_at + 24 jam) maupun berlaku_sampai kampanye di
+lookup, dan seluruh cache bisa dibatalkan
+sekaligus lewat penghitung versi (mis. saat kampanye dijalankan/diakhiri).
+"""
+import logging
+import time
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .campaigns import lookup_diskon, persen_diskon_produk
+from .models import Produk
+
+logger = logging.getLogger(__name__)
+
+# Aturan loyalitas dari send_birthday_greetings: total belanja >= Rp5 juta -> diskon 10% selama 24 jam
+LOYALTY_THRESHOLD = Decimal('5000000')
+LOYALTY_PERSEN = 10
+BIRTHDAY_DISCOUNT_DURATION = timedelta(hours=24)
+
+RULES_CACHE_TIMEOUT = 300  # detik
+CACHE_VERSION_KEY = 'pricing:versi'
+# Anggaran waktu hitung satu keranjang (di luar query); pelanggaran dicatat sebagai warning
+CART_LATENCY_BUDGET_MS = 25
+
+SEN = Decimal('0.01')
+SERATUS = Decimal('100')
+
+
+class AturanHarga:
+    """Aturan diskon aktif untuk satu pelanggan."""
+    __slots__ = ('diskon_produk', 'persen_loyalitas', 'berlaku_sampai')
+
+    def __init__(self, diskon_produk=None, persen_loyalitas=0, berlaku_sampai=None):
+        self.diskon_produk = diskon_produk or {}
+        self.persen_loyalitas = persen_loyalitas
+        self.berlaku_sampai = berlaku_sampai
+
+    def masih_berlaku(self, now):
+        return self.berlaku_sampai is None or now < self.berlaku_sampai
+
+
+def hitung_harga_satuan(harga_dasar, persen_produk=0, persen_loyalitas=0):
+    """Harga satuan setelah semua diskon, dibulatkan sekali ke sen terdekat (ROUND_HALF_UP)."""
+    harga = Decimal(harga_dasar) * (SERATUS - persen_produk) * (SERATUS - persen_loyalitas) / (SERATUS * SERATUS)
+    return harga.quantize(SEN, rounding=ROUND_HALF_UP)
+
+
+def _versi():
+    return cache.get_or_set(CACHE_VERSION_KEY, 1, None)
+
+
+def _cache_key(pelanggan_id, versi=None):
+    return f"pricing:aturan:{versi or _versi()}:{pelanggan_id}"
+
+
+def _berakhir_diskon_ultah(pelanggan):
+    if not pelanggan.is_birthday_discount_active or not pelanggan.birthday_discount_activated_at:
+        return None
+    return pelanggan.birthday_discount_activated_at + BIRTHDAY_DISCOUNT_DURATION
+
+
+def bangun_aturan(pelanggan, now=None):
+    """Susun aturan harga langsung dari database (satu query DiskonPelanggan)."""
+    now = now or timezone.now()
+    diskon_produk, kampanye_berakhir = lookup_diskon(pelanggan.id, now)
+    aturan = AturanHarga(diskon_produk=diskon_produk, berlaku_sampai=kampanye_berakhir)
+    berakhir = _berakhir_diskon_ultah(pelanggan)
+    if berakhir and now < berakhir and pelanggan.total_riwayat_belanja >= LOYALTY_THRESHOLD:
+        aturan.persen_loyalitas = LOYALTY_PERSEN
+        aturan.berlaku_sampai = min(berakhir, kampanye_berakhir or berakhir)
+    return aturan
+
+
+def get_aturan(pelanggan, now=None):
+    """Aturan harga pelanggan dari cache; dibangun ulang jika tidak ada atau sudah kedaluwarsa."""
+    now = now or timezone.now()
+    key = _cache_key(pelanggan.id)
+    aturan = cache.get(key)
+    if aturan is not None and aturan.masih_berlaku(now):
+        return aturan
+
+    aturan = bangun_aturan(pelanggan, now)
+    timeout = RULES_CACHE_TIMEOUT
+    if aturan.berlaku_sampai:
+        timeout = max(1, min(timeout, int((aturan.berlaku_sampai - now).total_seconds())))
+    cache.set(key, aturan, timeout)
+    return aturan
+
+
+def invalidate_aturan(pelanggan_ids=None):
+    """Buang aturan ter-cache untuk pelanggan tertentu, atau semua pelanggan jika None."""
+    if pelanggan_ids is None:
+        try:
+            cache.incr(CACHE_VERSION_KEY)
+        except ValueError:
+            cache.set(CACHE_VERSION_KEY, 2, None)
+        return
+    versi = _versi()
+    cache.delete_many([_cache_key(pid, versi) for pid in pelanggan_ids])
+
+
+def _product_ids(cart):
+    ids = []
+    for entry in cart:
+        try:
+            ids.append(int(entry.get('product_id')))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def hitung_keranjang(pelanggan, cart, now=None):
+    """
+    Hitung baris dan subtotal keranjang dalam satu lintasan.
+    Query: satu untuk produk (in_bulk) + satu untuk aturan jika cache kosong.
+    Mengembalikan (items, subtotal, aturan).
+    """
+    produk_map = Produk.objects.in_bulk(_product_ids(cart))
+    aturan = get_aturan(pelanggan, now) if produk_map else AturanHarga()
+
+    started = time.perf_counter()
+    items = []
+    subtotal = Decimal('0.00')
+    for entry in cart:
+        try:
+            p = produk_map.get(int(entry.get('product_id')))
+        except (TypeError, ValueError):
+            continue
+        if p is None:
+            continue
+        qty = int(entry.get('qty', 1))
+        persen = persen_diskon_produk(aturan.diskon_produk, p.id)
+        harga = hitung_harga_satuan(p.harga_produk, persen, aturan.persen_loyalitas)
+        total = harga * qty
+        subtotal += total
+        items.append({
+            'product': p,
+            'qty': qty,
+            'harga': harga,
+            'persen_diskon': persen,
+            'persen_loyalitas': aturan.persen_loyalitas,
+            'total': total,
+        })
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > CART_LATENCY_BUDGET_MS:
+        logger.warning(
+            "Perhitungan keranjang pelanggan #%s (%d baris) butuh %.1f ms, melebihi anggaran %d ms",
+            pelanggan.id, len(items), elapsed_ms, CART_LATENCY_BUDGET_MS,
+        )
+    return items, subtotal, aturan
@@ -0,0 +1,170 @@
+"""
+Profiling query per request untuk storefront dan admin.
+
+ProfilingQueryMiddleware aktif jika QUERY_PROFILING = True, atau untuk user
+staff yang mengirim header X-Profil-Query: 1. Untuk request yang diprofil:
+
+- setiap query dicatat lewat connection.execute_wrapper: jumlah, total waktu DB
+  dan signature (SQL dengan placeholder, daftar IN (...) diringkas). Signature
+  yang muncul lebih dari sekali adalah kandidat N+1;
+- waktu render template diukur di Template.render tingkat teratas (termasuk
+  query lazy yang dieksekusi dari dalam template);
+- hasilnya disimpan ke ProfilRequest (diringkas per endpoint di admin) dan
+  request yang melewati QUERY_PROFILING_BATAS dicatat sebagai warning.
+
+Saat tidak aktif biayanya satu pengecekan setting/header per request dan satu
+ContextVar.get() per render template. Di bawah ASGI request yang tidak diprofil
+tetap async penuh; request yang diprofil dijalankan lewat thread supaya query
+view async (yang dieksekusi di thread sync_to_async) ikut tercatat.
+"""
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.template.base import Template
+
+from .models import ProfilRequest
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'X-Profil-Query'
+# Signature duplikat teratas yang disimpan per request
+DUPLIKAT_TERATAS = 5
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_profil = contextvars.ContextVar('profil_query', default=None)
+_render_asli = None
+
+
+class ProfilQuery:
+    def __init__(self):
+        self.signature = Counter()
+        self.durasi_db = 0.0
+        self.durasi_template = 0.0
+        self._kedalaman_template = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durasi_db += time.perf_counter() - t0
+            self.signature[_IN_LIST.sub('IN (...)', sql)] += 1
+
+    @property
+    def jumlah_query(self):
+        return sum(self.signature.values())
+
+    @property
+    def query_duplikat(self):
+        return sum(n - 1 for n in self.signature.values() if n > 1)
+
+    def duplikat_teratas(self):
+        return [(n, sql) for sql, n in self.signature.most_common(DUPLIKAT_TERATAS) if n > 1]
+
+
+def _render_terukur(self, context):
+    profil = _profil.get()
+    if profil is None or profil._kedalaman_template:
+        return _render_asli(self, context)
+    profil._kedalaman_template += 1
+    t0 = time.perf_counter()
+    try:
+        return _render_asli(self, context)
+    finally:
+        profil.durasi_template += time.perf_counter() - t0
+        profil._kedalaman_template -= 1
+
+
+def pasang_pengukur_template():
+    """Bungkus Template.render sekali per proses untuk mengukur waktu render."""
+    global _render_asli
+    if _render_asli is None:
+        _render_asli = Template.render
+        Template.render = _render_terukur
+
+
+def _diprofil(request):
+    if settings.QUERY_PROFILING:
+        return True
+    return request.headers.get(HEADER) == '1' and request.user.is_staff
+
+
+class ProfilingQueryMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        pasang_pengukur_template()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not _diprofil(request):
+            return self.get_response(request)
+        return self.profil(request, self.get_response)
+
+    async def __acall__(self, request):
+        # request.user (dicek hanya jika ada header) memuat sesi dan user dari database
+        if not settings.QUERY_PROFILING and request.headers.get(HEADER) != '1':
+            return await self.get_response(request)
+        if not await sync_to_async(_diprofil)(request):
+            return await self.get_response(request)
+        # execute_wrapper berlaku per koneksi (per thread): jalankan view dari thread yang sama
+        # dengan sync_to_async di dalamnya
+        return await sync_to_async(self.profil)(request, async_to_sync(self.get_response))
+
+    def profil(self, request, get_response):
+        profil = ProfilQuery()
+        token = _profil.set(profil)
+        t0 = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profil):
+                response = get_response(request)
+        finally:
+            _profil.reset(token)
+        durasi = time.perf_counter() - t0
+
+        match = request.resolver_match
+        self.simpan(request, response, profil, durasi, match.view_name if match else '-')
+        return response
+
+    def simpan(self, request, response, profil, durasi, endpoint):
+        duplikat = profil.duplikat_teratas()
+        data = {
+            'endpoint': endpoint[:200],
+            'metode': request.method,
+            'path': request.path[:500],
+            'status_code': response.status_code,
+            'durasi_ms': round(durasi * 1000, 2),
+            'jumlah_query': profil.jumlah_query,
+            'durasi_db_ms': round(profil.durasi_db * 1000, 2),
+            'query_duplikat': profil.query_duplikat,
+            'durasi_template_ms': round(profil.durasi_template * 1000, 2),
+        }
+        ProfilRequest.objects.create(
+            duplikat_teratas='\n'.join(f"{n}x {sql}" for n, sql in duplikat), **data,
+        )
+
+        batas = settings.QUERY_PROFILING_BATAS
+        terlampaui = [
+            nama for nama, nilai in (
+                ('query', data['jumlah_query']), ('db_ms', data['durasi_db_ms']),
+                ('duplikat', data['query_duplikat']), ('durasi_ms', data['durasi_ms']),
+            )
+            if nilai > batas[nama]
+        ]
+        if terlampaui:
+            logger.warning(
+                "Request melewati batas profiling",
+                extra={**data, 'terlampaui': terlampaui, 'duplikat_teratas': [sql[:300] for _, sql in duplikat]},
+            )
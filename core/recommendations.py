@@ -0,0 +1,194 @@
+"""
+Mesin rekomendasi "Sering dibeli bersama".
+
+Job offline (dipanggil dari task Celery malam) membaca DetailTransaksi dengan
+.iterator() (hanya tuple id, tanpa instance model), menghitung matriks co-purchase
+antar produk memakai Counter Python, lalu menyimpan:
+- top-N produk terkait per produk  -> tabel rekomendasi_produk
+- top-N rekomendasi per pelanggan  -> tabel rekomendasi_pelanggan
+
+Penulisan tidak dalam satu transaksi besar: baris diganti per chunk dalam
+transaksi pendek (_ganti_chunk). Di SQLite setiap transaksi memegang lock tulis
+(atomic_tulis, BEGIN IMMEDIATE), jadi checkout hanya menunggu satu chunk,
+bukan seluruh rebuild. Pembaca melihat rekomendasi lama atau baru per
+produk/pelanggan, tidak pernah kosong.
+
+Sisi serving cukup satu query per halaman (lihat get_produk_terkait dan
+get_rekomendasi_pelanggan).
+
+Catatan memori: di SQLite .iterator() mengambil baris per chunk_size dari
+cursor. mysqlclient tidak punya server-side cursor, jadi di MySQL seluruh hasil
+(tiga integer per baris detail) tetap disangga di memori worker. Keyset per
+chunk seperti core/exports.py tidak dipakai karena urutan per pelanggan butuh
+join: setiap chunk akan mengurutkan ulang seluruh tabel.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Max
+
+from barokah.database import atomic_tulis
+
+from .caching import naikkan_versi_katalog
+from .models import (
+    DetailTransaksi, RekomendasiProduk, RekomendasiPelanggan, REVENUE_STATUSES,
+)
+from .routers import pakai_primary
+
+# Jumlah baris DetailTransaksi per fetch dari cursor (diabaikan mysqlclient, lihat docstring modul)
+CHUNK_SIZE = 5000
+# Jumlah produk terkait yang disimpan per produk / per pelanggan
+TOP_N_PRODUK = 6
+TOP_N_PELANGGAN = 6
+# Tetangga per produk yang dipakai saat menghitung skor pelanggan (membatasi biaya)
+NEIGHBOURS_PER_PRODUK = 20
+
+
+def _detail_rows(order_by, chunk_size):
+    """Iterasi (transaksi, pelanggan, produk) dari transaksi sukses, urut `order_by`."""
+    return (
+        DetailTransaksi.objects
+        .filter(idTransaksi__status_transaksi__in=REVENUE_STATUSES)
+        .order_by(order_by, 'idProduk_id')
+        .values_list('idTransaksi_id', 'idTransaksi__idPelanggan_id', 'idProduk_id')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _grouped(rows, key_index):
+    """Kelompokkan baris yang sudah terurut berdasarkan kolom key_index -> (key, set produk)."""
+    current_key = None
+    produk_ids = set()
+    for row in rows:
+        key = row[key_index]
+        if key != current_key:
+            if current_key is not None:
+                yield current_key, produk_ids
+            current_key = key
+            produk_ids = set()
+        produk_ids.add(row[2])
+    if current_key is not None:
+        yield current_key, produk_ids
+
+
+def hitung_co_purchase(chunk_size=CHUNK_SIZE):
+    """
+    Bangun matriks co-purchase jarang: {produk_a: Counter({produk_b: jumlah_transaksi})}.
+
+    Hanya pasangan yang benar-benar muncul bersama yang disimpan, sehingga ukuran
+    memori mengikuti jumlah pasangan unik, bukan jumlah baris detail.
+    """
+    co_purchase = defaultdict(Counter)
+    for _, produk_ids in _grouped(_detail_rows('idTransaksi_id', chunk_size), 0):
+        if len(produk_ids) < 2:
+            continue
+        for a in produk_ids:
+            counter = co_purchase[a]
+            for b in produk_ids:
+                if a != b:
+                    counter[b] += 1
+    return co_purchase
+
+
+def _id_terakhir(model):
+    # Dari primary: tabel rekomendasi belum ditulis, jadi di dalam baca_replika ini akan ke replika
+    with pakai_primary():
+        return model.objects.aggregate(terakhir=Max('id'))['terakhir'] or 0
+
+
+def _ganti_chunk(model, kolom, batch):
+    """
+    Ganti semua baris milik produk/pelanggan (`kolom`) di batch dengan isi
+    batch, dalam satu transaksi pendek. Mengembalikan jumlah baris baru.
+    """
+    if not batch:
+        return 0
+    keys = {getattr(obj, kolom) for obj in batch}
+    with atomic_tulis():
+        model.objects.filter(**{f'{kolom}__in': keys}).delete()
+        model.objects.bulk_create(batch, batch_size=len(batch))
+    jumlah = len(batch)
+    batch.clear()
+    return jumlah
+
+
+def rebuild_recommendations(chunk_size=CHUNK_SIZE):
+    """
+    Hitung ulang seluruh tabel rekomendasi. Mengembalikan tuple
+    (jumlah baris rekomendasi produk, jumlah baris rekomendasi pelanggan).
+    """
+    co_purchase = hitung_co_purchase(chunk_size)
+
+    # --- 1. Top-N per produk ---
+    # Baris dengan id <= id_lama yang tersisa di akhir milik produk yang tidak lagi punya pasangan
+    id_lama = _id_terakhir(RekomendasiProduk)
+    neighbours = {}
+    batch = []
+    total_produk = 0
+    for produk_id, counter in co_purchase.items():
+        terdekat = counter.most_common(max(TOP_N_PRODUK, NEIGHBOURS_PER_PRODUK))
+        neighbours[produk_id] = terdekat
+        for peringkat, (terkait_id, skor) in enumerate(terdekat[:TOP_N_PRODUK], start=1):
+            batch.append(RekomendasiProduk(
+                idProduk_id=produk_id, produk_terkait_id=terkait_id, skor=skor, peringkat=peringkat,
+            ))
+        if len(batch) >= chunk_size:
+            total_produk += _ganti_chunk(RekomendasiProduk, 'idProduk_id', batch)
+    total_produk += _ganti_chunk(RekomendasiProduk, 'idProduk_id', batch)
+    RekomendasiProduk.objects.filter(id__lte=id_lama).delete()
+    del co_purchase
+    # Produk terkait tampil di product_detail (ETag katalog, core/caching.py)
+    naikkan_versi_katalog()
+
+    # --- 2. Top-N per pelanggan (streaming, satu pelanggan dalam memori sekaligus) ---
+    id_lama = _id_terakhir(RekomendasiPelanggan)
+    total_pelanggan = 0
+    for pelanggan_id, dibeli in _grouped(_detail_rows('idTransaksi__idPelanggan_id', chunk_size), 1):
+        skor = Counter()
+        for produk_id in dibeli:
+            for terkait_id, jumlah in neighbours.get(produk_id, ()):
+                if terkait_id not in dibeli:
+                    skor[terkait_id] += jumlah
+        for peringkat, (produk_id, nilai) in enumerate(skor.most_common(TOP_N_PELANGGAN), start=1):
+            batch.append(RekomendasiPelanggan(
+                idPelanggan_id=pelanggan_id, idProduk_id=produk_id, skor=nilai, peringkat=peringkat,
+            ))
+        if len(batch) >= chunk_size:
+            total_pelanggan += _ganti_chunk(RekomendasiPelanggan, 'idPelanggan_id', batch)
+    total_pelanggan += _ganti_chunk(RekomendasiPelanggan, 'idPelanggan_id', batch)
+    RekomendasiPelanggan.objects.filter(id__lte=id_lama).delete()
+
+    return total_produk, total_pelanggan
+
+
+# --- SERVING (satu query per panggilan) ---
+
+def _produk_terkait(produk_id, limit):
+    return (
+        RekomendasiProduk.objects
+        .filter(idProduk_id=produk_id, peringkat__lte=limit)
+        .select_related('produk_terkait')
+        .order_by('peringkat')
+    )
+
+
+def get_produk_terkait(produk_id, limit=TOP_N_PRODUK):
+    """Produk yang sering dibeli bersama produk_id, urut berdasarkan peringkat."""
+    return [row.produk_terkait for row in _produk_terkait(produk_id, limit)]
+
+
+async def aget_produk_terkait(produk_id, limit=TOP_N_PRODUK):
+    """Versi async get_produk_terkait untuk view async."""
+    return [row.produk_terkait async for row in _produk_terkait(produk_id, limit)]
+
+
+def get_rekomendasi_pelanggan(pelanggan_id, exclude_ids=(), limit=TOP_N_PELANGGAN):
+    """Rekomendasi personal untuk pelanggan, tanpa produk yang sudah ada di exclude_ids."""
+    rows = (
+        RekomendasiPelanggan.objects
+        .filter(idPelanggan_id=pelanggan_id)
+        .exclude(idProduk_id__in=list(exclude_ids))
+        .select_related('idProduk')
+        .order_by('peringkat')[:limit]
+    )
+    return [row.idProduk for row in rows]
@@ -0,0 +1,144 @@
+"""
+Resource django-import-export untuk katalog (Kategori, Produk) dan Pelanggan.
+
+Import berjalan dengan use_bulk: baris dikumpulkan lalu ditulis per batch
+dengan bulk_create/bulk_update, sehingga signal save per baris tidak terpicu.
+Sebagai gantinya ProdukResource mencatat perubahan stok dan menjalankan SATU
+pass deteksi restock di after_import, dan import katalog menaikkan versi
+katalog (ETag halaman katalog) sekali di akhir.
+"""
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from import_export import fields, resources, widgets
+from import_export.instance_loaders import CachedInstanceLoader
+
+from .caching import naikkan_versi_katalog
+from .models import Kategori, Produk, Pelanggan
+
+IMPORT_BATCH_SIZE = 1000
+# Laporkan progress ke callback setiap N baris
+PROGRESS_EVERY = 500
+
+
+class CachedForeignKeyWidget(widgets.ForeignKeyWidget):
+    """ForeignKeyWidget yang memuat semua pilihan sekali, bukan satu query per baris."""
+
+    def __init__(self, model, field='pk', **kwargs):
+        super().__init__(model, field=field, **kwargs)
+        self._lookup = None
+
+    def clean(self, value, row=None, **kwargs):
+        if not value:
+            return None
+        if self._lookup is None:
+            self._lookup = {str(getattr(obj, self.field)): obj for obj in self.get_queryset(value, row, **kwargs)}
+        try:
+            return self._lookup[str(value)]
+        except KeyError:
+            raise self.model.DoesNotExist(f"{self.model.__name__} '{value}' tidak ditemukan.")
+
+
+class BulkImportMixin:
+    """Opsi bersama untuk import massal + laporan progress opsional."""
+    progress_callback = None
+    # Import model katalog mengubah halaman katalog (lihat core/caching.py)
+    mengubah_katalog = False
+
+    def after_import_row(self, row, row_result, **kwargs):
+        super().after_import_row(row, row_result, **kwargs)
+        row_number = kwargs.get('row_number') or 0
+        if self.progress_callback and row_number % PROGRESS_EVERY == 0:
+            self.progress_callback(row_number)
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if self.mengubah_katalog and not kwargs.get('dry_run') and not result.has_errors():
+            transaction.on_commit(naikkan_versi_katalog)
+
+
+class KategoriResource(BulkImportMixin, resources.ModelResource):
+    mengubah_katalog = True
+
+    class Meta:
+        model = Kategori
+        fields = ('id', 'nama_kategori')
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+        report_skipped = False
+        instance_loader_class = CachedInstanceLoader
+
+
+class ProdukResource(BulkImportMixin, resources.ModelResource):
+    kategori = fields.Field(
+        attribute='kategori', column_name='kategori',
+        widget=CachedForeignKeyWidget(Kategori, 'nama_kategori'),
+    )
+    mengubah_katalog = True
+
+    class Meta:
+        model = Produk
+        fields = ('id', 'nama_produk', 'deskripsi_produk', 'harga_produk', 'stok_produk', 'kategori')
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+        report_skipped = False
+        instance_loader_class = CachedInstanceLoader
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        # {produk_id: (stok_lama, stok_baru)} untuk produk yang sudah ada
+        self.perubahan_stok = {}
+        self.restocked_ids = []
+
+    def before_save_instance(self, instance, row, **kwargs):
+        super().before_save_instance(instance, row, **kwargs)
+        if instance.pk and instance._original_stok != instance.stok_produk:
+            self.perubahan_stok[instance.pk] = (instance._original_stok, instance.stok_produk)
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if kwargs.get('dry_run') or result.has_errors():
+            return
+        # Import di sini untuk mencegah circular import (tasks -> models)
+        from .tasks import is_significant_restock, send_restock_digest
+
+        self.restocked_ids = [
+            pk for pk, (lama, baru) in self.perubahan_stok.items()
+            if is_significant_restock(lama, baru)
+        ]
+        if self.restocked_ids:
+            # Setelah commit: digest membaca stok baru, dan import yang di-rollback tidak mengirim email
+            transaction.on_commit(lambda ids=self.restocked_ids: send_restock_digest.delay(ids))
+
+
+class PelangganResource(BulkImportMixin, resources.ModelResource):
+    class Meta:
+        model = Pelanggan
+        fields = (
+            'id', 'nama_pelanggan', 'alamat', 'tanggal_lahir', 'no_hp', 'username', 'email',
+            'total_riwayat_belanja',
+        )
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+        report_skipped = False
+        instance_loader_class = CachedInstanceLoader
+
+    def get_import_fields(self):
+        # Total belanja dihitung oleh sistem, hanya diekspor
+        return [f for f in super().get_import_fields() if f.attribute != 'total_riwayat_belanja']
+
+    def init_instance(self, row=None):
+        instance = super().init_instance(row)
+        # Pelanggan hasil import belum punya password; buat password yang tidak bisa dipakai login
+        instance.password = make_password(None)
+        return instance
+
+
+# Dipakai task import asinkron untuk memilih resource dari nama model
+RESOURCES = {
+    'kategori': KategoriResource,
+    'produk': ProdukResource,
+    'pelanggan': PelangganResource,
+}
@@ -0,0 +1,154 @@
+"""
+Routing baca ke replika untuk kode laporan (DATABASE_ROUTERS di settings).
+
+Replika hanya dipakai jika diminta secara eksplisit:
+
+- `with baca_replika():` / `@baca_replika()` untuk blok kode laporan (dashboard
+  admin, job rekomendasi dan RFM). Query baca di dalamnya ke alias 'replica';
+  model yang sudah ditulis di dalam blok yang sama dibaca dari primary lagi
+  (read-your-writes), dan semua tulis tetap ke primary.
+- `alias_laporan()` untuk queryset yang dievaluasi di luar blok, mis. ekspor
+  yang dialirkan (StreamingHttpResponse) setelah view selesai: `qs.using(...)`.
+- `pakai_primary()` mengunci blok (mis. checkout) ke primary walau berada di
+  dalam baca_replika.
+
+Di luar blok semua query ke primary. Replika dianggap tidak sehat (dan baca
+kembali ke primary) jika alias 'replica' tidak dikonfigurasi, tidak bisa
+dihubungi, replikasinya berhenti, atau lag-nya melebihi
+DATABASE_REPLICA_LAG_MAKS detik. Status dicek paling sering sekali per
+DATABASE_REPLICA_CEK_INTERVAL detik per proses.
+"""
+import contextvars
+import functools
+import logging
+import time
+from contextlib import ContextDecorator
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA = 'replica'
+
+_cakupan = contextvars.ContextVar('cakupan_database', default=None)
+# alias -> (waktu cek monotonic, sehat)
+_status = {}
+
+
+class _Cakupan:
+    __slots__ = ('replika', 'ditulis')
+
+    def __init__(self, replika, ditulis):
+        self.replika = replika
+        self.ditulis = ditulis
+
+
+class _Blok(ContextDecorator):
+    """Context manager/decorator untuk view sync maupun async (ContextVar ikut ke sync_to_async)."""
+
+    def __init__(self, replika):
+        self.replika = replika
+        self._token = None
+
+    def _recreate_cm(self):
+        # Instance baru per pemanggilan: decorator yang sama dipakai request yang berjalan bersamaan
+        return type(self)(self.replika)
+
+    def __enter__(self):
+        induk = _cakupan.get()
+        # Set model yang ditulis dibagi dengan blok luar supaya read-your-writes tetap berlaku
+        self._token = _cakupan.set(_Cakupan(self.replika, induk.ditulis if induk else set()))
+        return self
+
+    def __exit__(self, *exc):
+        _cakupan.reset(self._token)
+        return False
+
+    def __call__(self, func):
+        if not iscoroutinefunction(func):
+            return super().__call__(func)
+
+        @functools.wraps(func)
+        async def inner(*args, **kwargs):
+            with self._recreate_cm():
+                return await func(*args, **kwargs)
+        return inner
+
+
+def baca_replika():
+    return _Blok(True)
+
+
+def pakai_primary():
+    return _Blok(False)
+
+
+def lag_replika(alias=REPLICA):
+    """Lag replikasi (detik); None jika replikasi berhenti. 0 untuk backend tanpa replikasi (SQLite lokal)."""
+    conn = connections[alias]
+    if conn.vendor != 'mysql':
+        return 0
+    with conn.cursor() as cursor:
+        for sql in ('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS'):  # MySQL >= 8.0.22 / versi lama
+            try:
+                cursor.execute(sql)
+            except DatabaseError:
+                continue
+            row = cursor.fetchone()
+            if row is None:
+                # Bukan replika (mis. dua schema di server yang sama untuk pengujian lokal)
+                return 0
+            status = dict(zip([kolom[0] for kolom in cursor.description], row))
+            return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return None
+
+
+def replika_sehat(alias=REPLICA):
+    if alias not in connections.settings:
+        return False
+    sekarang = time.monotonic()
+    cek = _status.get(alias)
+    if cek and sekarang - cek[0] < settings.DATABASE_REPLICA_CEK_INTERVAL:
+        return cek[1]
+
+    try:
+        lag = lag_replika(alias)
+        error = None
+    except DatabaseError as exc:
+        lag, error = None, str(exc)
+    sehat = lag is not None and lag <= settings.DATABASE_REPLICA_LAG_MAKS
+    if not sehat:
+        logger.warning(
+            "Replika tidak dipakai, baca laporan dari primary",
+            extra={'alias': alias, 'lag_detik': lag, 'error': error},
+        )
+    _status[alias] = (sekarang, sehat)
+    return sehat
+
+
+def alias_laporan():
+    """Alias untuk query laporan: replika jika sehat, selain itu primary."""
+    return REPLICA if replika_sehat() else DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        cakupan = _cakupan.get()
+        if cakupan is None or not cakupan.replika or model in cakupan.ditulis:
+            # Eksplisit primary: tanpa router Django memakai database asal instance
+            # (hints), jadi relasi objek dari replika akan ikut dibaca dari replika
+            return DEFAULT_DB_ALIAS
+        return alias_laporan()
+
+    def db_for_write(self, model, **hints):
+        cakupan = _cakupan.get()
+        if cakupan is not None:
+            cakupan.ditulis.add(model)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replika adalah salinan primary
+        return True
@@ -0,0 +1,200 @@
+"""
+Pipeline segmentasi pelanggan RFM (Recency, Frequency, Monetary).
+
+Nilai R/F/M dihitung dengan SATU grouped aggregate atas Transaksi sukses
+(Max tanggal, Count, Sum total per pelanggan), lalu diberi skor 1-5 berdasarkan
+batas kuintil dan dipetakan ke segmen. Hasil disimpan di tabel segmen_pelanggan.
+
+- Mode FULL menghitung ulang batas kuintil dan semua pelanggan (dijadwalkan malam).
+- Mode INKREMENTAL hanya memproses pelanggan yang transaksinya berubah
+  (Transaksi.updated_at) sejak proses terakhir, memakai batas kuintil proses FULL
+  terakhir agar skornya tetap sebanding.
+
+Task refresh_rfm_segments berjalan di dalam baca_replika. Mode INKREMENTAL tetap
+membaca dari primary, dan mulai DATABASE_REPLICA_LAG_MAKS detik sebelum proses
+terakhir: perubahan yang belum sampai ke replika saat proses itu berjalan ikut
+diproses ulang, bukan terlewat selamanya.
+"""
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import Pelanggan, Transaksi, SegmenPelanggan, ProsesSegmentasi, REVENUE_STATUSES
+from .routers import pakai_primary
+
+CHUNK_SIZE = 2000
+
+UPDATE_FIELDS = [
+    'transaksi_terakhir', 'recency_hari', 'frequency', 'monetary',
+    'r_score', 'f_score', 'm_score', 'segmen', 'diperbarui_pada',
+]
+
+
+def _aggregate(pelanggan_ids=None):
+    """Satu query GROUP BY pelanggan: transaksi terakhir, jumlah transaksi dan total belanja."""
+    qs = Transaksi.objects.filter(status_transaksi__in=REVENUE_STATUSES)
+    if pelanggan_ids is not None:
+        qs = qs.filter(idPelanggan_id__in=pelanggan_ids)
+    return (
+        qs.values('idPelanggan_id')
+        .annotate(terakhir=Max('tanggal'), frekuensi=Count('id'), nilai=Sum('total'))
+        .order_by()
+    )
+
+
+def _batas_kuintil(values):
+    """Empat titik potong (persentil 20/40/60/80) dari daftar nilai."""
+    if not values:
+        return []
+    values = sorted(values)
+    n = len(values)
+    return [values[min(n - 1, (n * k) // 5)] for k in (1, 2, 3, 4)]
+
+
+def _skor(batas, value, kebalikan=False):
+    """Skor 1-5 berdasarkan posisi value terhadap batas kuintil."""
+    posisi = bisect_left(batas, value)
+    return 5 - posisi if kebalikan else 1 + posisi
+
+
+def tentukan_segmen(r, f, m):
+    """Petakan skor R/F/M ke nama segmen."""
+    fm = (f + m) / 2
+    if r >= 4 and fm >= 4:
+        return 'CHAMPIONS'
+    if r >= 4 and f <= 1:
+        return 'BARU'
+    if r >= 3 and fm >= 3:
+        return 'LOYAL'
+    if r >= 3:
+        return 'POTENSIAL'
+    if fm >= 3:
+        return 'BERISIKO'
+    if r == 2:
+        return 'HIBERNASI'
+    return 'HILANG'
+
+
+def _recency_hari(terakhir, now):
+    return max((now - terakhir).days, 0)
+
+
+def _hitung_batas(rows, now):
+    return {
+        'recency': _batas_kuintil([_recency_hari(row['terakhir'], now) for row in rows]),
+        'frequency': _batas_kuintil([row['frekuensi'] for row in rows]),
+        'monetary': _batas_kuintil([float(row['nilai'] or 0) for row in rows]),
+    }
+
+
+def _segmen_dari_row(row, batas, now):
+    recency = _recency_hari(row['terakhir'], now)
+    monetary = row['nilai'] or 0
+    r = _skor(batas['recency'], recency, kebalikan=True)
+    f = _skor(batas['frequency'], row['frekuensi'])
+    m = _skor(batas['monetary'], float(monetary))
+    return SegmenPelanggan(
+        idPelanggan_id=row['idPelanggan_id'],
+        transaksi_terakhir=row['terakhir'],
+        recency_hari=recency,
+        frequency=row['frekuensi'],
+        monetary=monetary,
+        r_score=r, f_score=f, m_score=m,
+        segmen=tentukan_segmen(r, f, m),
+        diperbarui_pada=now,
+    )
+
+
+def _segmen_kosong(pelanggan_id, now):
+    return SegmenPelanggan(idPelanggan_id=pelanggan_id, segmen='BELUM_BELANJA', diperbarui_pada=now)
+
+
+def _upsert(objs):
+    """Insert atau update SegmenPelanggan dalam satu statement per batch."""
+    unique_fields = ['idPelanggan'] if connection.features.supports_update_conflicts_with_target else None
+    SegmenPelanggan.objects.bulk_create(
+        objs, batch_size=CHUNK_SIZE,
+        update_conflicts=True, unique_fields=unique_fields, update_fields=UPDATE_FIELDS,
+    )
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _refresh_full(now):
+    # Upsert per chunk, bukan hapus semua lalu isi ulang dalam satu transaksi: setiap
+    # statement memegang lock tulis SQLite sebentar saja, dan segmen lama tetap
+    # terbaca sampai diganti. Semua pelanggan diproses, jadi tidak ada baris sisa.
+    rows = list(_aggregate())
+    batas = _hitung_batas(rows, now)
+
+    dengan_transaksi = set()
+    for chunk in _chunks(rows, CHUNK_SIZE):
+        dengan_transaksi.update(row['idPelanggan_id'] for row in chunk)
+        _upsert([_segmen_dari_row(row, batas, now) for row in chunk])
+
+    tanpa_transaksi = [
+        pelanggan_id for pelanggan_id in Pelanggan.objects.values_list('id', flat=True)
+        if pelanggan_id not in dengan_transaksi
+    ]
+    for chunk in _chunks(tanpa_transaksi, CHUNK_SIZE):
+        _upsert([_segmen_kosong(pelanggan_id, now) for pelanggan_id in chunk])
+    return len(rows) + len(tanpa_transaksi), batas
+
+
+def _refresh_incremental(since, batas, now):
+    changed = set(
+        Transaksi.objects.filter(updated_at__gte=since)
+        .values_list('idPelanggan_id', flat=True).distinct()
+    )
+    # Pelanggan baru yang belum pernah disegmentasi
+    changed.update(Pelanggan.objects.filter(segmen_rfm__isnull=True).values_list('id', flat=True))
+
+    for chunk in _chunks(sorted(changed), CHUNK_SIZE):
+        rows = {row['idPelanggan_id']: row for row in _aggregate(chunk)}
+        _upsert([
+            _segmen_dari_row(rows[pid], batas, now) if pid in rows else _segmen_kosong(pid, now)
+            for pid in chunk
+        ])
+    return len(changed)
+
+
+def refresh_segments(full=False, now=None):
+    """
+    Jalankan pipeline RFM. Tanpa proses FULL sebelumnya, mode otomatis menjadi FULL.
+    Mengembalikan objek ProsesSegmentasi yang sudah selesai.
+    """
+    now = now or timezone.now()
+    proses_full_terakhir = (
+        ProsesSegmentasi.objects
+        .filter(mode='FULL', selesai_pada__isnull=False)
+        .order_by('-dimulai_pada').first()
+    )
+    proses_terakhir = (
+        ProsesSegmentasi.objects
+        .filter(selesai_pada__isnull=False)
+        .order_by('-dimulai_pada').first()
+    )
+    if proses_full_terakhir is None:
+        full = True
+
+    proses = ProsesSegmentasi.objects.create(mode='FULL' if full else 'INKREMENTAL', dimulai_pada=now)
+    if full:
+        jumlah, batas = _refresh_full(now)
+    else:
+        batas = proses_full_terakhir.batas_kuintil
+        since = proses_terakhir.dimulai_pada - timedelta(seconds=settings.DATABASE_REPLICA_LAG_MAKS)
+        with pakai_primary():
+            jumlah = _refresh_incremental(since, batas, now)
+
+    proses.jumlah_pelanggan = jumlah
+    proses.batas_kuintil = batas
+    proses.selesai_pada = timezone.now()
+    proses.save(update_fields=['jumlah_pelanggan', 'batas_kuintil', 'selesai_pada'])
+    return proses
@@ -1,10 +1,21 @@
-from django.db.models.signals import post_save, pre_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Transaksi, Notifikasi, Produk, Pelanggan
-from .tasks import send_notification_email, send_feedback_reminder, send_product_restock_broadcast, ADMIN_EMAIL_LIST # Import task Celery kita
+from django.urls import reverse
+from .models import Transaksi, Notifikasi, Produk, Kategori, Pelanggan, DiskonPelanggan
+from .pricing import invalidate_aturan
+from .caching import naikkan_versi_katalog
+from . import notifications
+from .instrumentation import terukur
+from .tasks import send_product_restock_broadcast, is_significant_restock, ADMIN_EMAIL_LIST # Import task Celery kita
+
+logger = logging.getLogger(__name__)
 
 # Gunakan decorator @receiver untuk mendengarkan sinyal
 @receiver(post_save, sender=Transaksi)
+@terukur
 def handle_transaction_update(sender, instance, created, **kwargs):
     """
     Handler yang dipanggil setelah objek Transaksi disimpan (dibuat atau diupdate).
@@ -18,31 +29,26 @@ def handle_transaction_update(sender, instance, created, **kwargs):
     pelanggan = instance.idPelanggan
     recipient_email = pelanggan.email
     pelanggan_name = pelanggan.nama_pelanggan
+    # Status sebelum save, di-set oleh capture_previous_transaction_state (pre_save)
+    prev_status = getattr(instance, '_previous_status', None)
+    link_url = reverse('core:order_detail', args=[instance.id])
     
     # ----------------------------------------------------
     # Skenario 1: Transaksi Baru Dibuat (Status Awal: DIPROSES)
     # ----------------------------------------------------
     if created:
-        subject = f"🥳 Transaksi Berhasil Dibuat (#ID{instance.id})"
-        message = (
-            f"Hai {pelanggan_name},\n\n"
-            f"Terima kasih telah berbelanja di UD. Barokah Jaya Beton.\n"
-            f"Nomor pesanan Anda adalah #{instance.id} dengan total Rp{instance.total}.\n"
-            f"Status saat ini: {instance.status_transaksi}.\n\n"
-            f"Segera lakukan pembayaran sebelum batas waktu berakhir!"
+        email = notifications.render(
+            'transaksi_dibuat', nama=pelanggan_name, transaksi_id=instance.id, total=instance.total,
+            status=instance.status_transaksi, link_url=link_url,
         )
         notification_type = "TRANSACTION_CREATED"
 
     # ----------------------------------------------------
-    # Skenario 2: Status Diubah menjadi SELESAI
+    # Skenario 2: Status Diubah menjadi SELESAI (hanya saat transisi, bukan setiap save)
     # ----------------------------------------------------
-    elif instance.status_transaksi == 'SELESAI':
-        subject = f"✅ Pesanan Anda Selesai dan Diterima! (#ID{instance.id})"
-        message = (
-            f"Hai {pelanggan_name},\n\n"
-            f"Pesanan Anda #{instance.id} telah berhasil diselesaikan.\n"
-            f"Kami harap Anda puas dengan produk kami. Jangan lupa berikan feedback Anda!\n\n"
-            f"Total Pembelian: Rp{instance.total}"
+    elif instance.status_transaksi == 'SELESAI' and prev_status != 'SELESAI':
+        email = notifications.render(
+            'transaksi_selesai', nama=pelanggan_name, transaksi_id=instance.id, total=instance.total, link_url=link_url,
         )
         notification_type = "TRANSACTION_COMPLETED"
 
@@ -56,7 +62,7 @@ def handle_transaction_update(sender, instance, created, **kwargs):
     Notifikasi.objects.create(
         idPelanggan=pelanggan,
         tipe_pesan=notification_type,
-        isi_pesan=message,
+        isi_pesan=email.pesan,
         is_read=False
     )
     
@@ -65,36 +71,27 @@ def handle_transaction_update(sender, instance, created, **kwargs):
     # ----------------------------------------------------
     if recipient_email:
         # Panggil task Celery menggunakan .delay()
-        send_notification_email.delay(subject, message, [recipient_email], link_url=f"/transaksi/{instance.id}")
-        print(f"Signal: Task Celery untuk Transaksi #{instance.id} dipicu.")
+        notifications.kirim(email, [recipient_email])
+        logger.info("Email transaksi diantrikan", extra={'transaksi_id': instance.id, 'tipe': notification_type})
     else:
-        print(f"Signal: Pelanggan #{pelanggan.id} tidak memiliki email, hanya simpan Notifikasi internal.")
+        logger.info("Pelanggan tanpa email, hanya Notifikasi internal", extra={'pelanggan_id': pelanggan.id})
 
-    # ------------------------------------------------------------------
-    # Tambahan: jika status berubah menjadi SELESAI, jadwalkan pengingat feedback
-    # Gunakan _previous_status yang di-set pada pre_save (jika tersedia)
-    prev_status = getattr(instance, '_previous_status', None)
-    if not created and prev_status is not None and prev_status != instance.status_transaksi and instance.status_transaksi == 'SELESAI':
-        reminder_subject = f"📝 Pengingat: Mohon Berikan Feedback untuk Pesanan #{instance.id}"
-        reminder_message = (
-            f"Hai {pelanggan.nama_pelanggan},\n\nTerima kasih telah berbelanja. Mohon luangkan waktu untuk memberikan feedback untuk pesanan Anda #{instance.id}."
-        )
-        # schedule after 3 days = 259200 seconds
-        send_feedback_reminder.apply_async(countdown=259200, args=[instance.id, reminder_subject, reminder_message, [recipient_email], f"/feedback/{instance.id}"])
-        print(f"Signal: Pengingat feedback dijadwalkan untuk Transaksi #{instance.id} (3 hari).")
+    # Pengingat feedback tidak lagi dijadwalkan di sini (countdown 3 hari menumpuk di broker);
+    # sweep periodik tasks.sweep_feedback_reminders memakai selesai_at yang di-set Transaksi.save().
 
     # ------------------------------------------------------------------
     # Notifikasi Admin: jika transaksi baru dibuat atau status berubah menjadi DIPROSES
     if created or (prev_status is not None and prev_status != instance.status_transaksi and instance.status_transaksi == 'DIPROSES'):
-        admin_subject = f"📥 Transaksi Baru / Perlu Proses: #{instance.id}"
-        admin_message = (
-            f"Transaksi #{instance.id} oleh {pelanggan.nama_pelanggan} memerlukan perhatian."
+        admin_email = notifications.render(
+            'admin_transaksi_baru', nama=pelanggan.nama_pelanggan, transaksi_id=instance.id,
+            link_url=reverse('penjualan_admin:core_transaksi_change', args=[instance.id]),
         )
-        send_notification_email.delay(admin_subject, admin_message, ADMIN_EMAIL_LIST, link_url=f"/admin/core/transaksi/{instance.id}/change/")
-        print(f"Signal: Notifikasi admin dikirim untuk Transaksi #{instance.id}.")
+        notifications.kirim(admin_email, ADMIN_EMAIL_LIST)
+        logger.info("Notifikasi admin diantrikan", extra={'transaksi_id': instance.id})
 
 
 @receiver(pre_save, sender=Transaksi)
+@terukur
 def capture_previous_transaction_state(sender, instance, **kwargs):
     """Simpan status dan bukti_bayar sebelumnya pada instance sebelum disimpan."""
     if not instance.pk:
@@ -112,6 +109,7 @@ def capture_previous_transaction_state(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=Transaksi)
+@terukur
 def handle_bukti_upload_and_admin_notification(sender, instance, created, **kwargs):
     """Receiver tambahan untuk mendeteksi unggahan bukti_bayar dan mengirim notifikasi ke admin dan pelanggan."""
     prev_bukti = getattr(instance, '_previous_bukti_bayar', None)
@@ -119,20 +117,23 @@ def handle_bukti_upload_and_admin_notification(sender, instance, created, **kwar
     if instance.bukti_bayar and not prev_bukti:
         # Notifikasi konfirmasi ke pelanggan
         if instance.idPelanggan and instance.idPelanggan.email:
-            subject_cust = f"📩 Bukti Pembayaran Diterima untuk Pesanan #{instance.id}"
-            message_cust = (
-                f"Hai {instance.idPelanggan.nama_pelanggan},\n\nTerima kasih. Bukti pembayaran untuk pesanan #{instance.id} telah kami terima dan akan diverifikasi oleh tim."
+            email_cust = notifications.render(
+                'bukti_pembayaran_diterima', nama=instance.idPelanggan.nama_pelanggan, transaksi_id=instance.id,
+                link_url=reverse('core:order_detail', args=[instance.id]),
             )
-            send_notification_email.delay(subject_cust, message_cust, [instance.idPelanggan.email], link_url=f"/transaksi/{instance.id}")
+            notifications.kirim(email_cust, [instance.idPelanggan.email])
 
         # Notifikasi ke admin agar segera verifikasi
-        admin_subject = f"🔔 Bukti Pembayaran Siap Diverifikasi: Pesanan #{instance.id}"
-        admin_message = f"Bukti pembayaran untuk transaksi #{instance.id} telah diupload dan siap diverifikasi."
-        send_notification_email.delay(admin_subject, admin_message, ADMIN_EMAIL_LIST, link_url=f"/admin/core/transaksi/{instance.id}/change/")
-        print(f"Signal: Notifikasi bukti bayar dikirim untuk Transaksi #{instance.id}.")
+        admin_email = notifications.render(
+            'admin_bukti_pembayaran', transaksi_id=instance.id,
+            link_url=reverse('penjualan_admin:core_transaksi_change', args=[instance.id]),
+        )
+        notifications.kirim(admin_email, ADMIN_EMAIL_LIST)
+        logger.info("Notifikasi bukti bayar diantrikan", extra={'transaksi_id': instance.id})
 
 
 @receiver(pre_save, sender=Produk)
+@terukur
 def capture_previous_product_stock(sender, instance, **kwargs):
     if not instance.pk:
         instance._previous_stok = None
@@ -145,9 +146,37 @@ def capture_previous_product_stock(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=Produk)
+@terukur
 def handle_product_restock(sender, instance, created, **kwargs):
     prev_stok = getattr(instance, '_previous_stok', None)
     # Jika terjadi restock signifikan: dari <5 ke >10
-    if prev_stok is not None and prev_stok < 5 and instance.stok_produk > 10:
-        send_product_restock_broadcast.delay(instance.id, link_url=f"/produk/{instance.id}")
-        print(f"Signal: Broadcast restock dijadwalkan untuk Produk #{instance.id}.")
\ No newline at end of file
+    if is_significant_restock(prev_stok, instance.stok_produk):
+        send_product_restock_broadcast.delay(instance.id)
+        logger.info("Broadcast restock dijadwalkan", extra={'produk_id': instance.id})
+
+
+# ----------------------------------------------------------------------
+# Cache aturan harga (core/pricing.py): buang saat data diskon pelanggan berubah.
+# Operasi massal (kampanye, delete dari admin) membatalkan cache lewat invalidate_aturan().
+@receiver(post_save, sender=Pelanggan)
+@terukur
+def invalidate_pricing_on_pelanggan_save(sender, instance, **kwargs):
+    invalidate_aturan([instance.id])
+
+
+@receiver(post_save, sender=DiskonPelanggan)
+@terukur
+def invalidate_pricing_on_diskon_save(sender, instance, **kwargs):
+    invalidate_aturan([instance.idPelanggan_id])
+
+
+# ----------------------------------------------------------------------
+# Versi katalog untuk ETag halaman katalog (core/caching.py). Dinaikkan setelah commit:
+# request di antara save dan commit tidak boleh menyimpan data lama dengan versi baru.
+@receiver(post_save, sender=Produk)
+@receiver(post_delete, sender=Produk)
+@receiver(post_save, sender=Kategori)
+@receiver(post_delete, sender=Kategori)
+@terukur
+def invalidate_katalog(sender, **kwargs):
+    transaction.on_commit(naikkan_versi_katalog)
@@ -1,58 +1,92 @@
+import logging
+
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
+from django.urls import reverse
 from datetime import date, timedelta
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Q, Sum
+from barokah.database import atomic_tulis
 # Import model yang dibutuhkan
-from .models import Pelanggan, Transaksi, Produk
+from .instrumentation import catat_email, terukur
+from .jobs import tugas_terjadwal, RIWAYAT_RETENSI_HARI
+from .mailer import (
+    EMAIL_MAX_RETRIES, SEMENTARA, SMTPGangguan, buat_email, catat_email_gagal, error_per_pesan, hitung_backoff,
+    klasifikasi_error, normalisasi_item, smtp_sedang_gangguan, tambah_link, tandai_gangguan_smtp,
+)
+from . import notifications
+from .models import Pelanggan, Transaksi, Produk, RiwayatTugas, ProfilRequest
 
 # Placeholder admin email list sesuai permintaan
+logger = logging.getLogger(__name__)
+
 ADMIN_EMAIL_LIST = ['admin@barokah.com']
 
 # --- TASK EMAIL DASAR ---
-@shared_task(bind=True) # Menggunakan bind=True agar bisa mengakses self.retry
-def send_notification_email(self, subject, message, recipient_list, link_url=None, link_text="Lihat Detail"):
+def _retry_atau_dead_letter(task, exc, items, **retry_kwargs):
+    """
+    Error SEMENTARA di-retry dengan backoff sampai max_retries, lalu (seperti
+    error PERMANEN) email-email di items disimpan ke dead letter EmailGagal.
+    """
+    percobaan = task.request.retries + 1
+    if klasifikasi_error(exc) == SEMENTARA and task.request.retries < task.max_retries:
+        raise task.retry(exc=exc, countdown=hitung_backoff(task.request.retries), **retry_kwargs)
+    catat_email_gagal(items, exc, percobaan)
+
+
+@shared_task(bind=True, max_retries=EMAIL_MAX_RETRIES) # Menggunakan bind=True agar bisa mengakses self.retry
+@terukur
+def send_notification_email(self, subject, message, recipient_list, link_url=None, link_text="Lihat Detail", html_message=None):
     """
     Tugas Celery untuk mengirim email notifikasi.
     
     Argumen:
     - subject (str): Subjek email.
-    - message (str): Isi pesan email.
+    - message (str): Isi pesan email (teks).
     - recipient_list (list): Daftar alamat email penerima.
+    - html_message (str): Versi HTML (multipart), lihat core/notifications.py.
+
+    Kebijakan retry dan dead letter: lihat core/mailer.py.
     """
     
     # Ambil email pengirim dari settings.py
     from_email = settings.DEFAULT_FROM_EMAIL
     
     try:
-        # Jika link disediakan, tambahkan format hyperlink sederhana ke message
-        if link_url:
-            message_with_link = f"{message}\n\n[Link: {link_text}]({link_url})"
-        else:
-            message_with_link = message
+        # SMTP baru saja down: tunda tanpa membuka koneksi baru
+        if smtp_sedang_gangguan():
+            raise SMTPGangguan("SMTP sedang gangguan, pengiriman ditunda")
 
         # Panggil fungsi send_mail bawaan Django
         send_mail(
             subject,
-            message_with_link,
+            tambah_link(message, link_url, link_text),
             from_email,
             recipient_list,
             fail_silently=False,
+            html_message=html_message,
         )
         # Log di worker terminal jika pengiriman berhasil
-        print(f"✅ Email berhasil dikirim ke {recipient_list} dengan subjek: {subject}")
+        # Jumlah penerima saja: alamat email tidak masuk log
+        logger.info("Email terkirim", extra={'penerima': len(recipient_list), 'subject': subject})
         return "Email sent successfully"
         
     except Exception as e:
         # Log error jika pengiriman gagal
-        print(f"❌ Gagal mengirim email ke {recipient_list}. Error: {e}")
-        # Celery akan mencoba ulang (retry) jika terjadi error
-        raise self.retry(exc=e, countdown=60) # Coba lagi 60 detik kemudian
+        logger.warning("Gagal mengirim email", extra={'penerima': len(recipient_list), 'error': str(e)})
+        tandai_gangguan_smtp(e)
+        _retry_atau_dead_letter(self, e, [{
+            'subject': subject, 'message': message, 'recipient_list': recipient_list,
+            'link_url': link_url, 'link_text': link_text, 'html_message': html_message,
+        }])
 
 # --- TASK TERJADWAL (CELERY BEAT) ---
 
 @shared_task
+@terukur
+@tugas_terjadwal(jendela=300)
 def check_payment_deadlines():
     """
     Memeriksa transaksi yang telah melewati batas waktu pembayaran
@@ -69,7 +103,7 @@ def check_payment_deadlines():
 
     count = expired_transactions.count()
     if count > 0:
-        print(f"🚨 Ditemukan {count} transaksi yang melewati batas waktu pembayaran. Membatalkan...")
+        logger.info("Membatalkan transaksi yang melewati batas waktu pembayaran", extra={'jumlah': count})
         
         for transaksi in expired_transactions:
             # Mengubah status menjadi DIBATALKAN
@@ -77,23 +111,22 @@ def check_payment_deadlines():
             transaksi.save() # Panggilan save() ini akan memicu notifikasi perubahan status
             
             # Mengirim notifikasi pembatalan
-            subject = f"❌ Pesanan Dibatalkan Otomatis #{transaksi.id} (Barokah Beton)"
-            message = (
-                f"Hai {transaksi.idPelanggan.nama_pelanggan},\n\n"
-                f"Pesanan Anda dengan nomor **#{transaksi.id}** telah dibatalkan secara otomatis "
-                f"karena melewati batas waktu pembayaran ({transaksi.batas_waktu_bayar.strftime('%d %b %Y %H:%M:%S')}).\n\n"
-                f"Anda dapat membuat pesanan baru melalui website kami."
+            email = notifications.render(
+                'pembatalan_otomatis', nama=transaksi.idPelanggan.nama_pelanggan, transaksi_id=transaksi.id,
+                batas_waktu=transaksi.batas_waktu_bayar, link_url=reverse('core:order_detail', args=[transaksi.id]),
             )
             
             # Memanggil tugas Celery untuk mengirim email
-            send_notification_email.delay(subject, message, [transaksi.idPelanggan.email], link_url=f"/transaksi/{transaksi.id}")
-            
-        print("✅ Proses pembatalan otomatis selesai.")
+            notifications.kirim(email, [transaksi.idPelanggan.email])
+
     else:
-        print("✅ Tidak ada transaksi yang perlu dibatalkan hari ini.")
+        logger.info("Tidak ada transaksi yang perlu dibatalkan")
+    return count
 
 
 @shared_task
+@terukur
+@tugas_terjadwal(jendela=3600)
 def disable_birthday_discounts():
     """
     Memeriksa pelanggan yang diskon ulang tahunnya sudah aktif lebih dari 24 jam 
@@ -111,12 +144,15 @@ def disable_birthday_discounts():
     count = expired_discounts.update(is_birthday_discount_active=False, birthday_discount_activated_at=None)
     
     if count > 0:
-        print(f"😴 Menonaktifkan {count} diskon ulang tahun yang sudah kedaluwarsa.")
+        logger.info("Diskon ulang tahun kedaluwarsa dinonaktifkan", extra={'jumlah': count})
     else:
-        print("✅ Tidak ada diskon ulang tahun yang kedaluwarsa hari ini.")
+        logger.info("Tidak ada diskon ulang tahun yang kedaluwarsa")
+    return count
 
 
 @shared_task
+@terukur
+@tugas_terjadwal(jendela=86400)
 def send_birthday_greetings():
     """
     Memeriksa pelanggan yang berulang tahun hari ini, menghitung loyalitas, 
@@ -132,7 +168,7 @@ def send_birthday_greetings():
 
     count = birthday_pelanggan_list.count()
     if count > 0:
-        print(f"🥳 Ditemukan {count} pelanggan yang berulang tahun hari ini. Mengirim ucapan...")
+        logger.info("Mengirim ucapan ulang tahun", extra={'jumlah': count})
         
         for pelanggan in birthday_pelanggan_list:
             
@@ -147,33 +183,14 @@ def send_birthday_greetings():
             pelanggan.total_riwayat_belanja = total_spent
 
             # --- 2. TENTUKAN DISKON DAN PESAN ---
-            diskon_persentase = 0
-            pesan_loyalitas = ""
-            
-            # Skenario 2: Pelanggan Loyal (Total Belanja >= Rp 5 Juta)
-            if total_spent >= 5000000: 
-                diskon_persentase = 10
-                pesan_loyalitas = (
-                    f"🎉 Selamat! Karena total riwayat belanja Anda mencapai Rp{total_spent:,.0f}, "
-                    f"Anda mendapatkan **Diskon Loyalitas Tambahan sebesar 10%** untuk semua produk "
-                    f"selama 24 jam ke depan! Diskon ini akan otomatis terhitung di keranjang Anda."
-                )
-            # Skenario 1: Ulang Tahun Biasa (Potongan 5 Juta)
-            else: 
-                pesan_loyalitas = (
-                    "🎁 Selamat Ulang Tahun! Anda berhak mendapatkan **Potongan Harga Spesial** "
-                    "jika total belanja Anda di keranjang saat ini mencapai Rp5 Juta. "
-                    "Segera kunjungi website kami untuk mengklaimnya dalam 24 jam ini!"
-                )
+            # Skenario 2: Pelanggan Loyal (Total Belanja >= Rp 5 Juta) -> diskon loyalitas 10%
+            # Skenario 1: Ulang Tahun Biasa (Potongan 5 Juta), lihat template core/email/ulang_tahun.txt
+            email = notifications.render(
+                'ulang_tahun', nama=pelanggan.nama_pelanggan, loyal=total_spent >= 5000000,
+                total_belanja=f"{total_spent:,.0f}", link_url=reverse('core:products'),
+            )
             
             # --- 3. AKTIFKAN DISKON DAN KIRIM EMAIL ---
-            subject = f"🥳 Selamat Ulang Tahun & Klaim Diskon Anda, {pelanggan.nama_pelanggan}!"
-            message = (
-                f"Hai {pelanggan.nama_pelanggan},\n\n"
-                f"Segenap tim UD. Barokah Jaya Beton mengucapkan selamat ulang tahun! Semoga panjang umur dan sukses selalu.\n\n"
-                f"{pesan_loyalitas}\n\n"
-                f"Terima kasih telah menjadi pelanggan setia kami."
-            )
 
             # Aktifkan flag diskon
             pelanggan.is_birthday_discount_active = True
@@ -182,34 +199,41 @@ def send_birthday_greetings():
             pelanggan.save() 
             
             # Memanggil tugas Celery untuk mengirim email
-            send_notification_email.delay(subject, message, [pelanggan.email], link_url=f"/pelanggan/{pelanggan.id}")
-
-        print("✅ Proses pengiriman ucapan ulang tahun dan aktivasi diskon selesai.")
+            notifications.kirim(email, [pelanggan.email])
     else:
-        print("✅ Tidak ada pelanggan yang berulang tahun hari ini.")
+        logger.info("Tidak ada pelanggan yang berulang tahun hari ini")
+    return count
 
 
 @shared_task
+@terukur
 def send_feedback_reminder(transaksi_pk, subject, message, recipient_list, link_url=None):
     """
     Tugas yang dijadwalkan untuk mengingatkan pelanggan memberikan feedback.
     Memeriksa apakah feedback masih kosong sebelum mengirim.
+
+    Tidak lagi dijadwalkan (diganti sweep_feedback_reminders); tetap ada agar
+    task ber-ETA yang sudah antre di broker masih bisa dieksekusi.
     """
     try:
         transaksi = Transaksi.objects.get(pk=transaksi_pk)
     except Transaksi.DoesNotExist:
-        print(f"⚠️ Transaksi #{transaksi_pk} tidak ditemukan. Membatalkan pengingat feedback.")
+        logger.warning("Transaksi tidak ditemukan, pengingat feedback dibatalkan", extra={'transaksi_id': transaksi_pk})
         return
 
     # Cek apakah feedback tetap kosong
-    if not transaksi.feedback:
+    if not transaksi.feedback and not transaksi.is_feedback_reminder_sent:
+        Transaksi.objects.filter(pk=transaksi_pk).update(is_feedback_reminder_sent=True)
+        catat_email()
         send_notification_email.delay(subject, message, recipient_list, link_url=link_url)
-        print(f"✅ Pengingat feedback dikirim untuk Transaksi #{transaksi_pk} ke {recipient_list}")
+        logger.info("Pengingat feedback dikirim", extra={'transaksi_id': transaksi_pk})
     else:
-        print(f"ℹ️ Transaksi #{transaksi_pk} sudah memiliki feedback, tidak mengirim pengingat.")
+        logger.info("Transaksi sudah memiliki feedback, pengingat dilewati", extra={'transaksi_id': transaksi_pk})
 
 
 @shared_task
+@terukur
+@tugas_terjadwal(jendela=3600)
 def check_and_send_payment_reminder():
     """
     Mencari transaksi yang akan jatuh tempo dalam 1 hingga 24 jam dan belum diberi reminder.
@@ -225,20 +249,32 @@ def check_and_send_payment_reminder():
         is_payment_reminder_sent=False
     ).exclude(idPelanggan__email__isnull=True).exclude(idPelanggan__email__exact='')
 
+    count = 0
     for t in candidates:
-        subject = f"⏰ Pengingat Pembayaran: Pesanan #{t.id}"
-        message = (
-            f"Hai {t.idPelanggan.nama_pelanggan},\n\n"
-            f"Pesanan Anda dengan nomor #{t.id} akan jatuh tempo pada {t.batas_waktu_bayar.strftime('%d %b %Y %H:%M:%S')}.\n"
-            f"Silakan lakukan pembayaran sebelum batas waktu untuk menghindari pembatalan.")
-
-        send_notification_email.delay(subject, message, [t.idPelanggan.email], link_url=f"/pembayaran/{t.id}")
+        email = notifications.render(
+            'pengingat_pembayaran', nama=t.idPelanggan.nama_pelanggan, transaksi_id=t.id,
+            batas_waktu=t.batas_waktu_bayar, link_url=reverse('core:payment_upload', args=[t.id]),
+        )
+        notifications.kirim(email, [t.idPelanggan.email])
         t.is_payment_reminder_sent = True
         t.save(update_fields=['is_payment_reminder_sent'])
-        print(f"✅ Pengingat pembayaran dikirim untuk Transaksi #{t.id}")
+        logger.info("Pengingat pembayaran dikirim", extra={'transaksi_id': t.id})
+        count += 1
+    return count
+
+
+# Restock signifikan: stok naik dari di bawah batas rendah ke di atas batas tinggi
+RESTOCK_LOW_THRESHOLD = 5
+RESTOCK_HIGH_THRESHOLD = 10
+
+
+def is_significant_restock(prev_stok, new_stok):
+    """True jika perubahan stok layak diumumkan ke pelanggan (dari <5 ke >10)."""
+    return prev_stok is not None and prev_stok < RESTOCK_LOW_THRESHOLD and new_stok > RESTOCK_HIGH_THRESHOLD
 
 
 @shared_task
+@terukur
 def send_product_restock_broadcast(product_pk, link_url=None):
     """
     Mengirim broadcast email ke semua pelanggan bahwa produk telah di-restock.
@@ -246,29 +282,34 @@ def send_product_restock_broadcast(product_pk, link_url=None):
     try:
         product = Produk.objects.get(pk=product_pk)
     except Produk.DoesNotExist:
-        print(f"⚠️ Produk #{product_pk} tidak ditemukan. Broadcast dibatalkan.")
+        logger.warning("Produk tidak ditemukan, broadcast restock dibatalkan", extra={'produk_id': product_pk})
         return
 
-    pelanggan_list = Pelanggan.objects.exclude(email__isnull=True).exclude(email__exact='')
-    recipient_emails = [p.email for p in pelanggan_list]
-
-    subject = f"🛍️ Produk Kembali Tersedia: {product.nama_produk}"
-    message = (
-        f"Hai,\n\nProduk '{product.nama_produk}' telah tersedia kembali di toko kami.\n"
-        f"Segera kunjungi halaman produk untuk melakukan pembelian."
+    pelanggan_list = list(
+        Pelanggan.objects.exclude(email__isnull=True).exclude(email__exact='').values_list('nama_pelanggan', 'email')
     )
+    recipient_emails = [email for _, email in pelanggan_list]
 
     if recipient_emails:
-        send_notification_email.delay(subject, message, recipient_emails, link_url=link_url or f"/produk/{product.id}")
+        # Satu email per pelanggan (bukan satu email dengan semua pelanggan di To), dikirim per kelompok
+        emails = notifications.render_massal(
+            'restock_produk', ({'nama': nama} for nama, _ in pelanggan_list),
+            umum={'produk': product.nama_produk, 'link_url': link_url or reverse('core:product_detail', args=[product.id])},
+        )
+        notifications.kirim_massal([
+            notifications.item_email(email, [alamat]) for email, alamat in zip(emails, recipient_emails)
+        ])
         # Update trigger date
         product.last_restock_trigger_date = timezone.now()
         product.save(update_fields=['last_restock_trigger_date'])
-        print(f"✅ Broadcast restock dikirim untuk Produk #{product_pk} ke {len(recipient_emails)} pelanggan")
+        logger.info("Broadcast restock dikirim", extra={'produk_id': product_pk, 'penerima': len(recipient_emails)})
     else:
-        print("ℹ️ Tidak ada pelanggan dengan email, broadcast restock dilewatkan.")
+        logger.info("Tidak ada pelanggan dengan email, broadcast restock dilewati")
 
 
 @shared_task
+@terukur
+@tugas_terjadwal(jendela=86400)
 def check_for_low_stock():
     """
     Mencari produk dengan stok di bawah threshold dan mengirim ringkasan ke admin.
@@ -277,15 +318,358 @@ def check_for_low_stock():
     low_products = Produk.objects.filter(stok_produk__lt=LOW_STOCK_THRESHOLD)
 
     if not low_products.exists():
-        print("✅ Tidak ada produk dengan stok rendah hari ini.")
+        logger.info("Tidak ada produk dengan stok rendah")
+        return 0
+
+    produk = [
+        {
+            'nama_produk': p.nama_produk, 'id': p.id, 'stok_produk': p.stok_produk,
+            'url': notifications.absolut(reverse('penjualan_admin:core_produk_change', args=[p.id])),
+        }
+        for p in low_products
+    ]
+    email = notifications.render(
+        'admin_stok_rendah', produk=produk, link_url=reverse('penjualan_admin:core_produk_changelist'),
+    )
+
+    notifications.kirim(email, ADMIN_EMAIL_LIST)
+    logger.info("Laporan stok rendah dikirim ke admin", extra={'produk': len(produk)})
+    return len(produk)
+
+@shared_task
+@terukur
+@tugas_terjadwal(jendela=86400)
+def rebuild_product_recommendations():
+    """
+    Job malam: hitung ulang matriks "Sering dibeli bersama" dan top-N rekomendasi
+    per pelanggan dari DetailTransaksi (lihat core/recommendations.py).
+    """
+    from .recommendations import rebuild_recommendations
+    from .routers import baca_replika
+
+    # DetailTransaksi dibaca dari replika; tabel rekomendasi tetap ditulis ke primary
+    with baca_replika():
+        total_produk, total_pelanggan = rebuild_recommendations()
+    logger.info("Rekomendasi diperbarui", extra={'baris_produk': total_produk, 'baris_pelanggan': total_pelanggan})
+    return total_produk + total_pelanggan
+
+
+@shared_task
+@terukur
+@tugas_terjadwal(jendela=3600)
+def refresh_rfm_segments(full=False):
+    """
+    Perbarui segmentasi RFM pelanggan. Mode inkremental (default) hanya memproses
+    pelanggan yang transaksinya berubah sejak proses terakhir.
+    """
+    from .routers import baca_replika
+    from .segmentation import refresh_segments
+
+    with baca_replika():
+        proses = refresh_segments(full=full)
+    logger.info("Segmentasi RFM selesai", extra={'mode': proses.mode, 'jumlah': proses.jumlah_pelanggan})
+    return proses.jumlah_pelanggan
+
+
+@shared_task
+@terukur
+@tugas_terjadwal(jendela=3600)
+def expire_discount_campaigns():
+    """
+    Mengakhiri kampanye diskon yang sudah melewati berlaku_sampai
+    (satu UPDATE per kampanye, lihat core/campaigns.py).
+    """
+    from .campaigns import akhiri_kampanye_kedaluwarsa
+
+    count = akhiri_kampanye_kedaluwarsa()
+    logger.info("Diskon dari kampanye kedaluwarsa dinonaktifkan", extra={'jumlah': count})
+    return count
+
+
+
+@shared_task
+@terukur
+def send_restock_digest(product_pks):
+    """
+    Satu broadcast untuk banyak produk yang di-restock sekaligus (mis. hasil import
+    katalog), sebagai ganti satu broadcast per produk.
+    """
+    products = list(Produk.objects.filter(pk__in=product_pks).order_by('nama_produk'))
+    if not products:
+        logger.info("Tidak ada produk restock yang ditemukan, broadcast dibatalkan")
+        return
+
+    pelanggan_list = list(
+        Pelanggan.objects.exclude(email__isnull=True).exclude(email__exact='').values_list('nama_pelanggan', 'email')
+    )
+    recipient_emails = [email for _, email in pelanggan_list]
+    if not recipient_emails:
+        logger.info("Tidak ada pelanggan dengan email, broadcast restock dilewati")
         return
 
-    lines = []
-    for p in low_products:
-        lines.append(f"{p.nama_produk} (ID:{p.id}) - Stok: {p.stok_produk} -> /admin/core/produk/{p.id}/change/")
+    emails = notifications.render_massal(
+        'restock_digest', ({'nama': nama} for nama, _ in pelanggan_list),
+        umum={'produk': [p.nama_produk for p in products], 'link_url': reverse('core:products')},
+    )
+    notifications.kirim_massal([
+        notifications.item_email(email, [alamat]) for email, alamat in zip(emails, recipient_emails)
+    ])
+    Produk.objects.filter(pk__in=[p.pk for p in products]).update(last_restock_trigger_date=timezone.now())
+    logger.info("Digest restock dikirim", extra={'produk': len(products), 'penerima': len(recipient_emails)})
 
-    subject = "⚠️ Laporan Stok Rendah - Barokah"
-    message = "Produk dengan stok rendah:\n\n" + "\n".join(lines)
 
-    send_notification_email.delay(subject, message, ADMIN_EMAIL_LIST, link_url="/admin/core/produk/")
-    print(f"✅ Laporan stok rendah dikirim ke admin ({len(ADMIN_EMAIL_LIST)} penerima).")
\ No newline at end of file
+@shared_task(bind=True)
+@terukur
+def import_data_file(self, resource_name, file_path, file_format='csv'):
+    """
+    Import file besar (mis. daftar harga supplier 20 ribu baris) di worker, bukan di request.
+    Progress dilaporkan lewat state PROGRESS: {'current': baris, 'total': total_baris}.
+    """
+    from django.core.files.storage import default_storage
+    from import_export.formats.base_formats import DEFAULT_FORMATS
+    from .resources import RESOURCES
+
+    try:
+        input_format = next(f for f in DEFAULT_FORMATS if f().get_title() == file_format.lower())()
+        with default_storage.open(file_path, 'rb') as f:
+            content = f.read()
+        if not input_format.is_binary():
+            content = content.decode('utf-8-sig')
+        dataset = input_format.create_dataset(content)
+        total = len(dataset)
+
+        resource = RESOURCES[resource_name]()
+        resource.progress_callback = lambda current: self.update_state(
+            state='PROGRESS', meta={'current': current, 'total': total}
+        )
+        self.update_state(state='PROGRESS', meta={'current': 0, 'total': total})
+        with atomic_tulis():
+            result = resource.import_data(dataset, dry_run=False, use_transactions=True)
+    finally:
+        # File upload tidak ditinggal di storage walau file rusak atau import gagal
+        default_storage.delete(file_path)
+
+    summary = {
+        'total': total,
+        'totals': dict(result.totals),
+        'errors': [str(err.error) for err in result.base_errors][:20],
+        'invalid_rows': [row.number for row in result.invalid_rows][:20],
+        'restocked': getattr(resource, 'restocked_ids', []),
+    }
+    logger.info("Import selesai", extra={'resource': resource_name, 'totals': summary['totals']})
+    return summary
+
+
+@shared_task
+@terukur
+def export_transaksi_file(mulai=None, sampai=None, statuses=None, file_format='csv', recipient_list=None):
+    """
+    Ekspor transaksi di background: file ditulis ke storage privat (folder
+    exports/) lalu admin diberi email berisi tautan unduhan bertanda tangan
+    yang hanya bisa dibuka staff (lihat core/exports.py).
+    Tanggal dikirim sebagai string ISO (YYYY-MM-DD) agar bisa diserialisasi Celery.
+    """
+    import tempfile
+    from django.core.files import File
+    from . import exports
+
+    mulai = date.fromisoformat(mulai) if mulai else None
+    sampai = date.fromisoformat(sampai) if sampai else None
+    rows = exports.iter_rows(exports.export_queryset(mulai, sampai, statuses))
+
+    if file_format == 'xlsx':
+        tmp = exports.xlsx_tempfile(rows)
+    else:
+        tmp = tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8')
+        exports.write_csv(rows, tmp)
+        tmp.seek(0)
+    with tmp:
+        path = exports.storage_ekspor().save(
+            f"{exports.EKSPOR_DIR}/{exports.export_filename(file_format, mulai, sampai)}", File(tmp),
+        )
+
+    email = notifications.render(
+        'admin_ekspor_siap', mulai=mulai, sampai=sampai, link_url=reverse('penjualan_admin:core_transaksi_export_download', args=[exports.token_unduhan(path)]),
+    )
+    notifications.kirim(email, recipient_list or ADMIN_EMAIL_LIST)
+    logger.info("Ekspor transaksi disimpan", extra={'path': path})
+    return path
+
+
+@shared_task
+@terukur
+def render_invoice_pdf(transaksi_id, force=False):
+    """
+    Render invoice PDF di worker (bukan di request). Hasil disimpan
+    content-addressed di storage, lihat core/invoices.py.
+    """
+    from .invoices import generate_invoice, invoice_queryset, tandai_render_selesai
+
+    try:
+        transaksi = invoice_queryset().get(pk=transaksi_id)
+    except Transaksi.DoesNotExist:
+        logger.warning("Transaksi tidak ditemukan, invoice dibatalkan", extra={'transaksi_id': transaksi_id})
+        tandai_render_selesai(transaksi_id)
+        return None
+
+    try:
+        path, dibuat = generate_invoice(transaksi, force=force)
+    except Exception as exc:
+        # Halaman unduhan menampilkan error ini, bukan memuat ulang tanpa akhir
+        tandai_render_selesai(transaksi_id, error=exc)
+        logger.exception("Render invoice gagal", extra={'transaksi_id': transaksi_id})
+        raise
+    tandai_render_selesai(transaksi_id)
+    if dibuat:
+        logger.info("Invoice dibuat", extra={'transaksi_id': transaksi_id, 'path': path})
+    return path
+
+
+@shared_task(bind=True, max_retries=EMAIL_MAX_RETRIES)
+@terukur
+def send_notification_emails_batch(self, messages):
+    """
+    Kirim banyak email notifikasi lewat SATU koneksi SMTP.
+    messages: list item (dict dari notifications.item_email, lihat mailer.normalisasi_item).
+    Dipakai perubahan status massal dan kirim ulang dead letter sebagai ganti
+    satu task per pesanan. Email yang ditolak permanen masuk dead letter tanpa
+    menghentikan kelompoknya; jika koneksi gagal, hanya email yang belum
+    terkirim yang di-retry.
+    """
+    from django.core.mail import get_connection
+
+    sent, ditolak, sisa = 0, [], messages
+    try:
+        if smtp_sedang_gangguan():
+            raise SMTPGangguan("SMTP sedang gangguan, pengiriman ditunda")
+        with get_connection() as connection:
+            while sisa:
+                item = sisa[0]
+                try:
+                    connection.send_messages([buat_email(item)])
+                    sent += 1
+                except Exception as e:
+                    if not error_per_pesan(e):
+                        raise
+                    ditolak.append((item, e))
+                sisa = sisa[1:]
+    except Exception as e:
+        logger.warning("Gagal mengirim email notifikasi massal", extra={'gagal': len(sisa), 'total': len(messages), 'error': str(e)})
+        tandai_gangguan_smtp(e)
+        _catat_ditolak(self, ditolak)
+        _retry_atau_dead_letter(self, e, sisa, args=(sisa,))
+        return sent
+
+    _catat_ditolak(self, ditolak)
+    logger.info("Email notifikasi massal terkirim", extra={'jumlah': sent})
+    return sent
+
+
+def _catat_ditolak(task, ditolak):
+    # Penolakan sementara per alamat (mis. 4xx greylisting) dicoba lagi sebagai email satuan
+    for item, e in ditolak:
+        if klasifikasi_error(e) == SEMENTARA:
+            send_notification_email.apply_async(kwargs=normalisasi_item(item), countdown=hitung_backoff(0))
+        else:
+            catat_email_gagal([item], e, task.request.retries + 1)
+
+
+@shared_task
+@terukur
+def send_feedback_reminders_batch(transaksi_pks):
+    """
+    Pengingat feedback untuk satu kelompok pesanan (dipanggil oleh
+    sweep_feedback_reminders). Pesanan yang sudah diberi feedback dilewati.
+    """
+    rows = (
+        Transaksi.objects.filter(pk__in=transaksi_pks)
+        .filter(Q(feedback__isnull=True) | Q(feedback=''))
+        .exclude(idPelanggan__email__isnull=True).exclude(idPelanggan__email__exact='')
+        .values_list('id', 'idPelanggan__nama_pelanggan', 'idPelanggan__email')
+    )
+    rows = list(rows)
+    emails = notifications.render_massal('pengingat_feedback', (
+        {'nama': nama, 'transaksi_id': transaksi_id, 'link_url': reverse('core:order_detail', args=[transaksi_id])}
+        for transaksi_id, nama, _ in rows
+    ))
+    messages = [notifications.item_email(email, [alamat]) for email, (_, _, alamat) in zip(emails, rows)]
+    if messages:
+        catat_email(len(messages))
+        send_notification_emails_batch.delay(messages)
+    logger.info("Pengingat feedback dikirim", extra={'jumlah': len(messages), 'pesanan': len(transaksi_pks)})
+
+
+# Jeda pengingat feedback setelah pesanan SELESAI
+FEEDBACK_REMINDER_DELAY = 259200  # 3 hari (detik)
+FEEDBACK_SWEEP_BATCH_SIZE = 500
+# Batas kelompok per eksekusi agar satu sweep tidak membanjiri broker; sisanya diambil sweep berikutnya
+FEEDBACK_SWEEP_MAX_BATCHES = 20
+
+
+@shared_task
+@terukur
+@tugas_terjadwal(jendela=3600)
+def sweep_feedback_reminders(batch_size=FEEDBACK_SWEEP_BATCH_SIZE, max_batches=FEEDBACK_SWEEP_MAX_BATCHES):
+    """
+    Sweep periodik pengingat feedback: pesanan SELESAI yang selesai_at-nya sudah
+    lewat 72 jam dan belum diingatkan ditandai (UPDATE bersyarat) lalu dikirim
+    per kelompok. Pengganti apply_async(countdown=3 hari) per pesanan, sehingga
+    broker dan worker tidak menyimpan task ber-ETA sebanyak jumlah pesanan.
+    """
+    batas = timezone.now() - timedelta(seconds=FEEDBACK_REMINDER_DELAY)
+    jatuh_tempo = Transaksi.objects.filter(
+        status_transaksi='SELESAI', is_feedback_reminder_sent=False, selesai_at__lte=batas,
+    )
+    jumlah = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            # skip_locked: sweep yang berjalan bersamaan mengambil kelompok berbeda, tidak mengirim dua kali
+            ids = list(
+                jatuh_tempo.order_by('selesai_at').select_for_update(skip_locked=True)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # Pesanan yang sudah diberi feedback ikut ditandai; send_feedback_reminders_batch melewatinya
+            Transaksi.objects.filter(pk__in=ids).update(is_feedback_reminder_sent=True)
+            transaction.on_commit(lambda ids=ids: send_feedback_reminders_batch.delay(ids))
+        jumlah += len(ids)
+
+    logger.info("Pengingat feedback dijadwalkan", extra={'jumlah': jumlah})
+    return jumlah
+
+
+@shared_task
+@terukur
+@tugas_terjadwal(jendela=86400)
+def prune_task_runs(hari=RIWAYAT_RETENSI_HARI):
+    """Hapus RiwayatTugas yang lebih lama dari `hari` hari agar tabelnya tidak terus membesar."""
+    count, _ = RiwayatTugas.objects.filter(dimulai_pada__lt=timezone.now() - timedelta(days=hari)).delete()
+    logger.info("Riwayat tugas lama dihapus", extra={'jumlah': count})
+    return count
+
+
+# Profil request (core/profiling.py) yang lebih lama dari ini dihapus
+PROFIL_RETENSI_HARI = 7
+
+
+@shared_task
+@terukur
+@tugas_terjadwal(jendela=86400)
+def prune_query_profiles(hari=PROFIL_RETENSI_HARI):
+    """Hapus ProfilRequest yang lebih lama dari `hari` hari."""
+    count, _ = ProfilRequest.objects.filter(dibuat_pada__lt=timezone.now() - timedelta(days=hari)).delete()
+    logger.info("Profil request lama dihapus", extra={'jumlah': count})
+    return count
+
+
+@shared_task
+@terukur
+@tugas_terjadwal(jendela=86400)
+def prune_exports():
+    """Hapus file ekspor background yang tautan unduhannya sudah kedaluwarsa."""
+    from .exports import hapus_ekspor_kedaluwarsa
+
+    count = hapus_ekspor_kedaluwarsa()
+    logger.info("File ekspor kedaluwarsa dihapus", extra={'jumlah': count})
+    return count
@@ -1,3 +1,1588 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import smtplib
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.hashers import is_password_usable
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import User
+from unittest import mock, skipUnless
+
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import AsyncClient, LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+
+from barokah.celery import app as celery_app
+from barokah.database import atomic_tulis, databases
+from django_celery_beat.models import PeriodicTask, CrontabSchedule, IntervalSchedule
+from tablib import Dataset
+
+from .models import Kategori, Notifikasi, Pelanggan, Produk, Transaksi, DetailTransaksi, SegmenPelanggan, DiskonPelanggan, KampanyeDiskon, KunciTugas, RiwayatTugas, EmailGagal, ProfilRequest, RekomendasiProduk, RekomendasiPelanggan, STATUS_TRANSAKSI_CHOICES
+from .beat import LeaderDatabaseScheduler, tambah_jadwal_baru, KUNCI_PEMIMPIN
+from .jobs import awal_jendela
+from .campaigns import jalankan_kampanye, akhiri_kampanye, get_discount_lookup
+from . import benchmarks, caching, exports, instrumentation, invoices, loadtest, routers, mailer, notifications, pricing, recommendations, tasks
+from .paginators import EstimatedCountPaginator
+from .transitions import ubah_status_massal, TRANSISI_STATUS
+from .resources import ProdukResource, PelangganResource
+from .recommendations import rebuild_recommendations, get_produk_terkait, get_rekomendasi_pelanggan
+from .segmentation import refresh_segments, tentukan_segmen
+
+# Jalankan task Celery secara sinkron di test (tanpa Redis); email memakai locmem backend
+celery_app.conf.task_always_eager = True
+
+
+def buat_pelanggan(username, **kwargs):
+    data = {
+        'nama_pelanggan': username.title(),
+        'alamat': 'Jl. Test',
+        'tanggal_lahir': date(1990, 1, 1),
+        'no_hp': '0800',
+        'username': username,
+        'email': f'{username}@example.com',
+    }
+    data.update(kwargs)
+    return Pelanggan.objects.create(**data)
+
+
+def buat_produk(nama, harga='10000.00', stok=50, **kwargs):
+    return Produk.objects.create(
+        nama_produk=nama, deskripsi_produk=nama, foto_produk='', stok_produk=stok,
+        harga_produk=Decimal(harga), **kwargs
+    )
+
+
+def buat_transaksi(pelanggan, produk_qty, status='SELESAI'):
+    transaksi = Transaksi.objects.create(idPelanggan=pelanggan, status_transaksi=status)
+    for produk, qty in produk_qty:
+        DetailTransaksi.objects.create(idTransaksi=transaksi, idProduk=produk, jumlah_produk=qty)
+    return transaksi
+
+
+class RekomendasiTests(TestCase):
+    def setUp(self):
+        self.semen = buat_produk('Semen')
+        self.pasir = buat_produk('Pasir')
+        self.batu = buat_produk('Batu Split')
+        self.besi = buat_produk('Besi')
+        self.andi = buat_pelanggan('andi')
+        self.budi = buat_pelanggan('budi')
+        buat_transaksi(self.andi, [(self.semen, 2), (self.pasir, 1)])
+        buat_transaksi(self.andi, [(self.semen, 1), (self.pasir, 3), (self.batu, 1)])
+        buat_transaksi(self.budi, [(self.semen, 1), (self.besi, 1)])
+        # Transaksi batal tidak ikut dihitung
+        buat_transaksi(self.budi, [(self.semen, 1), (self.batu, 1)], status='DIBATALKAN')
+
+    def test_produk_terkait_urut_berdasarkan_frekuensi(self):
+        rebuild_recommendations(chunk_size=2)
+        terkait = get_produk_terkait(self.semen.id)
+        self.assertEqual(terkait[0], self.pasir)
+        self.assertEqual(set(terkait), {self.pasir, self.batu, self.besi})
+
+    def test_rekomendasi_pelanggan_tanpa_produk_yang_sudah_dibeli(self):
+        rebuild_recommendations(chunk_size=2)
+        self.assertEqual(get_rekomendasi_pelanggan(self.budi.id), [self.pasir, self.batu])
+        self.assertEqual(get_rekomendasi_pelanggan(self.budi.id, exclude_ids=[self.pasir.id]), [self.batu])
+        self.assertEqual(get_rekomendasi_pelanggan(self.andi.id), [self.besi])
+
+    def test_serving_satu_query(self):
+        rebuild_recommendations()
+        with self.assertNumQueries(1):
+            get_produk_terkait(self.semen.id)
+        with self.assertNumQueries(1):
+            get_rekomendasi_pelanggan(self.andi.id)
+
+    def test_rebuild_mengganti_data_lama(self):
+        rebuild_recommendations()
+        jumlah_awal = rebuild_recommendations()
+        self.assertEqual(rebuild_recommendations(), jumlah_awal)
+        self.assertEqual(
+            (RekomendasiProduk.objects.count(), RekomendasiPelanggan.objects.count()), jumlah_awal,
+        )
+
+        # Besi tidak lagi dibeli bersama produk lain: rekomendasinya yang lama ikut terhapus
+        Transaksi.objects.filter(detailtransaksi__idProduk=self.besi).update(status_transaksi='DIBATALKAN')
+        rebuild_recommendations(chunk_size=2)
+        self.assertEqual(get_produk_terkait(self.besi.id), [])
+        self.assertNotIn(self.besi, get_produk_terkait(self.semen.id))
+        self.assertEqual(get_rekomendasi_pelanggan(self.budi.id), [])
+
+
+class JobBatchTanpaLockPanjangTests(TransactionTestCase):
+    """Job batch menulis per chunk, jadi lock tulis SQLite (BEGIN IMMEDIATE) tidak ditahan sepanjang job."""
+
+    def test_checkout_berhasil_saat_rebuild_berjalan(self):
+        semen, pasir = buat_produk('Semen'), buat_produk('Pasir')
+        andi = buat_pelanggan('andi')
+        buat_transaksi(andi, [(semen, 1), (pasir, 1)])
+        session = self.client.session
+        session['pelanggan_id'] = andi.id
+        session['cart'] = [{'product_id': semen.id, 'qty': 2}]
+        session.save()
+
+        di_tengah, lanjut = threading.Event(), threading.Event()
+        detail_rows = recommendations._detail_rows
+        panggilan = []
+
+        def jeda(*args):
+            panggilan.append(args)
+            if len(panggilan) == 2:
+                # Rekomendasi produk sudah ditulis, rekomendasi pelanggan belum
+                di_tengah.set()
+                lanjut.wait(10)
+            return detail_rows(*args)
+
+        hasil = {}
+
+        def rebuild():
+            try:
+                hasil['jumlah'] = rebuild_recommendations()
+            except Exception as exc:
+                hasil['error'] = exc
+            finally:
+                connection.close()
+
+        with mock.patch.object(recommendations, '_detail_rows', side_effect=jeda):
+            thread = threading.Thread(target=rebuild)
+            thread.start()
+            self.assertTrue(di_tengah.wait(10))
+            try:
+                response = self.client.post(reverse('core:checkout'), {'alamat_pengiriman': 'Jl. Proyek'})
+            finally:
+                lanjut.set()
+                thread.join(10)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Transaksi.objects.filter(idPelanggan=andi).count(), 2)
+        self.assertNotIn('error', hasil)
+        self.assertEqual(get_produk_terkait(semen.id), [pasir])
+
+    def test_begin_immediate_hanya_untuk_blok_tulis(self):
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                Produk.objects.count()
+            with atomic_tulis():
+                with transaction.atomic():
+                    Produk.objects.count()
+            with transaction.atomic():
+                Produk.objects.count()
+        begin = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('BEGIN')]
+        self.assertEqual(begin, ['BEGIN', 'BEGIN IMMEDIATE', 'BEGIN'])
+
+
+class SegmentasiRFMTests(TestCase):
+    def setUp(self):
+        self.produk = buat_produk('Semen', harga='100000.00')
+        self.pelanggan = [buat_pelanggan(f'p{i}') for i in range(10)]
+        # Pelanggan ke-i berbelanja i kali; pelanggan ke-0 belum pernah belanja
+        for i, pelanggan in enumerate(self.pelanggan):
+            for _ in range(i):
+                buat_transaksi(pelanggan, [(self.produk, i)])
+
+    def test_tentukan_segmen(self):
+        self.assertEqual(tentukan_segmen(5, 5, 5), 'CHAMPIONS')
+        self.assertEqual(tentukan_segmen(5, 1, 2), 'BARU')
+        self.assertEqual(tentukan_segmen(3, 3, 4), 'LOYAL')
+        self.assertEqual(tentukan_segmen(1, 5, 5), 'BERISIKO')
+        self.assertEqual(tentukan_segmen(1, 1, 1), 'HILANG')
+
+    def test_full_run_menyegmentasi_semua_pelanggan(self):
+        proses = refresh_segments()
+        self.assertEqual(proses.mode, 'FULL')
+        self.assertEqual(SegmenPelanggan.objects.count(), 10)
+        self.assertEqual(SegmenPelanggan.objects.get(pk=self.pelanggan[0].pk).segmen, 'BELUM_BELANJA')
+        terbaik = SegmenPelanggan.objects.get(pk=self.pelanggan[9].pk)
+        self.assertEqual((terbaik.frequency, terbaik.f_score, terbaik.m_score), (9, 5, 5))
+        self.assertEqual(terbaik.monetary, Decimal('8100000.00'))
+
+    def test_incremental_hanya_memproses_pelanggan_yang_berubah(self):
+        # Di luar jendela DATABASE_REPLICA_LAG_MAKS sebelum proses FULL
+        Transaksi.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        refresh_segments()
+        buat_transaksi(self.pelanggan[0], [(self.produk, 1)])
+        proses = refresh_segments()
+        self.assertEqual(proses.mode, 'INKREMENTAL')
+        self.assertEqual(proses.jumlah_pelanggan, 1)
+        segmen = SegmenPelanggan.objects.get(pk=self.pelanggan[0].pk)
+        self.assertEqual(segmen.frequency, 1)
+        self.assertNotEqual(segmen.segmen, 'BELUM_BELANJA')
+
+    @override_settings(DATABASE_REPLICA_LAG_MAKS=30)
+    def test_incremental_memproses_ulang_perubahan_dalam_jendela_lag_replika(self):
+        proses = refresh_segments()
+        # Ditulis tepat sebelum proses terakhir dimulai, bisa belum terbaca di replika saat itu
+        transaksi = buat_transaksi(self.pelanggan[0], [(self.produk, 1)])
+        Transaksi.objects.filter(pk=transaksi.pk).update(updated_at=proses.dimulai_pada - timedelta(seconds=10))
+        proses = refresh_segments()
+        self.assertEqual(proses.mode, 'INKREMENTAL')
+        self.assertEqual(SegmenPelanggan.objects.get(pk=self.pelanggan[0].pk).frequency, 1)
+
+
+class KampanyeDiskonTests(TestCase):
+    def setUp(self):
+        self.semen = buat_produk('Semen', harga='65000.00')
+        self.pasir = buat_produk('Pasir', harga='250000.00')
+        self.pelanggan = [buat_pelanggan(f'k{i}', total_riwayat_belanja=Decimal(i * 1000000)) for i in range(6)]
+
+    def login(self, pelanggan):
+        session = self.client.session
+        session['pelanggan_id'] = pelanggan.id
+        session.save()
+
+    def test_jalankan_dan_akhiri_kampanye(self):
+        kampanye = KampanyeDiskon.objects.create(nama='Loyal', persen_diskon=15, min_total_belanja=Decimal('3000000'))
+        with self.assertNumQueries(8):
+            # max id diskon lama, select pelanggan, 2x bulk insert (chunk 2), savepoint,
+            # aktifkan diskon baru, update kampanye, release
+            jumlah = jalankan_kampanye(kampanye, chunk_size=2)
+        self.assertEqual(jumlah, 3)
+        self.assertEqual(kampanye.status, 'AKTIF')
+        self.assertEqual(get_discount_lookup(self.pelanggan[5].id), {None: 15})
+        self.assertEqual(get_discount_lookup(self.pelanggan[0].id), {})
+
+        # Jalankan ulang tidak menggandakan diskon
+        jalankan_kampanye(kampanye)
+        self.assertEqual(DiskonPelanggan.objects.filter(kampanye=kampanye).count(), 3)
+
+        self.assertEqual(akhiri_kampanye(kampanye), 3)
+        self.assertEqual(get_discount_lookup(self.pelanggan[5].id), {})
+
+    def test_kampanye_gagal_di_tengah_tidak_mengubah_harga(self):
+        kampanye = KampanyeDiskon.objects.create(nama='Loyal', persen_diskon=15, min_total_belanja=Decimal('1000000'))
+        cart = [{'product_id': self.semen.id, 'qty': 2}]
+        pelanggan = self.pelanggan[1]
+        cache.clear()
+        _, subtotal_awal, _ = pricing.hitung_keranjang(pelanggan, cart)
+
+        bulk_create = DiskonPelanggan.objects.bulk_create
+        panggilan = []
+
+        def gagal_di_chunk_kedua(objs, *args, **kwargs):
+            panggilan.append(len(objs))
+            if len(panggilan) == 2:
+                raise RuntimeError('worker mati')
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(DiskonPelanggan.objects, 'bulk_create', side_effect=gagal_di_chunk_kedua):
+            with self.assertRaises(RuntimeError):
+                jalankan_kampanye(kampanye, chunk_size=2)
+
+        # Chunk pertama sudah tersimpan, tetapi belum aktif
+        self.assertEqual(DiskonPelanggan.objects.filter(kampanye=kampanye).count(), 2)
+        kampanye.refresh_from_db()
+        self.assertEqual(kampanye.status, 'DRAFT')
+        cache.clear()
+        for pelanggan in self.pelanggan:
+            self.assertEqual(pricing.hitung_keranjang(pelanggan, cart)[1], subtotal_awal)
+
+        # Dijalankan ulang: sisa proses gagal diganti
+        self.assertEqual(jalankan_kampanye(kampanye), 5)
+        self.assertEqual(DiskonPelanggan.objects.filter(kampanye=kampanye).count(), 5)
+        self.assertEqual(get_discount_lookup(self.pelanggan[1].id), {None: 15})
+
+    def test_kampanye_lewat_berlaku_sampai_tidak_berlaku_lagi(self):
+        now = timezone.now()
+        kampanye = KampanyeDiskon.objects.create(
+            nama='Kilat', persen_diskon=15, min_total_belanja=Decimal('5000000'), berlaku_sampai=now + timedelta(hours=1),
+        )
+        jalankan_kampanye(kampanye)
+        pelanggan = self.pelanggan[5]
+        self.assertEqual(get_discount_lookup(pelanggan.id, now), {None: 15})
+        # akhiri_kampanye_kedaluwarsa belum berjalan, tetapi diskon sudah tidak dipakai
+        self.assertEqual(get_discount_lookup(pelanggan.id, now + timedelta(hours=2)), {})
+
+        cache.clear()
+        aturan = pricing.get_aturan(pelanggan, now)
+        self.assertEqual(aturan.diskon_produk, {None: 15})
+        self.assertEqual(aturan.berlaku_sampai, kampanye.berlaku_sampai)
+        self.assertEqual(pricing.get_aturan(pelanggan, now + timedelta(hours=2)).diskon_produk, {})
+
+    def test_ubah_kampanye_aktif_lewat_admin_memperbarui_diskon(self):
+        kampanye = KampanyeDiskon.objects.create(nama='Loyal', persen_diskon=15, min_total_belanja=Decimal('3000000'))
+        jalankan_kampanye(kampanye)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@barokah.com', 'rahasia'))
+        url = reverse('penjualan_admin:core_kampanyediskon_change', args=[kampanye.id])
+        data = {
+            'nama': 'Loyal', 'segmen': 'SEMUA', 'min_total_belanja': '3000000', 'idProduk': '',
+            'persen_diskon': 25, 'pesan': '', 'berlaku_sampai_0': '', 'berlaku_sampai_1': '',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(get_discount_lookup(self.pelanggan[5].id), {None: 25})
+
+        # Target berubah: penerima dihitung ulang
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {**data, 'min_total_belanja': '5000000'})
+        self.assertEqual(
+            set(kampanye.diskon.values_list('idPelanggan_id', flat=True)), {self.pelanggan[5].id},
+        )
+        self.assertEqual(get_discount_lookup(self.pelanggan[3].id), {})
+
+    def test_lookup_memakai_diskon_terbesar(self):
+        DiskonPelanggan.objects.create(idPelanggan=self.pelanggan[1], idProduk=self.semen, persen_diskon=5)
+        DiskonPelanggan.objects.create(idPelanggan=self.pelanggan[1], idProduk=self.semen, persen_diskon=20)
+        DiskonPelanggan.objects.create(idPelanggan=self.pelanggan[1], persen_diskon=10)
+        DiskonPelanggan.objects.create(idPelanggan=self.pelanggan[1], persen_diskon=50, status='tidak_aktif')
+        self.assertEqual(get_discount_lookup(self.pelanggan[1].id), {self.semen.id: 20, None: 10})
+
+    def test_keranjang_dan_checkout_menerapkan_diskon(self):
+        pelanggan = self.pelanggan[2]
+        DiskonPelanggan.objects.create(idPelanggan=pelanggan, idProduk=self.semen, persen_diskon=10)
+        self.login(pelanggan)
+        session = self.client.session
+        session['cart'] = [{'product_id': self.semen.id, 'qty': 3}, {'product_id': self.pasir.id, 'qty': 1}]
+        session.save()
+
+        response = self.client.get(reverse('core:cart'))
+        self.assertEqual(response.context['subtotal'], Decimal('425500.00'))
+
+        self.client.post(reverse('core:checkout'), {'alamat_pengiriman': 'Jl. Proyek'})
+        transaksi = Transaksi.objects.get(idPelanggan=pelanggan)
+        detail = transaksi.detailtransaksi_set.get(idProduk=self.semen)
+        self.assertEqual(detail.harga_satuan, Decimal('58500.00'))
+        self.assertEqual(detail.sub_total, Decimal('175500.00'))
+        self.assertEqual(transaksi.total, Decimal('425500.00'))
+
+
+class MesinHargaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.semen = buat_produk('Semen', harga='65000.00')
+        self.besi = buat_produk('Besi', harga='33333.33')
+        self.paku = buat_produk('Paku', harga='10.05')
+        self.pelanggan = buat_pelanggan('ulang', total_riwayat_belanja=Decimal('5000000.00'))
+
+    def aktifkan_ultah(self, jam_lalu=1):
+        self.pelanggan.is_birthday_discount_active = True
+        self.pelanggan.birthday_discount_activated_at = timezone.now() - timedelta(hours=jam_lalu)
+        self.pelanggan.save()
+
+    def test_pembulatan_harga_satuan(self):
+        hitung = pricing.hitung_harga_satuan
+        self.assertEqual(hitung(Decimal('65000.00')), Decimal('65000.00'))
+        self.assertEqual(hitung(Decimal('65000.00'), 10), Decimal('58500.00'))
+        self.assertEqual(hitung(Decimal('33333.33'), 15), Decimal('28333.33'))  # 28333.3305
+        self.assertEqual(hitung(Decimal('10.05'), 0, 10), Decimal('9.05'))  # 9.045 -> half up
+        self.assertEqual(hitung(Decimal('10.05'), 50), Decimal('5.03'))  # 5.025 -> half up
+        self.assertEqual(hitung(Decimal('0.01'), 50), Decimal('0.01'))
+        self.assertEqual(hitung(Decimal('99.99'), 100), Decimal('0.00'))
+        # Diskon produk dan loyalitas digabung lalu dibulatkan sekali: 25499.99745 -> 25500.00
+        self.assertEqual(hitung(Decimal('33333.33'), 15, 10), Decimal('25500.00'))
+        self.assertEqual(hitung('1.15', 0, 10), Decimal('1.04'))  # 1.035 -> half up
+
+    def test_total_baris_memakai_harga_satuan_yang_sudah_dibulatkan(self):
+        DiskonPelanggan.objects.create(idPelanggan=self.pelanggan, idProduk=self.paku, persen_diskon=50)
+        items, subtotal, _ = pricing.hitung_keranjang(self.pelanggan, [{'product_id': self.paku.id, 'qty': 3}])
+        self.assertEqual(items[0]['harga'], Decimal('5.03'))
+        self.assertEqual(items[0]['total'], Decimal('15.09'))
+        self.assertEqual(subtotal, Decimal('15.09'))
+
+    def test_diskon_loyalitas_ulang_tahun(self):
+        self.aktifkan_ultah()
+        DiskonPelanggan.objects.create(idPelanggan=self.pelanggan, idProduk=self.besi, persen_diskon=15)
+        cart = [{'product_id': self.semen.id, 'qty': 2}, {'product_id': self.besi.id, 'qty': 1}]
+        items, subtotal, aturan = pricing.hitung_keranjang(self.pelanggan, cart)
+        self.assertEqual(aturan.persen_loyalitas, 10)
+        self.assertEqual([it['harga'] for it in items], [Decimal('58500.00'), Decimal('25500.00')])
+        self.assertEqual(subtotal, Decimal('142500.00'))
+
+    def test_tanpa_loyalitas_jika_belanja_kurang_atau_kedaluwarsa(self):
+        self.pelanggan.total_riwayat_belanja = Decimal('4999999.99')
+        self.aktifkan_ultah()
+        self.assertEqual(pricing.get_aturan(self.pelanggan).persen_loyalitas, 0)
+
+        self.pelanggan.total_riwayat_belanja = Decimal('5000000.00')
+        self.aktifkan_ultah(jam_lalu=25)
+        self.assertEqual(pricing.get_aturan(self.pelanggan).persen_loyalitas, 0)
+
+    def test_cache_aturan_berakhir_bersama_diskon_ultah(self):
+        self.aktifkan_ultah(jam_lalu=23)
+        aturan = pricing.get_aturan(self.pelanggan)
+        self.assertEqual(aturan.persen_loyalitas, 10)
+        # Setelah 24 jam terlewati, aturan ter-cache tidak lagi dipakai walau cache belum habis
+        nanti = self.pelanggan.birthday_discount_activated_at + timedelta(hours=24, seconds=1)
+        self.assertEqual(pricing.get_aturan(self.pelanggan, now=nanti).persen_loyalitas, 0)
+
+    def test_cache_dibatalkan_saat_diskon_dan_kampanye_berubah(self):
+        self.assertEqual(pricing.get_aturan(self.pelanggan).diskon_produk, {})
+        DiskonPelanggan.objects.create(idPelanggan=self.pelanggan, persen_diskon=5)
+        self.assertEqual(pricing.get_aturan(self.pelanggan).diskon_produk, {None: 5})
+
+        kampanye = KampanyeDiskon.objects.create(nama='Semua', persen_diskon=20)
+        with self.captureOnCommitCallbacks(execute=True):
+            jalankan_kampanye(kampanye)
+        self.assertEqual(pricing.get_aturan(self.pelanggan).diskon_produk, {None: 20})
+
+    def test_keranjang_query_dan_anggaran_latensi(self):
+        produk = [buat_produk(f'Produk {i}', harga=f'{1000 + i}.55') for i in range(200)]
+        cart = [{'product_id': p.id, 'qty': 2} for p in produk]
+        pricing.get_aturan(self.pelanggan)  # isi cache
+        with self.assertNumQueries(1):
+            started = time.perf_counter()
+            items, subtotal, _ = pricing.hitung_keranjang(self.pelanggan, cart)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        self.assertEqual(len(items), 200)
+        self.assertLess(elapsed_ms, pricing.CART_LATENCY_BUDGET_MS * 4)
+
+
+class ImportKatalogTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama_kategori='Sembako')
+        self.pelanggan = buat_pelanggan('budi')
+
+    def dataset_produk(self, rows):
+        return Dataset(*rows, headers=['id', 'nama_produk', 'deskripsi_produk', 'harga_produk', 'stok_produk', 'kategori'])
+
+    def test_import_produk_massal_tanpa_query_per_baris(self):
+        rows = [('', f'Produk {i}', '-', '1000.00', 20, 'Sembako') for i in range(300)]
+        resource = ProdukResource()
+        with self.assertNumQueries(12):
+            result = resource.import_data(self.dataset_produk(rows), dry_run=False)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(Produk.objects.filter(kategori=self.kategori).count(), 300)
+
+    def test_restock_hasil_import_dikirim_sebagai_satu_digest(self):
+        habis = buat_produk('Beras', stok=2)
+        sedikit = buat_produk('Gula', stok=3)
+        cukup = buat_produk('Minyak', stok=8)
+        rows = [
+            (habis.id, 'Beras', '-', '10000.00', 50, 'Sembako'),
+            (sedikit.id, 'Gula', '-', '10000.00', 4, 'Sembako'),
+            (cukup.id, 'Minyak', '-', '10000.00', 40, 'Sembako'),
+        ]
+        resource = ProdukResource()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = resource.import_data(self.dataset_produk(rows), dry_run=False)
+            # Digest baru diantrikan setelah transaksi import commit
+            self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(resource.restocked_ids, [habis.id])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Beras', mail.outbox[0].body)
+
+    def test_file_upload_dihapus_walau_import_gagal(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        path = default_storage.save('imports/rusak.xlsx', ContentFile(b'bukan file xlsx'))
+        with self.assertRaises(Exception):
+            tasks.import_data_file.apply(args=('produk', path, 'xlsx'), throw=True)
+        self.assertFalse(default_storage.exists(path))
+
+    def test_import_pelanggan_tidak_mengubah_total_belanja(self):
+        self.pelanggan.total_riwayat_belanja = Decimal('750000.00')
+        self.pelanggan.save()
+        dataset = Dataset(
+            (self.pelanggan.id, 'Budi Baru', 'Jl. Baru', '1990-01-01', '0811', 'budi', 'budi@example.com', '0'),
+            ('', 'Siti', 'Jl. Mawar', '1995-05-05', '0812', 'siti', 'siti@example.com', '0'),
+            headers=['id', 'nama_pelanggan', 'alamat', 'tanggal_lahir', 'no_hp', 'username', 'email',
+                     'total_riwayat_belanja'],
+        )
+        result = PelangganResource().import_data(dataset, dry_run=False)
+        self.assertFalse(result.has_errors())
+        self.pelanggan.refresh_from_db()
+        self.assertEqual(self.pelanggan.nama_pelanggan, 'Budi Baru')
+        self.assertEqual(self.pelanggan.total_riwayat_belanja, Decimal('750000.00'))
+        self.assertFalse(is_password_usable(Pelanggan.objects.get(username='siti').password))
+
+
+class EksporTransaksiTests(TestCase):
+    def setUp(self):
+        self.pelanggan = buat_pelanggan('akuntan')
+        self.produk = buat_produk('Semen', harga='65000.00')
+        self.selesai = [buat_transaksi(self.pelanggan, [(self.produk, i + 1)]) for i in range(5)]
+        self.batal = buat_transaksi(self.pelanggan, [(self.produk, 1)], status='DIBATALKAN')
+        admin = User.objects.create_superuser('admin', 'admin@barokah.com', 'rahasia')
+        self.client.force_login(admin)
+
+    def test_query_per_chunk_bukan_per_baris(self):
+        qs = exports.export_queryset(statuses=['SELESAI'])
+        # 5 baris dengan chunk 2 -> 3 chunk berisi + 1 chunk kosong, tanpa query tambahan per relasi
+        with self.assertNumQueries(4):
+            rows = list(exports.iter_rows(qs, chunk_size=2))
+        self.assertEqual(rows[0], exports.HEADERS)
+        self.assertEqual([row[0] for row in rows[1:]], [t.id for t in self.selesai])
+        self.assertEqual(rows[1][9], Decimal('65000.00'))
+
+    def test_admin_mengalirkan_csv_sesuai_filter(self):
+        response = self.client.get(
+            reverse('penjualan_admin:core_transaksi_export'), {'format': 'csv', 'status': 'DIBATALKAN'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], str(self.batal.id))
+
+    def test_filter_rentang_tanggal(self):
+        Transaksi.objects.filter(pk=self.batal.pk).update(tanggal=timezone.now() - timedelta(days=30))
+        hari_ini = timezone.localdate()
+        rows = list(exports.iter_rows(exports.export_queryset(mulai=hari_ini, sampai=hari_ini)))
+        self.assertNotIn(self.batal.id, [row[0] for row in rows[1:]])
+        self.assertEqual(len(rows), 6)
+
+    def test_command_dan_task_background(self):
+        out = io.StringIO()
+        call_command('export_transaksi', '--status', 'SELESAI', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 6)
+
+        from .tasks import export_transaksi_file
+        with tempfile.TemporaryDirectory() as folder, self.settings(STORAGES={
+            **settings.STORAGES,
+            'ekspor': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': folder}},
+        }):
+            path = export_transaksi_file.delay(statuses=['SELESAI'], file_format='csv').get()
+            with exports.storage_ekspor().open(path) as f:
+                self.assertEqual(len(f.read().decode().splitlines()), 6)
+            email = next(m for m in mail.outbox if 'Ekspor Transaksi' in m.subject)
+            # Tidak ada URL media publik: hanya tautan unduhan admin bertanda tangan
+            self.assertNotIn('/media/', email.body)
+            url = reverse('penjualan_admin:core_transaksi_export_download', args=[exports.token_unduhan(path)])
+            self.assertIn(url, email.body)
+
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 6)
+            response.close()
+
+            palsu = reverse('penjualan_admin:core_transaksi_export_download', args=[exports.token_unduhan(path) + 'x'])
+            self.assertEqual(self.client.get(palsu).status_code, 404)
+            with mock.patch('django.core.signing.time.time', return_value=time.time() + 4 * 86400):
+                self.assertEqual(self.client.get(url).status_code, 404)
+            self.client.logout()
+            self.assertEqual(self.client.get(url).status_code, 302)
+
+            # File yang lebih tua dari MASA_BERLAKU dihapus prune_exports
+            self.assertEqual(tasks.prune_exports(), 0)
+            lama = (timezone.now() - timedelta(days=4)).timestamp()
+            os.utime(exports.storage_ekspor().path(path), (lama, lama))
+            self.assertEqual(tasks.prune_exports(), 1)
+            self.assertFalse(exports.storage_ekspor().exists(path))
+
+
+class InvoiceTests(TestCase):
+    def setUp(self):
+        self.pelanggan = buat_pelanggan('citra')
+        self.produk = buat_produk('Bata Ringan', harga='8500.00')
+        self.transaksi = buat_transaksi(self.pelanggan, [(self.produk, 12)], status='DIBAYAR')
+
+    def ambil(self):
+        return invoices.invoice_queryset().get(pk=self.transaksi.pk)
+
+    def test_html_tanpa_query_tambahan_dan_hash_mengikuti_isi(self):
+        transaksi = self.ambil()
+        with self.assertNumQueries(0):
+            html = invoices.render_invoice_html(transaksi)
+        self.assertIn('Bata Ringan', html)
+        self.assertIn('Rp102.000,00', html)
+        path = invoices.invoice_path(html)
+        self.assertEqual(path, invoices.invoice_path(invoices.render_invoice_html(self.ambil())))
+
+        DetailTransaksi.objects.filter(idTransaksi=self.transaksi).update(jumlah_produk=13)
+        self.assertNotEqual(path, invoices.invoice_path(invoices.render_invoice_html(self.ambil())))
+
+    def test_invoice_pelanggan_lain_tidak_bisa_diakses(self):
+        lain = buat_pelanggan('dodi')
+        session = self.client.session
+        session['pelanggan_id'] = lain.id
+        session.save()
+        response = self.client.get(reverse('core:invoice_download', args=[self.transaksi.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_halaman_pending_tidak_mengantrikan_ulang_dan_menampilkan_gagal(self):
+        cache.clear()
+        session = self.client.session
+        session['pelanggan_id'] = self.pelanggan.id
+        session.save()
+        url = reverse('core:invoice_download', args=[self.transaksi.id])
+        with mock.patch('core.views.cached_invoice', return_value=None), \
+                mock.patch.object(tasks.render_invoice_pdf, 'delay') as delay:
+            for coba in range(3):
+                response = self.client.get(url, {'coba': coba})
+                self.assertEqual(response.status_code, 202)
+                self.assertContains(response, f'url=?coba={coba + 1}', status_code=202)
+            delay.assert_called_once_with(self.transaksi.id)
+
+            # Muat ulang otomatis berhenti setelah INVOICE_POLL_MAKS kali
+            response = self.client.get(url, {'coba': 20})
+            self.assertNotContains(response, 'http-equiv="refresh"', status_code=202)
+
+            # Render gagal di worker: halaman menampilkan error tanpa mengantrikan lagi
+            with mock.patch('core.invoices.render_pdf', side_effect=OSError('Pango tidak ada')):
+                with self.assertRaises(OSError):
+                    tasks.render_invoice_pdf(self.transaksi.id)
+            response = self.client.get(url)
+            self.assertContains(response, 'Invoice gagal dibuat', status_code=500)
+            self.assertNotContains(response, 'http-equiv="refresh"', status_code=500)
+            self.assertEqual(delay.call_count, 1)
+
+            # "Coba Lagi" menghapus penanda gagal dan mengantrikan render baru
+            self.assertEqual(self.client.get(url, {'ulang': 1}).status_code, 202)
+            self.assertEqual(delay.call_count, 2)
+
+    def test_pdf_disimpan_di_storage_privat(self):
+        from django.core.files.storage import default_storage
+        with tempfile.TemporaryDirectory() as folder, self.settings(STORAGES={
+            **settings.STORAGES,
+            'invoice': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': folder}},
+        }), mock.patch('core.invoices.render_pdf', return_value=b'%PDF-1.7'):
+            path, dibuat = invoices.generate_invoice(self.ambil())
+            self.assertTrue(dibuat)
+            self.assertTrue(os.path.exists(os.path.join(folder, path)))
+            # Tidak pernah masuk folder media publik
+            self.assertFalse(default_storage.exists(path))
+
+            session = self.client.session
+            session['pelanggan_id'] = self.pelanggan.id
+            session.save()
+            response = self.client.get(reverse('core:invoice_download', args=[self.transaksi.id]))
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.7')
+
+    @skipUnless(invoices.weasyprint_tersedia(), 'weasyprint / Pango tidak tersedia')
+    def test_pdf_disimpan_sekali_lalu_disajikan_dari_storage(self):
+        path, dibuat = invoices.generate_invoice(self.ambil())
+        try:
+            self.assertTrue(dibuat)
+            self.assertEqual(invoices.generate_invoice(self.ambil()), (path, False))
+
+            session = self.client.session
+            session['pelanggan_id'] = self.pelanggan.id
+            session.save()
+            response = self.client.get(reverse('core:invoice_download', args=[self.transaksi.id]))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        finally:
+            invoices.storage_invoice().delete(path)
+
+
+class RiwayatPesananTests(TestCase):
+    def setUp(self):
+        self.pelanggan = buat_pelanggan('eka')
+        self.produk = [buat_produk(f'Produk {i}') for i in range(5)]
+        session = self.client.session
+        session['pelanggan_id'] = self.pelanggan.id
+        session.save()
+
+    def test_riwayat_keyset_pagination_dengan_query_tetap(self):
+        from .views import ORDER_HISTORY_PAGE_SIZE
+        transaksi = [buat_transaksi(self.pelanggan, [(self.produk[0], 1)]) for _ in range(ORDER_HISTORY_PAGE_SIZE + 5)]
+        # Beberapa transaksi dengan tanggal sama: urutan jatuh ke id
+        Transaksi.objects.filter(pk__in=[t.pk for t in transaksi[:3]]).update(tanggal=transaksi[0].tanggal)
+
+        url = reverse('core:order_history')
+        with self.assertNumQueries(3):  # session, pelanggan, transaksi
+            response = self.client.get(url)
+        halaman_1 = [o.id for o in response.context['orders']]
+        self.assertEqual(len(halaman_1), ORDER_HISTORY_PAGE_SIZE)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'sebelum': response.context['next_cursor']})
+        halaman_2 = [o.id for o in response.context['orders']]
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(sorted(halaman_1 + halaman_2), sorted(t.id for t in transaksi))
+
+    def test_detail_pesanan_query_tidak_bertambah_per_item(self):
+        transaksi = buat_transaksi(self.pelanggan, [(p, 2) for p in self.produk])
+        with self.assertNumQueries(4):  # session, pelanggan, transaksi, item+produk
+            response = self.client.get(reverse('core:order_detail', args=[transaksi.id]))
+        self.assertContains(response, 'Produk 4')
+
+        lain = buat_transaksi(buat_pelanggan('fajar'), [(self.produk[0], 1)])
+        self.assertEqual(self.client.get(reverse('core:order_detail', args=[lain.id])).status_code, 404)
+
+    def test_feedback_update_bersyarat_tanpa_notifikasi_ulang(self):
+        transaksi = buat_transaksi(self.pelanggan, [(self.produk[0], 1)], status='SELESAI')
+        jumlah_email = len(mail.outbox)
+        url = reverse('core:submit_feedback', args=[transaksi.id])
+        with self.assertNumQueries(3):  # session, pelanggan, UPDATE bersyarat
+            self.client.post(url, {'feedback': 'Mantap'})
+        self.client.post(url, {'feedback': 'Menimpa'})
+
+        transaksi.refresh_from_db()
+        self.assertEqual(transaksi.feedback, 'Mantap')
+        self.assertEqual(len(mail.outbox), jumlah_email)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('staf', 'staf@barokah.com', 'rahasia'))
+        self.produk = buat_produk('Pasir')
+
+    def isi_data(self, jumlah):
+        for i in range(jumlah):
+            pelanggan = buat_pelanggan(f'adm{Pelanggan.objects.count()}')
+            buat_transaksi(pelanggan, [(self.produk, 1)])
+            DiskonPelanggan.objects.create(idPelanggan=pelanggan, idProduk=self.produk, persen_diskon=5)
+
+    def jumlah_query(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_changelist_tidak_bertambah_per_baris(self):
+        urls = [
+            reverse('penjualan_admin:core_transaksi_changelist'),
+            reverse('penjualan_admin:core_notifikasi_changelist'),
+            reverse('penjualan_admin:core_diskonpelanggan_changelist'),
+            reverse('penjualan_admin:core_produk_changelist'),
+        ]
+        self.isi_data(2)
+        sedikit = [self.jumlah_query(url) for url in urls]
+        self.isi_data(10)
+        self.assertEqual([self.jumlah_query(url) for url in urls], sedikit)
+
+    def test_changelist_transaksi_tanpa_count_penuh_saat_difilter(self):
+        self.isi_data(3)
+        url = reverse('penjualan_admin:core_transaksi_changelist')
+        # session, user, count hasil filter, baris (+pelanggan), 2x permission menu jazzmin,
+        # 2x date_hierarchy; tidak ada COUNT(*) kedua atas seluruh tabel
+        with self.assertNumQueries(8):
+            response = self.client.get(url, {'status_transaksi__exact': 'DIPROSES'})
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+    def test_paginator_perkiraan_fallback_ke_count_persis(self):
+        self.isi_data(3)
+        paginator = EstimatedCountPaginator(Transaksi.objects.order_by('id'), 50)
+        # SQLite tidak punya statistik jumlah baris, jadi tetap COUNT(*) persis
+        self.assertEqual(paginator.count, 3)
+
+
+class AdminSimpanTransaksiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('kasir', 'kasir@barokah.com', 'rahasia'))
+        self.pelanggan = buat_pelanggan('gina')
+        self.semen = buat_produk('Semen', harga='60000.00')
+        self.pasir = buat_produk('Pasir', harga='250000.00')
+        self.besi = buat_produk('Besi', harga='90000.00')
+        self.transaksi = buat_transaksi(self.pelanggan, [(self.semen, 2), (self.pasir, 1)], status='DIKIRIM')
+        # Harga diskon checkout pada baris semen harus tetap dipakai
+        DetailTransaksi.objects.filter(idTransaksi=self.transaksi, idProduk=self.semen).update(harga_satuan=Decimal('54000.00'))
+        mail.outbox = []
+
+    def post_data(self, status, baris, hapus=()):
+        lama = list(DetailTransaksi.objects.filter(idTransaksi=self.transaksi).order_by('id'))
+        tanggal = timezone.localtime(self.transaksi.tanggal)
+        data = {
+            'tanggal_0': tanggal.strftime('%Y-%m-%d'), 'tanggal_1': tanggal.strftime('%H:%M:%S'),
+            'total': '0', 'ongkir': '10000.00', 'status_transaksi': status,
+            'idPelanggan': self.pelanggan.id, 'alamat_pengiriman': 'Jl. Test', 'feedback': '',
+            'detailtransaksi_set-TOTAL_FORMS': len(lama) + len(baris),
+            'detailtransaksi_set-INITIAL_FORMS': len(lama),
+            'detailtransaksi_set-MIN_NUM_FORMS': 0, 'detailtransaksi_set-MAX_NUM_FORMS': 1000,
+        }
+        for i, detail in enumerate(lama):
+            data.update({
+                f'detailtransaksi_set-{i}-id': detail.id,
+                f'detailtransaksi_set-{i}-idTransaksi': self.transaksi.id,
+                f'detailtransaksi_set-{i}-idProduk': detail.idProduk_id,
+                f'detailtransaksi_set-{i}-jumlah_produk': 3 if detail.idProduk_id == self.semen.id else detail.jumlah_produk,
+            })
+            if detail.idProduk_id in hapus:
+                data[f'detailtransaksi_set-{i}-DELETE'] = 'on'
+        for j, (produk, qty) in enumerate(baris, start=len(lama)):
+            data.update({
+                f'detailtransaksi_set-{j}-idTransaksi': self.transaksi.id,
+                f'detailtransaksi_set-{j}-idProduk': produk.id,
+                f'detailtransaksi_set-{j}-jumlah_produk': qty,
+            })
+        return data
+
+    def test_simpan_formset_bulk_dan_satu_notifikasi(self):
+        url = reverse('penjualan_admin:core_transaksi_change', args=[self.transaksi.id])
+        response = self.client.post(url, self.post_data('SELESAI', [(self.besi, 2)], hapus=[self.pasir.id]))
+        self.assertEqual(response.status_code, 302)
+
+        self.transaksi.refresh_from_db()
+        # 3 x 54.000 (harga diskon tetap) + 2 x 90.000 + ongkir 10.000
+        self.assertEqual(self.transaksi.total, Decimal('352000.00'))
+        self.assertEqual(
+            sorted(DetailTransaksi.objects.filter(idTransaksi=self.transaksi).values_list('sub_total', flat=True)),
+            [Decimal('162000.00'), Decimal('180000.00')],
+        )
+        perubahan_status = [m for m in mail.outbox if 'Perubahan Status' in m.subject]
+        selesai = [m for m in mail.outbox if 'Selesai' in m.subject]
+        self.assertEqual((len(perubahan_status), len(selesai)), (1, 1))
+        self.assertEqual(Notifikasi.objects.filter(tipe_pesan='TRANSACTION_COMPLETED').count(), 1)
+
+        # Simpan ulang tanpa perubahan status tidak mengirim notifikasi lagi
+        mail.outbox = []
+        self.client.post(url, self.post_data('SELESAI', []))
+        self.assertEqual(mail.outbox, [])
+
+    def test_hapus_banyak_baris_total_dihitung_sekali(self):
+        from django.test.utils import CaptureQueriesContext
+        keramik = [buat_produk(f'Keramik {i}') for i in range(4)]
+        for produk in keramik:
+            DetailTransaksi.objects.create(idTransaksi=self.transaksi, idProduk=produk, jumlah_produk=1)
+
+        url = reverse('penjualan_admin:core_transaksi_change', args=[self.transaksi.id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, self.post_data('DIKIRIM', [], hapus=[p.id for p in keramik] + [self.pasir.id]))
+        self.assertEqual(response.status_code, 302)
+        # Sekali dari post_save Transaksi (form utama), sekali setelah formset; bukan per baris yang dihapus
+        self.assertEqual(sum('SUM(' in q['sql'] for q in ctx.captured_queries), 2)
+
+        self.transaksi.refresh_from_db()
+        # 3 x 54.000 + ongkir 10.000
+        self.assertEqual(self.transaksi.total, Decimal('172000.00'))
+        self.assertEqual(DetailTransaksi.objects.filter(idTransaksi=self.transaksi).count(), 1)
+
+    def test_produk_tanpa_harga_ditolak(self):
+        gratis = buat_produk('Sampel', harga='0.00')
+        url = reverse('penjualan_admin:core_transaksi_change', args=[self.transaksi.id])
+        response = self.client.post(url, self.post_data('DIKIRIM', [(gratis, 1)]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(DetailTransaksi.objects.filter(idProduk=gratis).exists())
+
+
+class StatusMassalTests(TestCase):
+    def setUp(self):
+        produk = buat_produk('Genteng')
+        self.dikirim = [
+            buat_transaksi(buat_pelanggan(f'kirim{i}'), [(produk, 1)], status='DIKIRIM') for i in range(30)
+        ]
+        self.diproses = buat_transaksi(buat_pelanggan('proses'), [(produk, 1)], status='DIPROSES')
+        mail.outbox = []
+
+    def test_selesai_massal_query_tetap_dan_notifikasi_bulk(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            # SELECT FOR UPDATE, UPDATE bersyarat, data pelanggan, bulk_create Notifikasi + savepoint
+            with self.assertNumQueries(6):
+                jumlah = ubah_status_massal(Transaksi.objects.all(), 'SELESAI')
+        self.assertEqual(jumlah, 30)
+        self.assertEqual(Transaksi.objects.filter(status_transaksi='SELESAI').count(), 30)
+        self.assertEqual(Transaksi.objects.get(pk=self.diproses.pk).status_transaksi, 'DIPROSES')
+        self.assertEqual(Notifikasi.objects.filter(tipe_pesan='TRANSACTION_COMPLETED').count(), 30)
+        subjects = [m.subject for m in mail.outbox]
+        self.assertEqual(sum('Perubahan Status' in s for s in subjects), 30)
+        self.assertEqual(sum('Selesai' in s for s in subjects), 30)
+        # Pengingat feedback tidak lagi dijadwalkan saat transisi, lihat PengingatFeedbackTests
+        self.assertEqual(sum('Pengingat' in s for s in subjects), 0)
+        self.assertEqual(Transaksi.objects.filter(selesai_at__isnull=False).count(), 30)
+
+    def test_aksi_admin_hanya_mengubah_status_asal_yang_valid(self):
+        self.client.force_login(User.objects.create_superuser('gudang', 'gudang@barokah.com', 'rahasia'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('penjualan_admin:core_transaksi_changelist'), {
+                'action': 'action_tandai_selesai',
+                '_selected_action': [self.diproses.pk, self.dikirim[0].pk],
+            }, follow=True)
+        # DIPROSES belum dibayar sehingga tidak boleh langsung SELESAI
+        self.assertEqual(Transaksi.objects.get(pk=self.diproses.pk).status_transaksi, 'DIPROSES')
+        self.assertEqual(Transaksi.objects.get(pk=self.dikirim[0].pk).status_transaksi, 'SELESAI')
+        self.assertEqual(len([m for m in mail.outbox if 'Perubahan Status' in m.subject]), 1)
+        pesan = [str(m) for m in response.context['messages']]
+        self.assertIn(f"1 pesanan dilewati (#{self.diproses.pk})", pesan[0])
+
+    def test_pesanan_dari_checkout_bisa_dibayar_dan_dibatalkan(self):
+        pelanggan = buat_pelanggan('checkout')
+        session = self.client.session
+        session['pelanggan_id'] = pelanggan.id
+        session['cart'] = [{'product_id': self.diproses.detailtransaksi_set.get().idProduk_id, 'qty': 1}]
+        session.save()
+        self.client.post(reverse('core:checkout'), {'alamat_pengiriman': 'Jl. Proyek'})
+        transaksi = Transaksi.objects.get(idPelanggan=pelanggan)
+        self.assertIn(transaksi.status_transaksi, dict(STATUS_TRANSAKSI_CHOICES))
+        for status_baru in ('DIBAYAR', 'DIBATALKAN'):
+            self.assertIn(transaksi.status_transaksi, TRANSISI_STATUS[status_baru])
+        self.assertEqual(ubah_status_massal(Transaksi.objects.filter(pk=transaksi.pk), 'DIBATALKAN'), 1)
+
+
+class PengingatFeedbackTests(TestCase):
+    def setUp(self):
+        produk = buat_produk('Keramik')
+        self.tanpa_feedback = buat_transaksi(buat_pelanggan('hani'), [(produk, 1)], status='DIKIRIM')
+        self.dengan_feedback = buat_transaksi(buat_pelanggan('ivan'), [(produk, 1)], status='DIKIRIM')
+        for transaksi in (self.tanpa_feedback, self.dengan_feedback):
+            transaksi.status_transaksi = 'SELESAI'
+            transaksi.save()
+        Transaksi.objects.filter(pk=self.dengan_feedback.pk).update(feedback='Bagus')
+        mail.outbox = []
+
+    def mundurkan(self, jam):
+        Transaksi.objects.update(selesai_at=timezone.now() - timedelta(hours=jam))
+
+    def test_selesai_at_diisi_tanpa_task_countdown(self):
+        self.assertIsNotNone(Transaksi.objects.get(pk=self.tanpa_feedback.pk).selesai_at)
+        self.assertEqual(tasks.sweep_feedback_reminders(), 0)
+        self.assertEqual(mail.outbox, [])
+
+    def test_sweep_mengirim_sekali_setelah_72_jam(self):
+        self.mundurkan(71)
+        self.assertEqual(tasks.sweep_feedback_reminders(), 0)
+
+        self.mundurkan(73)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(tasks.sweep_feedback_reminders(batch_size=1), 2)
+        self.assertEqual([m.to for m in mail.outbox], [['hani@example.com']])
+        self.assertFalse(Transaksi.objects.filter(is_feedback_reminder_sent=False).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(tasks.sweep_feedback_reminders(), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class TugasTerjadwalTests(TestCase):
+    def setUp(self):
+        pelanggan = buat_pelanggan('joko')
+        Pelanggan.objects.filter(pk=pelanggan.pk).update(
+            is_birthday_discount_active=True, birthday_discount_activated_at=timezone.now() - timedelta(days=2),
+        )
+
+    def test_pengiriman_ulang_dalam_jendela_dilewati(self):
+        self.assertEqual(tasks.disable_birthday_discounts.delay().get(), 1)
+        self.assertIsNone(tasks.disable_birthday_discounts.delay().get())
+
+        riwayat = RiwayatTugas.objects.get()
+        self.assertEqual(riwayat.nama_tugas, 'core.tasks.disable_birthday_discounts')
+        self.assertEqual(riwayat.status, 'SUKSES')
+        self.assertEqual(riwayat.jumlah_baris, 1)
+        self.assertEqual(riwayat.jendela, awal_jendela(riwayat.dimulai_pada, 3600))
+        self.assertIsNotNone(riwayat.durasi_ms)
+        self.assertFalse(KunciTugas.objects.exists())
+
+    def test_lock_aktif_mencegah_eksekusi_bersamaan(self):
+        nama = 'core.tasks.disable_birthday_discounts'
+        KunciTugas.objects.create(nama=nama, pemilik='worker-lain', kedaluwarsa=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(tasks.disable_birthday_discounts.delay().get())
+        self.assertFalse(RiwayatTugas.objects.exists())
+
+        # Lock milik worker yang mati diambil alih setelah kedaluwarsa
+        KunciTugas.objects.filter(nama=nama).update(kedaluwarsa=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.disable_birthday_discounts.delay().get(), 1)
+
+    def test_eksekusi_gagal_dicatat_dan_boleh_diulang(self):
+        with mock.patch('core.campaigns.akhiri_kampanye_kedaluwarsa', side_effect=RuntimeError('db mati')):
+            self.assertTrue(tasks.expire_discount_campaigns.apply().failed())
+        riwayat = RiwayatTugas.objects.get()
+        self.assertEqual(riwayat.status, 'GAGAL')
+        self.assertIn('db mati', riwayat.error)
+
+        self.assertEqual(tasks.expire_discount_campaigns.delay().get(), 0)
+        riwayat.refresh_from_db()
+        self.assertEqual((riwayat.status, riwayat.error), ('SUKSES', ''))
+
+    def test_argumen_berbeda_dicatat_terpisah(self):
+        tasks.prune_task_runs.delay()
+        tasks.prune_task_runs.delay(7)
+        self.assertEqual(
+            sorted(RiwayatTugas.objects.values_list('nama_tugas', flat=True)),
+            ['core.tasks.prune_task_runs', 'core.tasks.prune_task_runs(7)'],
+        )
+
+
+class JadwalBeatTests(TestCase):
+    def test_migration_mengisi_jadwal_dari_settings(self):
+        self.assertEqual(
+            set(PeriodicTask.objects.values_list('name', flat=True)) - {'celery.backend_cleanup'},
+            set(settings.CELERY_BEAT_SCHEDULE),
+        )
+        rfm = PeriodicTask.objects.get(name='refresh-rfm-segments-full-nightly')
+        self.assertEqual((rfm.args, rfm.crontab.hour, rfm.crontab.minute), ('[true]', '1', '30'))
+        self.assertEqual(PeriodicTask.objects.get(name='check-payment-deadlines-every-5-minutes').interval.every, 300)
+
+    def test_jadwal_dari_admin_tidak_ditimpa(self):
+        tugas = PeriodicTask.objects.get(name='check-payment-deadlines-every-5-minutes')
+        tugas.interval = IntervalSchedule.objects.create(every=600, period='seconds')
+        tugas.save()
+        PeriodicTask.objects.filter(name='prune-task-runs-daily').delete()
+
+        self.assertEqual(tambah_jadwal_baru(settings.CELERY_BEAT_SCHEDULE, PeriodicTask, CrontabSchedule, IntervalSchedule), 1)
+        tugas.refresh_from_db()
+        self.assertEqual(tugas.interval.every, 600)
+        self.assertTrue(PeriodicTask.objects.filter(name='prune-task-runs-daily').exists())
+
+    def test_hanya_satu_instance_beat_yang_memimpin(self):
+        beat_a = LeaderDatabaseScheduler(app=celery_app, lazy=True)
+        beat_b = LeaderDatabaseScheduler(app=celery_app, lazy=True)
+        self.assertTrue(beat_a.is_leader())
+        self.assertFalse(beat_b.is_leader())
+        self.assertTrue(beat_a.is_leader())
+
+        # Pemimpin mati tanpa melepas lease: diambil alih setelah kedaluwarsa
+        KunciTugas.objects.filter(nama=KUNCI_PEMIMPIN).update(kedaluwarsa=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(beat_b.is_leader())
+        self.assertFalse(beat_a.is_leader())
+
+        beat_b.close()
+        self.assertTrue(beat_a.is_leader())
+
+
+class RoutingCeleryTests(TestCase):
+    def route(self, task_name):
+        route = celery_app.amqp.router.route({}, task_name)
+        return route['queue'].name, route.get('priority')
+
+    def test_tugas_diarahkan_ke_queue_sesuai_beban(self):
+        self.assertEqual(self.route('core.tasks.check_payment_deadlines'), ('critical', 0))
+        self.assertEqual(self.route('core.tasks.send_notification_email'), ('email', 0))
+        self.assertEqual(self.route('core.tasks.send_notification_emails_batch')[0], 'email')
+        self.assertEqual(self.route('core.tasks.send_product_restock_broadcast')[0], 'batch')
+        self.assertEqual(self.route('core.tasks.export_transaksi_file')[0], 'batch')
+        self.assertEqual(self.route('core.tasks.refresh_rfm_segments')[0], 'batch')
+        self.assertEqual(self.route('core.tasks.render_invoice_pdf'), ('celery', None))
+
+    def test_semua_tugas_core_punya_queue_yang_terdaftar(self):
+        queues = {queue.name for queue in celery_app.conf.task_queues}
+        for name in celery_app.tasks:
+            if name.startswith('core.tasks.'):
+                self.assertIn(self.route(name)[0], queues, name)
+
+    def test_acks_late_hanya_untuk_queue_singkat(self):
+        self.assertTrue(tasks.check_payment_deadlines.acks_late)
+        self.assertTrue(tasks.send_notification_email.acks_late)
+        self.assertFalse(tasks.send_product_restock_broadcast.acks_late)
+        self.assertFalse(tasks.render_invoice_pdf.acks_late)
+
+    def test_jadwal_beat_tidak_menimpa_routing(self):
+        self.assertFalse(PeriodicTask.objects.exclude(queue=None).exists())
+
+
+class RetryEmailTests(TestCase):
+    BACKEND = 'django.core.mail.backends.locmem.EmailBackend.send_messages'
+
+    def setUp(self):
+        cache.clear()
+
+    def kirim(self, **kwargs):
+        return tasks.send_notification_email.apply(args=('Halo', 'Isi', ['a@example.com']), kwargs=kwargs)
+
+    def test_error_permanen_langsung_masuk_dead_letter(self):
+        ditolak = smtplib.SMTPRecipientsRefused({'a@example.com': (550, b'No such user')})
+        with mock.patch(self.BACKEND, side_effect=ditolak) as send:
+            self.kirim(link_url='/transaksi/1')
+        self.assertEqual(send.call_count, 1)
+        gagal = EmailGagal.objects.get()
+        self.assertEqual((gagal.jenis_error, gagal.jumlah_percobaan, gagal.link_url), ('PERMANEN', 1, '/transaksi/1'))
+
+    def test_gangguan_smtp_tidak_membuka_koneksi_berulang(self):
+        with mock.patch(self.BACKEND, side_effect=smtplib.SMTPServerDisconnected('down')) as send:
+            self.kirim()
+            self.kirim()
+        # Hanya percobaan pertama yang menghubungi SMTP; sisanya ditahan jeda gangguan
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(
+            list(EmailGagal.objects.values_list('jenis_error', 'jumlah_percobaan')),
+            [('SEMENTARA', mailer.EMAIL_MAX_RETRIES + 1)] * 2,
+        )
+
+    @mock.patch.object(mailer, 'SMTP_JEDA_GANGGUAN', 0)
+    def test_error_sementara_dicoba_ulang(self):
+        with mock.patch(self.BACKEND, side_effect=[smtplib.SMTPServerDisconnected('putus'), 1]) as send:
+            self.assertEqual(self.kirim().get(), "Email sent successfully")
+        self.assertEqual(send.call_count, 2)
+        self.assertFalse(EmailGagal.objects.exists())
+
+    def test_backoff_eksponensial_dengan_batas(self):
+        for retries in range(10):
+            batas = min(mailer.BACKOFF_MAKS, mailer.BACKOFF_DASAR * 2 ** retries)
+            self.assertTrue(batas / 2 - 1 <= mailer.hitung_backoff(retries) <= batas)
+
+    @mock.patch.object(mailer, 'SMTP_JEDA_GANGGUAN', 0)
+    def test_batch_hanya_mengulang_email_yang_belum_terkirim(self):
+        messages = [[f'S{i}', 'Isi', [f'p{i}@example.com'], None] for i in range(4)]
+        efek = [1, smtplib.SMTPRecipientsRefused({'p1@example.com': (550, b'x')}), smtplib.SMTPServerDisconnected('putus'), 1, 1]
+        with mock.patch(self.BACKEND, side_effect=efek) as send:
+            tasks.send_notification_emails_batch.apply(args=(messages,))
+        self.assertEqual([c.args[0][0].subject for c in send.call_args_list], ['S0', 'S1', 'S2', 'S2', 'S3'])
+        self.assertEqual(list(EmailGagal.objects.values_list('subject', flat=True)), ['S1'])
+
+    def test_kirim_ulang_dead_letter_massal(self):
+        for i in range(3):
+            EmailGagal.objects.create(
+                subject=f'S{i}', message='Isi', recipient_list=[f'p{i}@example.com'], link_url='/x',
+                jenis_error='SEMENTARA', error='down', jumlah_percobaan=7,
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mailer.kirim_ulang(EmailGagal.objects.all(), batch_size=2), 3)
+        self.assertEqual(sorted(m.subject for m in mail.outbox), ['S0', 'S1', 'S2'])
+        self.assertIn('[Link: Lihat Detail](/x)', mail.outbox[0].body)
+        self.assertFalse(EmailGagal.objects.filter(status='GAGAL').exists())
+        self.assertEqual(mailer.kirim_ulang(EmailGagal.objects.all()), 0)
+
+
+class TemplateNotifikasiTests(TestCase):
+    def test_email_transaksi_multipart_dengan_link_absolut(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            transaksi = buat_transaksi(buat_pelanggan('budi'), [(buat_produk('Semen'), 1)])
+        url = settings.SITE_URL + reverse('core:order_detail', args=[transaksi.id])
+        email = next(m for m in mail.outbox if m.to == ['budi@example.com'])
+        self.assertIn(f"Lihat Detail: {url}", email.body)
+        self.assertNotIn('[Link:', email.body)
+        html, mimetype = email.alternatives[0]
+        self.assertEqual(mimetype, 'text/html')
+        self.assertIn(f'href="{url}"', html)
+        # Notifikasi in-app memakai isi yang sama tanpa baris link
+        isi = Notifikasi.objects.get().isi_pesan
+        self.assertTrue(email.body.startswith(isi))
+        self.assertNotIn(url, isi)
+
+    def test_render_massal_per_penerima_tanpa_mencari_template_ulang(self):
+        notifications.render('pengingat_feedback', nama='x', transaksi_id=1)
+        engine = notifications._engine()
+        with mock.patch.object(engine, 'get_template', wraps=engine.get_template) as get_template:
+            emails = notifications.render_massal('pengingat_feedback', [
+                {'nama': 'Ani', 'transaksi_id': 1, 'link_url': '/orders/1/'},
+                {'nama': '<b>Budi</b>', 'transaksi_id': 2},
+            ])
+        self.assertEqual(get_template.call_count, 0)
+        self.assertEqual([e.subject.split('#')[1] for e in emails], ['1', '2'])
+        self.assertIn('Hai <b>Budi</b>', emails[1].text)
+        self.assertIn('Hai &lt;b&gt;Budi&lt;/b&gt;', emails[1].html)
+        self.assertIn(f'href="{settings.SITE_URL}/orders/1/"', emails[0].html)
+        self.assertNotIn('href', emails[1].html.split('<td style="padding:24px')[1].split('</td>')[0])
+
+    def test_broadcast_restock_satu_email_per_pelanggan(self):
+        for nama in ('ani', 'budi', 'cici'):
+            buat_pelanggan(nama)
+        produk = buat_produk('Semen', stok=20)
+        tasks.send_product_restock_broadcast(produk.id)
+        self.assertEqual(sorted(m.to for m in mail.outbox), [['ani@example.com'], ['budi@example.com'], ['cici@example.com']])
+        ani = next(m for m in mail.outbox if m.to == ['ani@example.com'])
+        self.assertIn('Hai Ani,', ani.body)
+        self.assertIn(settings.SITE_URL + reverse('core:product_detail', args=[produk.id]), ani.alternatives[0][0])
+
+
+class InstrumentasiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def metrik(self, **kwargs):
+        return self.client.get('/metrics', **kwargs)
+
+    def test_metrics_mencatat_durasi_query_dan_email_per_tugas(self):
+        transaksi = buat_transaksi(buat_pelanggan('budi'), [(buat_produk('Semen', stok=1), 1)])
+        cache.clear()
+        tasks.check_for_low_stock()
+        with mock.patch.object(tasks, 'send_notification_email') as kirim:
+            kirim.delay.side_effect = RuntimeError('broker mati')
+            with self.assertRaises(RuntimeError):
+                tasks.send_feedback_reminder(transaksi.id, 'S', 'Isi', ['budi@example.com'])
+
+        teks = self.metrik().content.decode()
+        label = 'jenis="task",nama="core.tasks.check_for_low_stock"'
+        self.assertIn(f'barokah_eksekusi_total{{{label},status="sukses"}} 1', teks)
+        self.assertIn(f'barokah_durasi_detik_bucket{{{label},le="+Inf"}} 1', teks)
+        self.assertIn(f'barokah_email_diantrikan_total{{{label}}} 1', teks)
+        self.assertRegex(teks, rf'barokah_query_total\{{{label}\}} [1-9]')
+        self.assertIn(
+            'barokah_eksekusi_total{jenis="task",nama="core.tasks.send_feedback_reminder",status="gagal"} 1', teks,
+        )
+
+    def test_signal_handler_mencatat_baris_yang_ditulis(self):
+        buat_transaksi(buat_pelanggan('budi'), [(buat_produk('Semen'), 1)])
+        teks = self.metrik().content.decode()
+        # Notifikasi TRANSACTION_CREATED dibuat oleh handler
+        self.assertRegex(
+            teks, r'barokah_baris_ditulis_total\{jenis="signal",nama="core.signals.handle_transaction_update"\} [1-9]',
+        )
+        self.assertEqual(self.metrik(REMOTE_ADDR='10.0.0.5').status_code, 403)
+
+    def test_log_json_berisi_extra_dan_span(self):
+        formatter = instrumentation.JsonFormatter()
+        record = logging.LogRecord('core.tasks', logging.INFO, __file__, 1, "Broadcast %s", ('restock',), None)
+        record.produk_id = 7
+        with mock.patch.object(instrumentation, '_aktif') as aktif:
+            aktif.get.return_value = (instrumentation.Pengukuran('task', 'core.tasks.x'),)
+            data = json.loads(formatter.format(record))
+        self.assertEqual(
+            {k: data[k] for k in ('level', 'logger', 'pesan', 'produk_id', 'span')},
+            {'level': 'INFO', 'logger': 'core.tasks', 'pesan': 'Broadcast restock', 'produk_id': 7, 'span': 'core.tasks.x'},
+        )
+
+    def test_log_tidak_memuat_alamat_atau_isi_email(self):
+        with self.assertLogs('core.tasks', 'INFO') as log:
+            tasks.send_notification_email('Halo', 'Isi rahasia', ['budi@example.com'], html_message='<p>Isi rahasia</p>')
+        teks = '\n'.join(instrumentation.JsonFormatter().format(record) for record in log.records)
+        self.assertNotIn('budi@example.com', teks)
+        self.assertIn('"penerima": 1', teks)
+
+        # Log kegagalan task Celery tetap ada, tanpa argumen task
+        self.assertEqual(logging.getLogger('celery.app.trace').getEffectiveLevel(), logging.WARNING)
+        record = logging.LogRecord('celery.app.trace', logging.ERROR, __file__, 1, "Task gagal", (), None)
+        record.data = {'name': 'core.tasks.send_notification_email', 'args': "['Halo', 'Isi rahasia']", 'kwargs': '{}'}
+        data = json.loads(instrumentation.JsonFormatter().format(record))
+        self.assertEqual(data['data'], {'name': 'core.tasks.send_notification_email'})
+
+
+class ProfilingQueryTests(TestCase):
+    def setUp(self):
+        self.produk = buat_produk('Semen')
+
+    @override_settings(QUERY_PROFILING=True)
+    def test_request_diprofil_per_endpoint(self):
+        self.client.get(reverse('core:product_detail', args=[self.produk.id]))
+        profil = ProfilRequest.objects.get()
+        self.assertEqual((profil.endpoint, profil.metode, profil.status_code), ('core:product_detail', 'GET', 200))
+        self.assertGreater(profil.jumlah_query, 0)
+        self.assertGreater(profil.durasi_template_ms, 0)
+
+    def test_nonaktif_kecuali_header_dari_staff(self):
+        url = reverse('core:products')
+        self.client.get(url, HTTP_X_PROFIL_QUERY='1')
+        self.assertFalse(ProfilRequest.objects.exists())
+
+        self.client.force_login(User.objects.create_superuser('staf', 'staf@barokah.com', 'rahasia'))
+        self.client.get(url)
+        self.assertFalse(ProfilRequest.objects.exists())
+        self.client.get(url, HTTP_X_PROFIL_QUERY='1')
+        self.assertEqual(ProfilRequest.objects.get().endpoint, 'core:products')
+
+        response = self.client.get(reverse('penjualan_admin:core_profilrequest_ringkasan'), {'jam': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['endpoint'] for e in response.context['endpoints']], ['core:products'])
+        self.assertContains(self.client.get(reverse('penjualan_admin:core_profilrequest_changelist')), 'Ringkasan per Endpoint')
+
+    @override_settings(QUERY_PROFILING=True, QUERY_PROFILING_BATAS={'query': 1000, 'db_ms': 1000, 'duplikat': 2, 'durasi_ms': 10000})
+    def test_query_duplikat_melewati_batas_dicatat(self):
+        from . import profiling
+        profil = profiling.ProfilQuery()
+        with connection.execute_wrapper(profil):
+            for i in range(4):
+                list(Produk.objects.filter(pk=self.produk.id + i))
+            list(Produk.objects.filter(pk__in=[1, 2, 3]))
+            list(Produk.objects.filter(pk__in=[1]))
+        self.assertEqual((profil.jumlah_query, profil.query_duplikat), (6, 4))
+        self.assertEqual([n for n, _ in profil.duplikat_teratas()], [4, 2])
+
+        with self.assertLogs('core.profiling', 'WARNING') as log:
+            profiling.ProfilingQueryMiddleware(lambda request: None).simpan(
+                mock.Mock(method='GET', path='/x/'), mock.Mock(status_code=200), profil, 0.01, 'core:x',
+            )
+        self.assertEqual(log.records[0].terlampaui, ['duplikat'])
+        self.assertIn('4x SELECT', ProfilRequest.objects.get().duplikat_teratas)
+
+
+class BenchmarkTests(TestCase):
+    def generate(self, **kwargs):
+        opsi = dict(transaksi=60, produk=15, pelanggan=8, kategori=3, batch_size=25, stdout=io.StringIO())
+        call_command('generate_data', **dict(opsi, **kwargs))
+
+    def test_generate_data_konsisten_tanpa_email(self):
+        self.generate()
+        self.assertEqual(
+            [Kategori.objects.count(), Produk.objects.count(), Pelanggan.objects.count(), Transaksi.objects.count()],
+            [3, 15, 8, 60],
+        )
+        for transaksi in Transaksi.objects.prefetch_related('detailtransaksi_set'):
+            details = transaksi.detailtransaksi_set.all()
+            self.assertTrue(1 <= len(details) <= 5)
+            self.assertEqual(transaksi.total, sum(d.sub_total for d in details) + transaksi.ongkir)
+            if transaksi.status_transaksi in ('DIPROSES', 'MENUNGGU VERIFIKASI'):
+                self.assertGreater(transaksi.tanggal, timezone.now() - timedelta(hours=48))
+        self.assertEqual(Transaksi.objects.exclude(status_transaksi='SELESAI').exclude(selesai_at=None).count(), 0)
+        self.assertEqual(mail.outbox, [])
+
+        # Run kedua menambah data tanpa bentrok id
+        self.generate(transaksi=10)
+        self.assertEqual(Transaksi.objects.count(), 70)
+
+    def test_benchmark_semua_skenario_json_dan_regresi(self):
+        self.generate()
+        jumlah_awal = (Transaksi.objects.count(), DetailTransaksi.objects.count(), User.objects.count())
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'hasil.json'
+            call_command('benchmark', iterasi=2, pemanasan=0, output=str(output), stdout=io.StringIO())
+            data = json.loads(output.read_text())
+            self.assertEqual(set(data['skenario']), set(benchmarks.daftar_skenario()))
+            self.assertEqual(data['jumlah_data']['Transaksi'], 60)
+            checkout = data['skenario']['checkout']
+            self.assertEqual(checkout['iterasi'], 2)
+            self.assertGreater(checkout['query']['median'], 0)
+            self.assertLessEqual(checkout['latensi_ms']['p50'], checkout['latensi_ms']['p99'])
+            # Semua perubahan (transaksi checkout, superuser admin) di-rollback
+            self.assertEqual((Transaksi.objects.count(), DetailTransaksi.objects.count(), User.objects.count()), jumlah_awal)
+
+            # Hasil lama yang jauh lebih cepat -> regresi
+            data['skenario']['keranjang']['latensi_ms']['p95'] = 0.0001
+            lama = Path(tmp) / 'lama.json'
+            lama.write_text(json.dumps(data))
+            with self.assertRaisesMessage(CommandError, '1 regresi'):
+                call_command(
+                    'benchmark', iterasi=2, pemanasan=0, skenario=['keranjang'], output=str(output),
+                    bandingkan=str(lama), gagal_jika_regresi=True, stdout=io.StringIO(),
+                )
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_pengguna_virtual_menjalankan_alur_belanja(self):
+        produk = [buat_produk(nama, Decimal('10000'), 50) for nama in ('Semen', 'Pasir')]
+        call_command('loadtest', siapkan_pelanggan=2, pengguna=0, stdout=io.StringIO())
+        statistik = loadtest.Statistik()
+        pengguna = loadtest.PenggunaVirtual(
+            self.live_server_url, 'loadtest0', loadtest.PASSWORD_DEFAULT, statistik, threading.Event(), jeda=(0, 0),
+        )
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            self.assertTrue(pengguna.login())
+            pengguna.belanja()
+            pengguna.katalog()
+
+        hasil = statistik.ringkas(1)
+        self.assertEqual({nama: data['contoh_error'] for nama, data in hasil.items() if data['error']}, {})
+        for nama in ('core:products', 'core:cart_add', 'core:checkout', 'core:payment_upload', 'core:order_detail'):
+            self.assertIn(nama, hasil)
+        # Alur katalog: detail pesanan dibuka dari riwayat
+        self.assertEqual((hasil['core:home']['request'], hasil['core:order_history']['request']), (1, 1))
+        self.assertEqual(hasil['core:order_detail']['request'], 2)
+        transaksi = Transaksi.objects.get(idPelanggan__username='loadtest0')
+        self.assertEqual(transaksi.status_transaksi, 'MENUNGGU VERIFIKASI')
+        self.assertTrue(transaksi.detailtransaksi_set.filter(idProduk__in=produk).exists())
+
+    def test_smtp_sink_menerima_email_dari_backend_smtp(self):
+        from .management.commands.smtp_sink import SMTPSink
+
+        sink = SMTPSink()
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(sink.tangani, '127.0.0.1', 0))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            port = server.sockets[0].getsockname()[1]
+            connection = mail.get_connection(
+                'django.core.mail.backends.smtp.EmailBackend', host='127.0.0.1', port=port,
+                username='user', password='rahasia', use_tls=False, timeout=5,
+            )
+            pesan = [
+                mail.EmailMessage('Uji', 'Isi', 'toko@example.com', ['a@example.com', 'b@example.com'], connection=connection),
+                mail.EmailMessage('Uji 2', 'Isi', 'toko@example.com', ['c@example.com'], connection=connection),
+            ]
+            self.assertEqual(connection.send_messages(pesan), 2)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+        self.assertEqual((sink.jumlah, sink.penerima, sink.koneksi), (2, 3, 1))
+
+
+class KonfigurasiDatabaseTests(TestCase):
+    def test_mysql_dari_environment_dengan_replika(self):
+        hasil = databases(Path('/srv'), {
+            'DB_ENGINE': 'mysql', 'DB_NAME': 'barokah', 'DB_USER': 'app', 'DB_PASSWORD': 'rahasia',
+            'DB_HOST': 'db-primary', 'DB_CONN_MAX_AGE': '300', 'DB_REPLICA_HOST': 'db-replica',
+        })
+        default, replica = hasil['default'], hasil['replica']
+        self.assertEqual(default['ENGINE'], 'django.db.backends.mysql')
+        self.assertEqual((default['HOST'], default['CONN_MAX_AGE'], default['CONN_HEALTH_CHECKS']), ('db-primary', 300, True))
+        self.assertEqual(default['OPTIONS']['charset'], 'utf8mb4')
+        # Nilai replika yang tidak diisi mengikuti primary
+        self.assertEqual((replica['HOST'], replica['NAME'], replica['USER'], replica['PASSWORD']), ('db-replica', 'barokah', 'app', 'rahasia'))
+        self.assertEqual(replica['TEST'], {'MIRROR': 'default'})
+
+        with self.assertRaises(ValueError):
+            databases(Path('/srv'), {'DB_ENGINE': 'postgres'})
+
+    def test_sqlite_default_dengan_pragma(self):
+        self.assertEqual(databases(Path('/srv'), {}), {
+            'default': {'ENGINE': 'barokah.sqlite3', 'NAME': Path('/srv/db.sqlite3'), 'CONN_MAX_AGE': 0},
+        })
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+class RouterReplikaTests(TestCase):
+    def setUp(self):
+        routers._status.clear()
+        self.addCleanup(routers._status.clear)
+
+    @mock.patch('core.routers.replika_sehat', return_value=True)
+    def test_baca_laporan_ke_replika_tulis_dan_checkout_ke_primary(self, sehat):
+        self.assertEqual(Transaksi.objects.all().db, 'default')
+        with routers.baca_replika():
+            self.assertEqual(Transaksi.objects.all().db, 'replica')
+            with routers.pakai_primary():
+                self.assertEqual(Transaksi.objects.all().db, 'default')
+            # Model yang sudah ditulis di blok ini dibaca lagi dari primary
+            SegmenPelanggan.objects.filter(pk=0).delete()
+            self.assertEqual(SegmenPelanggan.objects.all().db, 'default')
+            self.assertEqual(Transaksi.objects.all().db, 'replica')
+
+            sehat.return_value = False
+            self.assertEqual(Transaksi.objects.all().db, 'default')
+        sehat.return_value = True
+        self.assertEqual(exports.export_queryset().db, 'replica')
+
+    def test_replika_tertinggal_atau_mati_kembali_ke_primary(self):
+        self.assertFalse(routers.replika_sehat())  # alias 'replica' tidak dikonfigurasi
+
+        with mock.patch.dict(connections.settings, {'replica': {}}), \
+                mock.patch('core.routers.lag_replika', return_value=120) as lag:
+            with self.assertLogs('core.routers', 'WARNING') as log:
+                self.assertFalse(routers.replika_sehat())
+            self.assertEqual(log.records[0].lag_detik, 120)
+            # Hasil cek di-cache per DATABASE_REPLICA_CEK_INTERVAL
+            self.assertFalse(routers.replika_sehat())
+            self.assertEqual(lag.call_count, 1)
+
+            routers._status.clear()
+            lag.return_value = 2
+            self.assertTrue(routers.replika_sehat())
+            self.assertEqual(routers.alias_laporan(), 'replica')
+
+            routers._status.clear()
+            lag.side_effect = DatabaseError('Can\'t connect to MySQL server')
+            with self.assertLogs('core.routers', 'WARNING'):
+                self.assertEqual(routers.alias_laporan(), 'default')
+
+
+class ViewAsyncTests(TestCase):
+    """Lewat AsyncClient: handler ASGI dan middleware berjalan dalam mode async seperti di uvicorn."""
+
+    def setUp(self):
+        self.pelanggan = buat_pelanggan('gita')
+        self.produk = buat_produk('Semen')
+        self.transaksi = buat_transaksi(self.pelanggan, [(self.produk, 2)], status='DIPROSES')
+        self.lain = buat_transaksi(buat_pelanggan('hadi'), [(self.produk, 1)])
+        session = self.async_client.session
+        session['pelanggan_id'] = self.pelanggan.id
+        session.save()
+
+    async def test_katalog_dan_pesanan_async(self):
+        for url in (reverse('core:home'), reverse('core:products'), reverse('core:order_history')):
+            self.assertEqual((await self.async_client.get(url)).status_code, 200)
+        response = await self.async_client.get(reverse('core:product_detail', args=[self.produk.id]))
+        self.assertContains(response, 'Semen')
+        # Navbar membaca sesi yang sudah dimuat di view
+        self.assertContains(response, reverse('core:order_history'))
+        response = await self.async_client.get(reverse('core:order_detail', args=[self.transaksi.id]))
+        self.assertContains(response, 'Semen')
+
+        self.assertEqual((await self.async_client.get(reverse('core:order_detail', args=[self.lain.id]))).status_code, 404)
+        self.assertEqual((await self.async_client.get(reverse('core:product_detail', args=[0]))).status_code, 404)
+        response = await AsyncClient().get(reverse('core:order_history'))
+        self.assertRedirects(response, reverse('core:login'), fetch_redirect_response=False)
+
+    @mock.patch('core.routers.replika_sehat', return_value=True)
+    async def test_upload_bukti_bayar_async_di_primary(self, sehat):
+        url = reverse('core:payment_upload', args=[self.transaksi.id])
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            # Alias 'replica' tidak ada: query yang lolos dari pakai_primary akan gagal
+            with routers.baca_replika():
+                response = await self.async_client.post(url, {'bukti': SimpleUploadedFile('bukti.png', b'png', 'image/png')})
+            self.assertRedirects(response, reverse('core:order_detail', args=[self.transaksi.id]), fetch_redirect_response=False)
+
+            transaksi = await Transaksi.objects.aget(pk=self.transaksi.id)
+            self.assertEqual(transaksi.status_transaksi, 'MENUNGGU VERIFIKASI')
+            with transaksi.bukti_bayar.open('rb') as f:
+                self.assertEqual(f.read(), b'png')
+
+    @override_settings(QUERY_PROFILING=True)
+    async def test_profiling_mencatat_query_view_async(self):
+        await self.async_client.get(reverse('core:order_detail', args=[self.transaksi.id]))
+        profil = await ProfilRequest.objects.aget()
+        self.assertEqual((profil.endpoint, profil.status_code), ('core:order_detail', 200))
+        self.assertEqual(profil.jumlah_query, 4)  # session, pelanggan, transaksi, item+produk
+
+
+# Cache test (LocMemCache) satu proses, anggap dibagi seperti Redis di produksi
+@override_settings(KATALOG_ETAG=True)
+class CachingKatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.produk = buat_produk('Semen')
+
+    def test_etag_katalog_304_sampai_produk_atau_kategori_berubah(self):
+        url = reverse('core:product_detail', args=[self.produk.id])
+        # Kunjungan pertama mendapat cookie CSRF, yang ikut menentukan ETag
+        self.client.get(url)
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        # Pengunjung anonim tanpa sesi: 304 tanpa query dan tanpa body
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+        self.assertEqual(self.client.get(reverse('core:products'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produk.stok_produk = 7
+            self.produk.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Stok: 7')
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Kategori.objects.create(nama_kategori='Bangunan').delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_berbeda_per_pengunjung_dan_tanpa_cache_saat_ada_pesan(self):
+        url = reverse('core:home')
+        self.client.get(reverse('core:products'))
+        anonim = self.client.get(url)['ETag']
+
+        session = self.client.session
+        session['pelanggan_id'] = buat_pelanggan('indah').id
+        session.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonim)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], anonim)
+        self.assertIn('Cookie', response['Vary'])
+
+        # Pesan yang belum tampil: halaman harus di-render dan tidak boleh di-cache
+        self.client.post(reverse('core:cart_add', args=[self.produk.id]))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn('no-store', response['Cache-Control'])
+
+    @override_settings(KATALOG_ETAG=False)
+    def test_tanpa_cache_bersama_tidak_ada_etag(self):
+        url = reverse('core:product_detail', args=[self.produk.id])
+        self.client.get(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('no-store', response['Cache-Control'])
+
+    def test_upload_ber_hash_disajikan_immutable(self):
+        from django.core.files.storage import default_storage
+
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            nama = default_storage.save('produk_images/semen.png', io.BytesIO(b'png'))
+            self.assertRegex(nama, r'^produk_images/semen\.[0-9a-f]{12}\.png$')
+            # Isi yang sama diupload lagi: nama tetap unik
+            self.assertNotEqual(default_storage.save('produk_images/semen.png', io.BytesIO(b'png')), nama)
+            self.assertEqual(default_storage.save('exports/laporan.csv', io.BytesIO(b'a')), 'exports/laporan.csv')
+
+            response = self.client.get(settings.MEDIA_URL + nama)
+            self.assertEqual(b''.join(response.streaming_content), b'png')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn(f'max-age={caching.SETAHUN}', response['Cache-Control'])
+
+            bukti = default_storage.save('bukti_pembayaran/bukti.png', io.BytesIO(b'png'))
+            self.assertEqual(self.client.get(settings.MEDIA_URL + bukti).status_code, 404)
+
+            Path(media, 'produk_images', 'lama.png').write_bytes(b'png')
+            response = self.client.get(settings.MEDIA_URL + 'produk_images/lama.png')
+            self.assertNotIn('immutable', response['Cache-Control'])
+
+            # Path traversal keluar dari produk_images/ (atau MEDIA_ROOT) ditolak
+            Path(media, 'rahasia.txt').write_bytes(b'rahasia')
+            for path in ('produk_images/../rahasia.txt', 'produk_images/%2e%2e/rahasia.txt',
+                         'produk_images/../../db.sqlite3', 'produk_images/%2e%2e/bukti_pembayaran/' + bukti.split('/')[-1]):
+                self.assertEqual(self.client.get(settings.MEDIA_URL + path).status_code, 404, path)
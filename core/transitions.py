@@ -0,0 +1,94 @@
+"""
+Perubahan status pesanan secara massal (aksi admin "Tandai ...").
+
+Alih-alih save() per pesanan (yang memicu signal, query tambahan dan beberapa
+.delay() per pesanan), satu aksi menjalankan:
+
+1. SELECT ... FOR UPDATE id + status lama pesanan yang memenuhi syarat transisi,
+2. satu UPDATE bersyarat (status asal masih sesuai) untuk semua pesanan itu,
+3. bulk_create Notifikasi (untuk SELESAI),
+4. render email sekaligus (notifications.render_massal) lalu dispatch per
+   kelompok EMAIL_BATCH_SIZE setelah transaksi database di-commit.
+   Pengingat feedback dikirim oleh sweep periodik
+   (tasks.sweep_feedback_reminders) berdasarkan selesai_at.
+"""
+import logging
+
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from barokah.database import atomic_tulis
+
+from . import notifications
+from .models import Transaksi, Notifikasi, STATUS_TANPA_PENGINGAT_BAYAR
+
+logger = logging.getLogger(__name__)
+
+# Status tujuan -> status asal yang diizinkan
+TRANSISI_STATUS = {
+    'DIBAYAR': ['DIPROSES', 'MENUNGGU VERIFIKASI'],
+    'DIKIRIM': ['DIBAYAR'],
+    'SELESAI': ['DIBAYAR', 'DIKIRIM'],
+    'DIBATALKAN': ['DIPROSES', 'MENUNGGU VERIFIKASI', 'DIBAYAR'],
+}
+
+def ubah_status_massal(queryset, status_baru, now=None):
+    """
+    Pindahkan pesanan dalam queryset ke status_baru. Pesanan yang status asalnya
+    tidak diizinkan (lihat TRANSISI_STATUS) dilewati.
+    Mengembalikan jumlah pesanan yang berubah.
+    """
+    status_asal = TRANSISI_STATUS[status_baru]
+    now = now or timezone.now()
+
+    with atomic_tulis():
+        status_lama = dict(
+            queryset.select_related(None).order_by()
+            .filter(status_transaksi__in=status_asal)
+            .select_for_update()
+            .values_list('id', 'status_transaksi')
+        )
+        if not status_lama:
+            return 0
+
+        # updated_at diisi manual karena auto_now tidak berlaku untuk UPDATE queryset
+        fields = {
+            'status_transaksi': status_baru,
+            'is_payment_reminder_sent': status_baru in STATUS_TANPA_PENGINGAT_BAYAR,
+            'updated_at': now,
+        }
+        if status_baru == 'SELESAI':
+            fields['selesai_at'] = now
+        jumlah = Transaksi.objects.filter(pk__in=status_lama, status_transaksi__in=status_asal).update(**fields)
+
+        rows = list(Transaksi.objects.filter(pk__in=status_lama).values_list(
+            'id', 'total', 'idPelanggan_id', 'idPelanggan__nama_pelanggan', 'idPelanggan__email'
+        ))
+        contexts = [
+            {'nama': nama, 'transaksi_id': transaksi_id, 'total': total,
+             'status_lama': status_lama[transaksi_id], 'link_url': reverse('core:order_detail', args=[transaksi_id])}
+            for transaksi_id, total, _, nama, _ in rows
+        ]
+        emails_status = notifications.render_massal('perubahan_status', contexts, umum={'status_baru': status_baru})
+        emails_selesai = (
+            notifications.render_massal('transaksi_selesai', contexts) if status_baru == 'SELESAI' else [None] * len(rows)
+        )
+
+        messages, notifikasi = [], []
+        for (_, _, pelanggan_id, _, alamat), email_status, email_selesai in zip(rows, emails_status, emails_selesai):
+            if alamat:
+                messages.append(notifications.item_email(email_status, [alamat]))
+            if email_selesai:
+                notifikasi.append(Notifikasi(
+                    idPelanggan_id=pelanggan_id, tipe_pesan='TRANSACTION_COMPLETED', isi_pesan=email_selesai.pesan,
+                    is_read=False,
+                ))
+                if alamat:
+                    messages.append(notifications.item_email(email_selesai, [alamat]))
+
+        Notifikasi.objects.bulk_create(notifikasi)
+        transaction.on_commit(lambda: notifications.kirim_massal(messages))
+
+    logger.info("Status pesanan diubah massal", extra={'jumlah': jumlah, 'status': status_baru})
+    return jumlah
@@ -28,4 +28,5 @@ urlpatterns = [
     path('orders/', views.order_history, name='order_history'),
     path('orders/<int:order_id>/', views.order_detail, name='order_detail'),
     path('orders/<int:order_id>/feedback/', views.submit_feedback, name='submit_feedback'),
+    path('orders/<int:order_id>/invoice/', views.invoice_download, name='invoice_download'),
 ]
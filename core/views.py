@@ -1,20 +1,69 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Prefetch, Q
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from .models import Pelanggan, Produk, Transaksi, DetailTransaksi
+from .models import Pelanggan, Produk, Transaksi, DetailTransaksi, REVENUE_STATUSES
+from .recommendations import aget_produk_terkait, get_rekomendasi_pelanggan
+from .pricing import hitung_keranjang
+from .invoices import invoice_queryset, cached_invoice, jadwalkan_render, render_gagal, ulangi_render, storage_invoice
+from .routers import pakai_primary
+from .caching import halaman_katalog
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 
 # Simple login_required decorator using session
 from functools import wraps
-from django.http import HttpResponseRedirect
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponseRedirect, FileResponse, HttpResponse, HttpResponseForbidden, Http404
+from django.conf import settings
+from barokah.database import atomic_tulis
+from . import instrumentation
+
+# View async (home, produk, pesanan, upload) berjalan tanpa thread per request di
+# bawah ASGI (uvicorn, lihat barokah/asgi.py); di bawah WSGI tetap berfungsi.
+# Di dalamnya query memakai API async ORM, dan semua yang masih sync (sesi,
+# storage) dibungkus sync_to_async. Template boleh di-render langsung asal
+# tidak ada query lazy: queryset dievaluasi dulu dan sesi dimuat dengan _muat_sesi.
+
+
+async def _muat_sesi(request):
+	"""Muat sesi di thread (satu query); setelah itu navbar dan messages di template tidak query lagi."""
+	return await sync_to_async(request.session.get)('pelanggan_id')
+
+
+async def _aget_object_or_404(klass, *args, **kwargs):
+	queryset = klass._default_manager.all() if hasattr(klass, '_default_manager') else klass
+	try:
+		return await queryset.aget(*args, **kwargs)
+	except queryset.model.DoesNotExist:
+		raise Http404(f"{queryset.model._meta.object_name} tidak ditemukan.")
+
+
+async def _simpan_upload(nama, file):
+	# Storage Django belum punya API async: tulis di thread. UploadedFile diteruskan
+	# langsung supaya disalin per chunk (atau dipindah jika file sementara), tidak dibaca utuh ke memori
+	return await sync_to_async(default_storage.save)(nama, file)
 
 
 def login_required(view_func):
+	if iscoroutinefunction(view_func):
+		@wraps(view_func)
+		async def _awrapped(request, *args, **kwargs):
+			pelanggan_id = await _muat_sesi(request)
+			if pelanggan_id:
+				try:
+					request.pelanggan = await Pelanggan.objects.aget(pk=pelanggan_id)
+				except Pelanggan.DoesNotExist:
+					request.session.pop('pelanggan_id', None)
+					return redirect('core:login')
+				return await view_func(request, *args, **kwargs)
+			return redirect('core:login')
+		return _awrapped
+
 	@wraps(view_func)
 	def _wrapped(request, *args, **kwargs):
 		if request.session.get('pelanggan_id'):
@@ -37,13 +86,19 @@ def format_currency(value):
 		return value
 
 
-def home(request):
-	products = Produk.objects.all()[:6]
+# Halaman katalog: 304 selama katalog tidak berubah (core/caching.py). Isinya per
+# pengunjung (navbar login, token CSRF), jadi browser selalu revalidasi, bukan max-age.
+@halaman_katalog(no_cache=True)
+async def home(request):
+	await _muat_sesi(request)
+	products = [p async for p in Produk.objects.all()[:6]]
 	return render(request, 'core/home.html', {'products': products})
 
 
-def products(request):
-	products = Produk.objects.all()
+@halaman_katalog(no_cache=True)
+async def products(request):
+	await _muat_sesi(request)
+	products = [p async for p in Produk.objects.all()]
 	return render(request, 'core/products.html', {'products': products})
 
 
@@ -105,26 +160,20 @@ def logout_view(request):
 
 @login_required
 def cart_view(request):
-	# Cart is stored in session as list of dicts: {'product_id': id, 'qty': n}
-	cart = request.session.get('cart', [])
-	items = []
-	subtotal = 0
-	for entry in cart:
-		try:
-			p = Produk.objects.get(pk=entry.get('product_id'))
-			qty = int(entry.get('qty', 1))
-			total = float(p.harga_produk) * qty
-			subtotal += total
-			items.append({'product': p, 'qty': qty, 'total': total})
-		except Produk.DoesNotExist:
-			continue
+	# Harga akhir per baris dari mesin harga (diskon produk + loyalitas ulang tahun)
+	items, subtotal, aturan = hitung_keranjang(request.pelanggan, request.session.get('cart', []))
 	# Do not auto-calculate ongkir here; admin will set it later
 	grand_total = subtotal
+	rekomendasi = get_rekomendasi_pelanggan(
+		request.pelanggan.id, exclude_ids=[it['product'].id for it in items]
+	)
 	return render(request, 'core/cart.html', {
 		'items': items,
 		'subtotal': subtotal,
 		'grand_total': grand_total,
 		'format_currency': format_currency,
+		'rekomendasi': rekomendasi,
+		'persen_loyalitas': aturan.persen_loyalitas,
 	})
 
 
@@ -211,47 +260,128 @@ def account_manage(request):
 	return render(request, 'core/account_manage.html', {'pelanggan': pel, 'message': message})
 
 
+ORDER_HISTORY_PAGE_SIZE = 20
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _encode_cursor(order):
+	"""Cursor keyset (tanggal, id) dalam mikrodetik agar presisi tidak hilang di URL."""
+	return f"{(order.tanggal - _EPOCH) // timedelta(microseconds=1)}_{order.id}"
+
+
+def _decode_cursor(value):
+	try:
+		micro, pk = value.split('_')
+		return _EPOCH + timedelta(microseconds=int(micro)), int(pk)
+	except (AttributeError, ValueError):
+		return None
+
+
+def _orders_with_items(pel):
+	"""Pesanan milik pelanggan beserta item dan produknya (dua query, tanpa lazy load di template)."""
+	return Transaksi.objects.filter(idPelanggan_id=pel.id).prefetch_related(
+		Prefetch('detailtransaksi_set', queryset=DetailTransaksi.objects.select_related('idProduk').order_by('id'))
+	)
+
+
 @login_required
-def order_history(request):
+async def order_history(request):
 	pel = request.pelanggan
-	orders = Transaksi.objects.filter(idPelanggan=pel).order_by('-tanggal')
-	return render(request, 'core/order_history.html', {'orders': orders, 'format_currency': format_currency})
+	orders = (
+		Transaksi.objects.filter(idPelanggan_id=pel.id)
+		.only('id', 'tanggal', 'total', 'status_transaksi')
+		.order_by('-tanggal', '-id')
+	)
+	# Keyset pagination: halaman berikutnya dimulai setelah (tanggal, id) terakhir, tanpa OFFSET
+	cursor = _decode_cursor(request.GET.get('sebelum'))
+	if cursor:
+		tanggal, pk = cursor
+		orders = orders.filter(Q(tanggal__lt=tanggal) | Q(tanggal=tanggal, id__lt=pk))
+	orders = [o async for o in orders[:ORDER_HISTORY_PAGE_SIZE + 1]]
+	next_cursor = None
+	if len(orders) > ORDER_HISTORY_PAGE_SIZE:
+		orders = orders[:ORDER_HISTORY_PAGE_SIZE]
+		next_cursor = _encode_cursor(orders[-1])
+	return render(request, 'core/order_history.html', {
+		'orders': orders,
+		'next_cursor': next_cursor,
+		'is_first_page': cursor is None,
+		'format_currency': format_currency,
+	})
 
 
 @login_required
-def order_detail(request, order_id):
+async def order_detail(request, order_id):
 	pel = request.pelanggan
-	order = get_object_or_404(Transaksi, pk=order_id)
-	if order.idPelanggan.id != pel.id:
-		return redirect('core:order_history')
-	items = DetailTransaksi.objects.filter(idTransaksi=order)
+	order = await _aget_object_or_404(_orders_with_items(pel), pk=order_id)
+	items = order.detailtransaksi_set.all()
 	can_feedback = (order.status_transaksi == 'SELESAI') and (not order.feedback)
 	return render(request, 'core/order_detail.html', {
 		'order': order,
 		'items': items,
 		'can_feedback': can_feedback,
+		'can_invoice': order.status_transaksi in REVENUE_STATUSES,
 		'format_currency': format_currency,
 	})
 
 
 @login_required
-def submit_feedback(request, order_id):
+async def submit_feedback(request, order_id):
 	pel = request.pelanggan
-	order = get_object_or_404(Transaksi, pk=order_id)
-	if order.idPelanggan.id != pel.id:
-		return redirect('core:order_history')
-	if request.method == 'POST' and order.status_transaksi == 'SELESAI' and not order.feedback:
-		feedback = request.POST.get('feedback')
-		order.feedback = feedback
+	if request.method == 'POST':
+		fields = {'feedback': request.POST.get('feedback'), 'updated_at': timezone.now()}
+		path = None
 		if request.FILES.get('fotofeedback'):
 			file = request.FILES['fotofeedback']
-			# Save file using default storage
-			path = default_storage.save('feedback_images/' + file.name, ContentFile(file.read()))
-			order.fotofeedback = path
-		order.save()
-	return redirect('core:order_detail', order_id=order.id)
+			path = await _simpan_upload('feedback_images/' + file.name, file)
+			fields['fotofeedback'] = path
+		# Update bersyarat: kepemilikan, status SELESAI dan "belum ada feedback" dicek dalam satu query.
+		# Submit ganda tidak menimpa feedback, dan tanpa save() notifikasi SELESAI tidak terkirim ulang.
+		updated = await Transaksi.objects.filter(
+			Q(feedback__isnull=True) | Q(feedback=''),
+			pk=order_id, idPelanggan_id=pel.id, status_transaksi='SELESAI',
+		).aupdate(**fields)
+		if not updated and path:
+			await sync_to_async(default_storage.delete)(path)
+	return redirect('core:order_detail', order_id=order_id)
+
+
+# Jumlah muat ulang otomatis halaman invoice_pending (setiap 3 detik)
+INVOICE_POLL_MAKS = 20
+
+
+@login_required
+def invoice_download(request, order_id):
+	pel = request.pelanggan
+	order = get_object_or_404(invoice_queryset(), pk=order_id, idPelanggan=pel)
+	if order.status_transaksi not in REVENUE_STATUSES:
+		return redirect('core:order_detail', order_id=order.id)
 
+	# PDF yang sudah pernah dibuat cukup disajikan dari storage
+	path = cached_invoice(order)
+	if path:
+		return FileResponse(
+			storage_invoice().open(path, 'rb'), as_attachment=True,
+			filename=f"invoice-{order.id}.pdf", content_type='application/pdf',
+		)
+
+	# Belum ada: render di worker Celery (sekali per RENDER_TIMEOUT, lihat core/invoices.py).
+	# Halaman memuat ulang dengan ?coba=N sampai file siap, paling banyak INVOICE_POLL_MAKS kali
+	if request.GET.get('ulang'):
+		ulangi_render(order.id)
+	if render_gagal(order.id):
+		return render(request, 'core/invoice_pending.html', {'order': order, 'gagal': True}, status=500)
+	jadwalkan_render(order.id)
+	try:
+		coba = max(int(request.GET.get('coba', 0)), 0)
+	except ValueError:
+		coba = 0
+	context = {'order': order, 'coba_berikutnya': coba + 1 if coba < INVOICE_POLL_MAKS else None}
+	return render(request, 'core/invoice_pending.html', context, status=202)
 
+
+# Checkout dan upload bukti bayar selalu di primary, walau nanti dipanggil dari blok baca_replika
+@pakai_primary()
 @login_required
 def checkout(request):
 	pel = request.pelanggan
@@ -259,47 +389,42 @@ def checkout(request):
 	if not cart:
 		return redirect('core:cart')
 
-	items = []
-	subtotal = 0
-	for entry in cart:
-		try:
-			p = Produk.objects.get(pk=entry.get('product_id'))
-			qty = int(entry.get('qty', 1))
-			total = float(p.harga_produk) * qty
-			subtotal += total
-			items.append({'product': p, 'qty': qty, 'total': total})
-		except Produk.DoesNotExist:
-			continue
+	items, subtotal, aturan = hitung_keranjang(pel, cart)
 
 	if request.method == 'POST':
 		alamat = request.POST.get('alamat_pengiriman')
 		# create transaksi and save uploaded bukti if provided
 		now = timezone.now()
 		batas = now + timezone.timedelta(hours=24)
-		transaksi = Transaksi.objects.create(
-			tanggal=now,
-			total=subtotal,
-			ongkir=0,
-			status_transaksi='MENUNGGU_VERIFIKASI_PEMBAYARAN',
-			idPelanggan=pel,
-			alamat_pengiriman=alamat,
-			waktu_checkout=now,
-			batas_waktu_bayar=batas
-		)
-		# create detail transaksi
-		for it in items:
-			DetailTransaksi.objects.create(
-				idTransaksi=transaksi,
-				idProduk=it['product'],
-				jumlah_produk=it['qty'],
-				sub_total=it['total']
+		# Pesanan dan itemnya dalam satu transaksi tulis (BEGIN IMMEDIATE di SQLite)
+		with atomic_tulis():
+			transaksi = Transaksi.objects.create(
+				tanggal=now,
+				total=subtotal,
+				ongkir=0,
+				status_transaksi='DIPROSES',
+				idPelanggan=pel,
+				alamat_pengiriman=alamat,
+				waktu_checkout=now,
+				batas_waktu_bayar=batas
 			)
+			# create detail transaksi
+			for it in items:
+				DetailTransaksi.objects.create(
+					idTransaksi=transaksi,
+					idProduk=it['product'],
+					jumlah_produk=it['qty'],
+					harga_satuan=it['harga'],
+					sub_total=it['total']
+				)
 
 		# handle uploaded bukti_bayar
 		if request.FILES.get('bukti_bayar'):
 			f = request.FILES['bukti_bayar']
 			path = default_storage.save('bukti_pembayaran/' + f.name, ContentFile(f.read()))
 			transaksi.bukti_bayar = path
+			# Sama seperti payment_upload
+			transaksi.status_transaksi = 'MENUNGGU VERIFIKASI'
 			transaksi.save()
 
 		# clear cart
@@ -312,25 +437,38 @@ def checkout(request):
 	return render(request, 'core/payment_address.html', {'items': items, 'subtotal': subtotal, 'checkout_deadline': preview_deadline})
 
 
+@pakai_primary()
 @login_required
-def payment_upload(request, order_id):
+async def payment_upload(request, order_id):
 	pel = request.pelanggan
-	order = get_object_or_404(Transaksi, pk=order_id)
-	if order.idPelanggan.id != pel.id:
-		return redirect('core:order_history')
+	# idPelanggan ikut dimuat: Transaksi.save() membaca email pelanggan saat status berubah
+	order = await _aget_object_or_404(
+		Transaksi.objects.select_related('idPelanggan'), pk=order_id, idPelanggan_id=pel.id
+	)
 
 	if request.method == 'POST' and request.FILES.get('bukti'):
 		f = request.FILES['bukti']
-		path = default_storage.save('bukti_pembayaran/' + f.name, ContentFile(f.read()))
-		order.bukti_bayar = path
+		order.bukti_bayar = await _simpan_upload('bukti_pembayaran/' + f.name, f)
 		# set status to waiting verification
 		order.status_transaksi = 'MENUNGGU VERIFIKASI'
-		order.save()
+		await order.asave()
 		return redirect('core:order_detail', order_id=order.id)
 
 	return render(request, 'core/payment_upload.html', {'order': order, 'format_currency': format_currency})
 
 
-def product_detail(request, product_id):
-	p = get_object_or_404(Produk, pk=product_id)
-	return render(request, 'core/product_detail.html', {'product': p})
+@halaman_katalog(no_cache=True)
+async def product_detail(request, product_id):
+	await _muat_sesi(request)
+	p = await _aget_object_or_404(Produk, pk=product_id)
+	return render(request, 'core/product_detail.html', {
+		'product': p,
+		'rekomendasi': await aget_produk_terkait(p.id),
+	})
+
+
+def metrics(request):
+	"""Metrik tugas/signal handler dalam format teks Prometheus (lihat core/instrumentation.py)."""
+	if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+		return HttpResponseForbidden()
+	return HttpResponse(instrumentation.ekspor_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')